@@ -0,0 +1,124 @@
+"""measure the startup cost of the client: module imports and client creation
+
+    python3 -m benchmarks.import_time [--output results.json] [--compare baseline.json]
+
+Every import is measured in a new interpreter (the median of all runs is reported).
+The creation of clients is measured in this interpreter.  The results are printed as
+JSON (in the format of 'benchmarks.suite').
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+from benchmarks.suite import compare
+
+from urwerk_api_client import __version__, make_client
+from urwerk_api_client.colorsensor import ColorsensorAPI, DeviceAPI, SamplesAPI
+
+MODULES = (
+    "urwerk_api_client",
+    "urwerk_api_client.colorsensor",
+    "urwerk_api_client.spectral_imager",
+    "urwerk_api_client.aio_colorsensor",
+)
+
+_IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+import {}
+print(time.perf_counter() - started)
+"""
+
+
+def measure_import(module, repeat):
+    """return the median import time of a module (and of the whole interpreter run)"""
+    durations = []
+    process_durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.check_output(
+            [sys.executable, "-c", _IMPORT_SCRIPT.format(module)]
+        )
+        process_durations.append(time.perf_counter() - started)
+        durations.append(float(output))
+    return {
+        "runs": repeat,
+        "import_time": statistics.median(durations),
+        "process_time": statistics.median(process_durations),
+    }
+
+
+def measure_creation(create, iterations):
+    create()
+    duration = min(timeit.repeat(create, number=iterations, repeat=5)) / iterations
+    return {"iterations": iterations, "creation_time": duration}
+
+
+def get_benchmarks(repeat, iterations):
+    """return (name, callable) tuples - every callable returns the metrics"""
+    api_url = "http://127.0.0.1/api"
+    benchmarks = [
+        (
+            "import." + module,
+            lambda module=module: measure_import(module, repeat),
+        )
+        for module in MODULES
+    ]
+    benchmarks.extend(
+        [
+            (
+                "create.ColorsensorAPI",
+                lambda: measure_creation(lambda: ColorsensorAPI(api_url), iterations),
+            ),
+            (
+                "create.make_client.SamplesAPI.DeviceAPI",
+                lambda: measure_creation(
+                    lambda: make_client(api_url, SamplesAPI, DeviceAPI), iterations
+                ),
+            ),
+        ]
+    )
+    return benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="runs of every import")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--filter", default="", help="run matching benchmarks only")
+    parser.add_argument("--output", help="write the results to a file")
+    parser.add_argument("--compare", help="a previous result file to compare with")
+    args = parser.parse_args()
+    results = {
+        "meta": {
+            "version": __version__,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    for name, run in get_benchmarks(args.repeat, args.iterations):
+        if args.filter in name:
+            results["results"][name] = run()
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            print(
+                "\n".join(compare(results, json.load(baseline_file))), file=sys.stderr
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""compare the JSON codecs for typical API payloads
+
+    python3 -m benchmarks.json_codec [--number N]
+
+Every available codec decodes (from bytes, including the unpacking of the "data"
+envelope) and encodes a detection profile, a list of detectables and a block of sample
+stream records.
+"""
+
+import argparse
+import json
+import timeit
+
+from benchmarks import payloads
+
+from urwerk_api_client import _unpack_data
+from urwerk_api_client.codec import get_codec, JSONCodec, OrjsonCodec, UjsonCodec
+
+
+def get_payloads():
+    return {
+        "profile": [{"data": payloads.get_profile()}],
+        "detectables": [{"data": payloads.get_detectables()}],
+        "samples": [{"data": payloads.get_sample(index)} for index in range(1000)],
+    }
+
+
+def get_codecs():
+    codecs = []
+    for codec_class in (JSONCodec, OrjsonCodec, UjsonCodec):
+        try:
+            codecs.append(get_codec(codec_class.name))
+        except ImportError:
+            pass
+    return codecs
+
+
+def measure(codec, number):
+    results = {}
+    for name, values in get_payloads().items():
+        encoded = [json.dumps(value).encode() for value in values]
+
+        def decode():
+            for data in encoded:
+                _unpack_data("", "application/json", data, codec)
+
+        def encode():
+            for value in values:
+                codec.dumps(value)
+
+        results[name] = {
+            "decode": min(timeit.repeat(decode, number=number, repeat=3)) / number,
+            "encode": min(timeit.repeat(encode, number=number, repeat=3)) / number,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="machine readable output")
+    args = parser.parse_args()
+    results = {codec.name: measure(codec, args.number) for codec in get_codecs()}
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+    baseline = results[JSONCodec.name]
+    print(
+        "{:8} {:12} {:>12} {:>12} {:>8}".format(
+            "codec", "payload", "decode", "encode", "gain"
+        )
+    )
+    for name, codec_results in results.items():
+        for payload, times in codec_results.items():
+            print(
+                "{:8} {:12} {:>10.1f}us {:>10.1f}us {:>7.1f}x".format(
+                    name,
+                    payload,
+                    times["decode"] * 1e6,
+                    times["encode"] * 1e6,
+                    baseline[payload]["decode"] / times["decode"],
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""an in-process fake of the Urwerk REST API for benchmarks
+
+    with MockUrwerkServer() as server:
+        client = ColorsensorAPI(server.api_url)
+
+Connections are kept alive (HTTP/1.1).  Sample streams are sent chunked like by a real
+device.  Write requests are answered with the (unmodified) request data.
+"""
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import socketserver
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import payloads
+
+
+class _MockHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, address, handler_class, settings_dump, spectrum_points):
+        super().__init__(address, handler_class)
+        self.settings_dump = settings_dump
+        self.spectrum_points = spectrum_points
+        self.wavelengths = payloads.get_wavelengths(spectrum_points)
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def get_next_index(self):
+        with self.lock:
+            self.counter += 1
+            return self.counter
+
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_data(self, data):
+        self._send(200, json.dumps({"data": data}).encode())
+
+    def _send_stream(self, query):
+        count = int(query.get("stream_count", ["100"])[0])
+        csv = query.get("format", ["json"])[0] == "csv"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv" if csv else "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        block = []
+        for index in range(count):
+            if csv:
+                block.append(payloads.get_sample_csv(index).encode() + b"\n")
+            else:
+                record = json.dumps({"data": payloads.get_sample(index)})
+                block.append(record.encode() + b"\n")
+            if len(block) == 64 or index == count - 1:
+                data = b"".join(block)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                block = []
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle_read(self, path, query):
+        server = self.server
+        if path == "sensor/samples" and "stream" in query:
+            self._send_stream(query)
+        elif path in ("sensor/samples", "sensor/samples/current"):
+            self._send_data(payloads.get_sample(server.get_next_index()))
+        elif path == "sensor/spectral/sample":
+            self._send_data(
+                payloads.get_spectral_sample(
+                    server.get_next_index(), server.spectrum_points
+                )
+            )
+        elif path == "sensor/spectral/wavelengths":
+            self._send_data({"wavelengths": server.wavelengths})
+        elif path == "sensor/detectables":
+            self._send_data(payloads.get_detectables())
+        elif path.startswith("sensor/detectables/"):
+            self._send_data(payloads.get_detectable(0))
+        elif path.startswith("sensor/detection-profiles/"):
+            self._send_data(payloads.get_profile())
+        elif path == "settings":
+            self._send(200, server.settings_dump, "text/plain")
+        elif path == "system":
+            self._send_data({"hostname": "mock", "time_zone": "UTC"})
+        elif path == "system/time":
+            self._send_data(
+                {"time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+            )
+        elif path == "firmware/status":
+            self._send_data({"version": "1.0.0", "build_id": "mock"})
+        else:
+            self._send(404, b'{"errors": ["unknown resource"]}')
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path.strip("/")
+        if not path.startswith("api"):
+            self._send(404, b'{"errors": ["unknown resource"]}')
+            return
+        self._handle_read(path[3:].lstrip("/"), parse_qs(parts.query))
+
+    def _handle_write(self):
+        body = self._read_body()
+        if self.headers.get("Content-Type") == "application/json" and body:
+            self._send(200, b'{"data": ' + body + b"}")
+        else:
+            self._send(200, b'{"data": {}}')
+
+    do_POST = do_PUT = do_DELETE = _handle_write
+
+
+class MockUrwerkServer:
+    """a fake device serving samples, spectra, detection profiles and settings
+
+    @param port: the TCP port (0: any free port)
+    @param settings_size: number of categories of the settings dump
+    @param spectrum_points: number of points of every spectrum
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, settings_size=16, spectrum_points=256):
+        self._server = _MockHTTPServer(
+            (host, port),
+            _MockRequestHandler,
+            payloads.get_settings_dump(settings_size).encode(),
+            spectrum_points,
+        )
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def api_url(self):
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/api".format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
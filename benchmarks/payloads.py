@@ -0,0 +1,81 @@
+"""realistic payloads of an Urwerk device (as returned by the API, without envelope)"""
+
+import base64
+import json
+
+
+def get_profile(uuid="6f1c5d2e-8a1b-4c3d-9e2f-0a1b2c3d4e5f"):
+    return {
+        "uuid": uuid,
+        "name": "Recipe 7",
+        "sampling_settings": {
+            "average_count": 4,
+            "integration_time": 1200,
+            "sample_rate": 5000,
+        },
+        "compensation_settings": {"use_calibration_samples": True},
+        "emitters": [
+            {"id": index, "brightness": 80, "enabled": True} for index in range(4)
+        ],
+        "normalization_constant": [1.0123, 0.9876, 1.0042],
+        "colorspace": "Lab",
+    }
+
+
+def get_detectable(index):
+    return {
+        "uuid": "6f1c5d2e-8a1b-4c3d-9e2f-{:012x}".format(index),
+        "name": "detectable {}".format(index),
+        "matcher_id": "0a1b2c3d-8a1b-4c3d-9e2f-{:012x}".format(index % 8),
+        "color": [index * 0.5, 12.25 - index, -3.75 + index / 3],
+        "tolerance": {"type": "sphere", "radius": 2.5},
+        "enabled": True,
+    }
+
+
+def get_detectables(count=64):
+    return {"detectables": [get_detectable(index) for index in range(count)]}
+
+
+def get_sample(index):
+    return {
+        "timestamp": 1600000000000 + index,
+        "color": [index * 0.01, 45.5 + index % 7, -12.25],
+        # the UUIDs of the matched detectables
+        "matches": [get_detectable(index % 3)["uuid"]],
+    }
+
+
+def get_sample_csv(index):
+    return "{},{},{},{},{}".format(
+        1600000000000 + index, index * 0.01, 45.5 + index % 7, -12.25, index % 3
+    )
+
+
+def get_wavelengths(count=256):
+    return [380.0 + 1.5 * index for index in range(count)]
+
+
+def get_spectral_sample(index, count=256):
+    return {
+        "spectrum": [
+            [wavelength, ((offset * 37 + index) % 1000) / 1000]
+            for offset, wavelength in enumerate(get_wavelengths(count))
+        ],
+        "regions_of_interest": [
+            {"x_min": 400.0, "y_min": 0.1, "x_max": 410.5, "y_max": 0.9}
+        ],
+        "frame": index,
+    }
+
+
+def get_settings_dump(category_count=16, entry_count=256):
+    """return the base64 encoded settings dump (as sent by the device)"""
+    settings = {
+        "category{}".format(category): {
+            "entry{}".format(entry): {"value": entry * category, "label": "x" * 16}
+            for entry in range(entry_count)
+        }
+        for category in range(category_count)
+    }
+    return base64.b64encode(json.dumps(settings).encode()).decode()
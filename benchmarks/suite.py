@@ -0,0 +1,197 @@
+"""measure the throughput of the main client paths against a local mock device
+
+    python3 -m benchmarks.suite [--output results.json] [--compare baseline.json]
+
+Every benchmark reports its throughput (requests or samples per second), the latency
+percentiles of single requests and the peak of the memory allocated (by the client and
+the in-process server) during one run.  The results are printed as JSON.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.mock_server import MockUrwerkServer
+
+from urwerk_api_client import __version__, ConnectionPool
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.spectral_imager import SpectralImagerAPI
+
+
+def _get_percentile(sorted_values, percent):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+def _get_peak_memory(operation):
+    tracemalloc.start()
+    try:
+        operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_requests(operation, iterations):
+    operation()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "requests_per_second": iterations / sum(latencies),
+        "latency_p50": _get_percentile(latencies, 50),
+        "latency_p99": _get_percentile(latencies, 99),
+        "peak_memory": _get_peak_memory(operation),
+    }
+
+
+def measure_stream(iterate, count):
+    def consume():
+        return sum(1 for _ in iterate(count))
+
+    started = time.perf_counter()
+    received = consume()
+    duration = time.perf_counter() - started
+    return {
+        "samples": received,
+        "samples_per_second": received / duration,
+        "peak_memory": _get_peak_memory(consume),
+    }
+
+
+def get_benchmarks(api_url, iterations, stream_count, pool):
+    """return (name, callable) tuples - every callable returns the metrics
+
+    @param pool: the ConnectionPool of the pooled clients
+    """
+    client = ColorsensorAPI(api_url)
+    pooled = ColorsensorAPI(api_url, connection_pool=pool)
+    spectral = SpectralImagerAPI(api_url, connection_pool=pool)
+    return [
+        (
+            "colorsensor.get_current_sample",
+            lambda: measure_requests(client.get_current_sample, iterations),
+        ),
+        (
+            "colorsensor.get_current_sample.pooled",
+            lambda: measure_requests(pooled.get_current_sample, iterations),
+        ),
+        (
+            "colorsensor.get_detectables.pooled",
+            lambda: measure_requests(pooled.get_detectables, iterations),
+        ),
+        (
+            "colorsensor.get_current_detection_profile.pooled",
+            lambda: measure_requests(pooled.get_current_detection_profile, iterations),
+        ),
+        (
+            "colorsensor.post_detectable.pooled",
+            lambda: measure_requests(
+                lambda: pooled.post_detectable(data={"name": "new"}), iterations
+            ),
+        ),
+        (
+            "colorsensor.get_settings.pooled",
+            lambda: measure_requests(pooled.get_settings, max(1, iterations // 10)),
+        ),
+        (
+            "colorsensor.sample_stream.json",
+            lambda: measure_stream(
+                lambda count: pooled.get_sample_stream(count=count), stream_count
+            ),
+        ),
+        (
+            "colorsensor.sample_stream.json.buffered",
+            lambda: measure_stream(
+                lambda count: pooled.get_sample_stream(
+                    count=count, buffer_size=64 * 1024
+                ),
+                stream_count,
+            ),
+        ),
+        (
+            "colorsensor.sample_stream.csv.buffered",
+            lambda: measure_stream(
+                lambda count: pooled.get_sample_stream(
+                    count=count, format="csv", buffer_size=64 * 1024
+                ),
+                stream_count,
+            ),
+        ),
+        (
+            "spectral.get_spectral_sample.pooled",
+            lambda: measure_requests(spectral.get_spectral_sample, iterations),
+        ),
+        (
+            "spectral.get_spectrum_array.pooled",
+            lambda: measure_requests(spectral.get_spectrum_array, iterations),
+        ),
+    ]
+
+
+_THROUGHPUT_KEYS = ("requests_per_second", "samples_per_second")
+_DURATION_KEYS = ("import_time", "creation_time")
+
+
+def compare(results, baseline):
+    """return lines describing the relative change of the speed (positive: faster)"""
+    lines = []
+    for name, metrics in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for key in _THROUGHPUT_KEYS + _DURATION_KEYS:
+            if key in metrics and key in previous:
+                if key in _THROUGHPUT_KEYS:
+                    change = metrics[key] / previous[key] - 1
+                else:
+                    change = previous[key] / metrics[key] - 1
+                lines.append("{:50} {:>+7.1f}%".format(name, 100 * change))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--stream-count", type=int, default=20000)
+    parser.add_argument("--filter", default="", help="run matching benchmarks only")
+    parser.add_argument("--output", help="write the results to a file")
+    parser.add_argument("--compare", help="a previous result file to compare with")
+    args = parser.parse_args()
+    results = {
+        "meta": {
+            "version": __version__,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    with MockUrwerkServer() as server, ConnectionPool() as pool:
+        for name, run in get_benchmarks(
+            server.api_url, args.iterations, args.stream_count, pool
+        ):
+            if args.filter in name:
+                results["results"][name] = run()
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            print(
+                "\n".join(compare(results, json.load(baseline_file))), file=sys.stderr
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""a local HTTP server answering requests with scripted responses
+
+    with ScriptedServer() as server:
+        server.add_response("GET", "/api/system", {"data": {"hostname": "test"}})
+        client = ColorsensorAPI(server.api_url)
+
+Responses for the same route are sent in the order they were added; the last one is
+repeated.  All received requests are recorded in 'server.requests'.
+"""
+
+import collections
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import json
+import socketserver
+import threading
+from urllib.parse import urlsplit
+
+Request = collections.namedtuple("Request", ("method", "path", "headers", "body"))
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self):
+        body = self._read_body()
+        request = Request(self.command, self.path, dict(self.headers), body)
+        response = self.server.owner.get_response(request)
+        if callable(response):
+            response = response(request)
+        status, payload, headers = response
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload).encode()
+            headers = dict({"Content-Type": "application/json"}, **headers)
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if payload is None:
+            # close the connection without sending a body
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+            self.close_connection = True
+            return
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _handle
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients close connections at any time (e.g. after an aborted download)
+        pass
+
+
+class ScriptedServer:
+    def __init__(self):
+        self.requests = []
+        self._responses = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.owner = self
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def api_url(self):
+        return "http://127.0.0.1:{}/api".format(self._server.server_address[1])
+
+    def add_response(self, method, path, payload, status=200, headers=None):
+        """answer requests of the route with a payload (dict, list, bytes or None)
+
+        'payload' may also be a function returning a (status, payload, headers) tuple
+        for a Request.  None breaks the connection before the body is sent.
+        """
+        if callable(payload):
+            response = payload
+        else:
+            response = (status, payload, headers or {})
+        with self._lock:
+            self._responses[(method, path)].append(response)
+
+    def get_response(self, request):
+        with self._lock:
+            self.requests.append(request)
+            responses = self._responses.get(
+                (request.method, urlsplit(request.path).path)
+            )
+            if not responses:
+                return 404, {"errors": ["unknown resource"]}, {}
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+    def get_requests(self, method=None, path=None):
+        with self._lock:
+            return [
+                request
+                for request in self.requests
+                if (method is None or request.method == method)
+                and (path is None or urlsplit(request.path).path == path)
+            ]
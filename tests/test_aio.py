@@ -0,0 +1,198 @@
+import asyncio
+import inspect
+import io
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import APIConnectionError
+from urwerk_api_client.aio_colorsensor import AsyncColorsensorAPI
+from urwerk_api_client.aio_spectral_imager import AsyncSpectralImagerAPI
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.models import Detectable, DetectionProfile, ModelCollection
+from urwerk_api_client.spectral_imager import SpectralImagerAPI
+
+# see the module docstrings of 'aio_colorsensor' and 'aio_spectral_imager'
+_SYNC_ONLY = {
+    "apply_output_patterns",
+    "change_detectables",
+    "change_matchers",
+    "download",
+    "export_settings",
+    "get_sample_reader",
+    "get_spectral_pipeline",
+    "get_spectrum_array",
+    "get_wavelength_axis",
+    "import_settings",
+    "iter_processed_spectra",
+    "iter_sample_batches",
+    "iter_spectral_samples",
+    "keep_alive",
+    "post_detectables",
+    "post_matchers",
+    "request_timeout",
+    "set_local_dark_reference",
+    "set_local_white_reference",
+    "set_spectral_pipeline",
+    "snapshot",
+}
+# arguments only supported by the synchronous clients
+_SYNC_ONLY_ARGUMENTS = {"get_sample_stream": {"buffer_size"}}
+
+
+class AsyncClientTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_requests(self):
+        with ScriptedServer() as server:
+            status = {"data": {"version": "1.0.0", "build_id": "b1"}}
+            server.add_response("GET", "/api/firmware/status", status)
+            samples = b"".join(
+                b'{"data": {"timestamp": %d}}\n' % index for index in range(10)
+            )
+            server.add_response(
+                "GET",
+                "/api/sensor/samples",
+                samples,
+                headers={"Content-Type": "application/json"},
+            )
+            client = AsyncColorsensorAPI(server.api_url)
+
+            async def run():
+                versions = await asyncio.gather(
+                    *(client.get_firmware_version() for _ in range(8))
+                )
+                samples = []
+                async with client.get_sample_stream(count=10) as stream:
+                    async for sample in stream:
+                        samples.append(sample)
+                return versions, samples, await client.get_current_build_id()
+
+            versions, samples, build_id = self.run_async(run())
+            client.close()
+        self.assertEqual(versions, ["1.0.0"] * 8)
+        self.assertEqual(build_id, "b1")
+        self.assertEqual(samples, [{"timestamp": index} for index in range(10)])
+
+    def test_models(self):
+        with ScriptedServer() as server:
+            detectables = [{"uuid": "b", "name": "green"}, {"uuid": "a", "name": "red"}]
+            server.add_response(
+                "GET", "/api/sensor/detectables", {"data": {"detectables": detectables}}
+            )
+            server.add_response(
+                "GET",
+                "/api/sensor/detection-profiles/current",
+                {"data": {"uuid": "p", "name": "profile"}},
+            )
+            client = AsyncColorsensorAPI(server.api_url)
+
+            async def run():
+                return (
+                    await client.get_detectables(as_model=True),
+                    await client.get_current_detection_profile(as_model=True),
+                )
+
+            detectables, profile = self.run_async(run())
+            client.close()
+        self.assertIsInstance(detectables, ModelCollection)
+        self.assertIsInstance(detectables[0], Detectable)
+        self.assertEqual([item.name for item in detectables], ["red", "green"])
+        self.assertIsInstance(profile, DetectionProfile)
+        self.assertEqual(profile.name, "profile")
+
+    def test_streamed_uploads(self):
+        with ScriptedServer() as server:
+            server.add_response(
+                "PUT",
+                "/api/blob",
+                lambda request: (200, {"data": len(request.body)}, {}),
+            )
+            client = AsyncColorsensorAPI(server.api_url)
+            source = io.BytesIO(bytes(range(256)) * 100)
+
+            async def run():
+                return (
+                    await client._put(url="blob", data=source),
+                    await client._put(url="blob", data=iter([b"ab", b"", b"cde"])),
+                )
+
+            sizes = self.run_async(run())
+            client.close()
+        self.assertEqual(sizes, (25600, 5))
+        requests = server.get_requests("PUT")
+        self.assertEqual(requests[0].headers["Content-Length"], "25600")
+        self.assertEqual(requests[0].body, source.getvalue())
+        self.assertEqual(requests[1].headers["Transfer-Encoding"], "chunked")
+        self.assertEqual(requests[1].body, b"abcde")
+
+    def test_broken_responses(self):
+        with ScriptedServer() as server:
+            # the connection is closed before the announced body was sent
+            server.add_response("GET", "/api/system", None)
+            client = AsyncColorsensorAPI(server.api_url)
+            with self.assertRaises(APIConnectionError) as context:
+                self.run_async(client.get_system())
+            client.close()
+        self.assertIn("API Read Error", str(context.exception))
+
+    def test_cancelled_requests_release_connections(self):
+        async def handle(reader, writer):
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            if b"/hang" in request_line:
+                # accept the request but never answer
+                await reader.read()
+            else:
+                body = b'{"data": "ok"}'
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+                )
+                await writer.drain()
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            client = AsyncColorsensorAPI(
+                "http://127.0.0.1:{}/api".format(port), max_connections=2
+            )
+            try:
+                for _ in range(3):
+                    with self.assertRaises(asyncio.TimeoutError):
+                        await asyncio.wait_for(client._get(url="hang"), 0.1)
+                return await asyncio.wait_for(client._get(url="ok"), 2)
+            finally:
+                client.close()
+                server.close()
+                await server.wait_closed()
+
+        self.assertEqual(self.run_async(run()), "ok")
+
+
+class AsyncClientParityTest(unittest.TestCase):
+    def test_methods_match_the_sync_clients(self):
+        clients = (
+            (ColorsensorAPI, AsyncColorsensorAPI),
+            (SpectralImagerAPI, AsyncSpectralImagerAPI),
+        )
+        for sync_class, async_class in clients:
+            for name in dir(sync_class):
+                method = getattr(sync_class, name)
+                if name.startswith("_") or name in _SYNC_ONLY or not callable(method):
+                    continue
+                with self.subTest(client=sync_class.__name__, method=name):
+                    self.assertTrue(hasattr(async_class, name), "missing")
+                    expected = [
+                        parameter
+                        for parameter in inspect.signature(method).parameters
+                        if parameter not in _SYNC_ONLY_ARGUMENTS.get(name, ())
+                    ]
+                    parameters = inspect.signature(getattr(async_class, name))
+                    self.assertEqual(list(parameters.parameters), expected)
@@ -0,0 +1,86 @@
+import json
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client.batches import get_sample_fields, iter_batches, SampleBatch
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.models import Sample
+
+_MATCH_ID = "6f1c5d2e-8a1b-4c3d-9e2f-00000000000{}"
+
+
+class SampleFieldsTest(unittest.TestCase):
+    def test_schemas(self):
+        sample = {"timestamp": 5, "color": [1.0, 2.0], "matches": [_MATCH_ID]}
+        self.assertEqual(get_sample_fields(sample), (5, [1.0, 2.0], [_MATCH_ID]))
+        self.assertEqual(get_sample_fields({"timestamp": 5, "color": []}), (5, [], ()))
+        self.assertEqual(get_sample_fields([5, 1.0, 2.0]), (5, [1.0, 2.0], ()))
+        model = Sample(sample)
+        self.assertEqual((model.timestamp, model.color), (5, [1.0, 2.0]))
+        sample = {"time": 5, "values": {"L": 1.0, "a": 2.0}}
+        self.assertEqual(
+            get_sample_fields(sample, timestamp_key="time", color_key="values"),
+            (5, [1.0, 2.0], ()),
+        )
+
+
+class SampleBatchTest(unittest.TestCase):
+    def test_append(self):
+        batch = SampleBatch(3, 2)
+        matches = [_MATCH_ID.format(7), _MATCH_ID.format(8)]
+        batch.append(1, [0.5, 1.5], matches)
+        batch.append(2, [2.5, 3.5])
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.timestamps.tolist(), [1, 2])
+        self.assertEqual(batch.values.tolist(), [[0.5, 1.5], [2.5, 3.5]])
+        self.assertEqual(batch.get_matches(0), matches)
+        self.assertEqual(batch.get_matches(1), [])
+        self.assertEqual(batch.match_offsets.tolist(), [0, 2, 2])
+        self.assertEqual(batch.match_ids, matches)
+        with self.assertRaises(ValueError):
+            batch.append(3, [1.0])
+        batch.append(3, [0, 0])
+        with self.assertRaises(IndexError):
+            batch.append(4, [0, 0])
+
+    def test_empty(self):
+        batch = SampleBatch(4, 3)
+        self.assertEqual(batch.values.tolist(), [])
+        batch.append(1, [1, 2, 3], [_MATCH_ID.format(1)])
+        batch.clear()
+        self.assertEqual(len(batch.values), 0)
+        self.assertEqual(batch.timestamps.tolist(), [])
+        self.assertEqual(batch.match_ids, [])
+
+    def test_reuse(self):
+        samples = [[index, index * 2.0] for index in range(5)]
+        sizes = [len(batch) for batch in iter_batches(samples, 2, reuse=True)]
+        self.assertEqual(sizes, [2, 2, 1])
+
+
+class SampleBatchStreamTest(unittest.TestCase):
+    def test_iter_sample_batches(self):
+        samples = [
+            {
+                "timestamp": 1600000000000 + index,
+                "color": [index * 0.01, 45.5, -12.25],
+                "matches": [_MATCH_ID.format(index % 3)],
+            }
+            for index in range(100)
+        ]
+        body = b"".join(
+            json.dumps({"data": sample}).encode() + b"\n" for sample in samples
+        )
+        with ScriptedServer() as server:
+            server.add_response(
+                "GET",
+                "/api/sensor/samples",
+                body,
+                headers={"Content-Type": "application/json"},
+            )
+            client = ColorsensorAPI(server.api_url)
+            batches = list(client.iter_sample_batches(batch_size=64, count=100))
+        self.assertEqual([len(batch) for batch in batches], [64, 36])
+        self.assertEqual(batches[0].channel_count, 3)
+        self.assertEqual(batches[1].timestamps[0], 1600000000064)
+        self.assertEqual(batches[1].get_matches(0), [_MATCH_ID.format(64 % 3)])
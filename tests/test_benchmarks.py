@@ -0,0 +1,78 @@
+import unittest
+
+from benchmarks import import_time, json_codec
+from benchmarks.mock_server import MockUrwerkServer
+from benchmarks.suite import compare, get_benchmarks
+
+from urwerk_api_client import ConnectionPool
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+
+class MockServerTest(unittest.TestCase):
+    def test_resources(self):
+        with MockUrwerkServer(settings_size=4) as server:
+            client = ColorsensorAPI(server.api_url)
+            self.assertEqual(client.get_firmware_version(), "1.0.0")
+            self.assertEqual(len(client.get_settings()), 4)
+            self.assertEqual(client.post_detectable(data={"name": "a"}), {"name": "a"})
+            self.assertEqual(len(list(client.get_sample_stream(count=130))), 130)
+
+    def test_sample_schema(self):
+        with MockUrwerkServer() as server:
+            client = ColorsensorAPI(server.api_url)
+            detectables = client.get_detectables()
+            batches = list(client.iter_sample_batches(count=10, batch_size=4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+        self.assertEqual(batches[0].channel_count, 3)
+        # the matches refer to detectables of the device
+        uuids = {detectable["uuid"] for detectable in detectables}
+        self.assertLessEqual(set(batches[0].match_ids), uuids)
+
+
+class BenchmarkSuiteTest(unittest.TestCase):
+    def test_benchmarks(self):
+        with MockUrwerkServer() as server, ConnectionPool() as pool:
+            benchmarks = get_benchmarks(server.api_url, 2, 10, pool)
+            results = {"results": {name: run() for name, run in benchmarks}}
+        for name, metrics in results["results"].items():
+            with self.subTest(name=name):
+                self.assertGreater(metrics["peak_memory"], 0)
+                if "samples" in metrics:
+                    self.assertEqual(metrics["samples"], 10)
+                else:
+                    self.assertGreater(metrics["requests_per_second"], 0)
+
+    def test_compare(self):
+        baseline = {
+            "results": {
+                "a": {"requests_per_second": 100},
+                "b": {"samples_per_second": 2},
+                "c": {"import_time": 0.2},
+                "d": {"samples_per_second": 1},
+            }
+        }
+        results = {
+            "results": {
+                "a": {"requests_per_second": 150},
+                "b": {"samples_per_second": 1},
+                "c": {"import_time": 0.1},
+            }
+        }
+        lines = compare(results, baseline)
+        self.assertEqual(
+            [line.split() for line in lines],
+            [["a", "+50.0%"], ["b", "-50.0%"], ["c", "+100.0%"]],
+        )
+
+    def test_startup_benchmarks(self):
+        benchmarks = dict(import_time.get_benchmarks(repeat=1, iterations=10))
+        self.assertEqual(len(benchmarks), len(import_time.MODULES) + 2)
+        self.assertGreater(benchmarks["import.urwerk_api_client"]()["import_time"], 0)
+        metrics = benchmarks["create.ColorsensorAPI"]()
+        self.assertGreater(metrics["creation_time"], 0)
+
+    def test_codec_benchmark(self):
+        codecs = json_codec.get_codecs()
+        self.assertIn("json", [codec.name for codec in codecs])
+        results = json_codec.measure(codecs[0], number=1)
+        self.assertEqual(sorted(results), ["detectables", "profile", "samples"])
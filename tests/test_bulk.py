@@ -0,0 +1,82 @@
+import json
+import threading
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import APIRequestError, ConnectionPool
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+
+def _create(request):
+    data = json.loads(request.body.decode())
+    if not data.get("name"):
+        return 400, {"errors": ["name is required"]}, {}
+    return 200, {"data": dict(data, uuid="uuid-" + data["name"])}, {}
+
+
+class BulkTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.add_response("POST", "/api/sensor/detectables", _create)
+        self.client = ColorsensorAPI(self.server.api_url)
+
+    def test_per_item_results(self):
+        for max_workers in (1, 3):
+            result = self.client.post_detectables(
+                [{"name": "red"}, {}, {"name": "blue"}],
+                profile="p1",
+                max_workers=max_workers,
+            )
+            self.assertFalse(result.ok)
+            self.assertEqual(list(result.results), [0, 2])
+            self.assertEqual(result.results[2]["uuid"], "uuid-blue")
+            self.assertIsInstance(result.errors[1], APIRequestError)
+            with self.assertRaises(APIRequestError):
+                result.raise_for_errors()
+        bodies = [json.loads(r.body.decode()) for r in self.server.get_requests()]
+        self.assertEqual({body["profile_id"] for body in bodies}, {"p1"})
+
+    def test_persistent_connection(self):
+        threads = set()
+
+        def create(request):
+            # the server handles every connection in its own thread
+            threads.add(threading.current_thread().name)
+            return _create(request)
+
+        self.server.add_response("POST", "/api/sensor/matchers", create)
+        result = self.client.post_matchers([{"name": str(n)} for n in range(5)])
+        self.assertTrue(result.ok)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNone(self.client._get_connection_pool())
+
+    def test_connection_pool_of_the_client(self):
+        pool = ConnectionPool(max_idle=2)
+        self.addCleanup(pool.close)
+        client = ColorsensorAPI(self.server.api_url, connection_pool=pool)
+        items = [{"name": str(n)} for n in range(4)]
+        self.assertTrue(client.post_detectables(items, max_workers=2).ok)
+        # the connections of the workers were handed back to the pool
+        self.assertTrue(any(pool._idle.values()))
+
+    def test_changes(self):
+        for resource in ("detectables", "matchers"):
+            for any_id in ("a", "b"):
+                self.server.add_response(
+                    "PUT",
+                    "/api/sensor/{}/{}".format(resource, any_id),
+                    {"data": {"uuid": any_id}},
+                )
+        changes = {"a": {"name": "x"}, "b": {"name": "y"}}
+        self.assertEqual(
+            list(self.client.change_detectables(changes, max_workers=2).results),
+            ["a", "b"],
+        )
+        self.assertTrue(self.client.change_matchers(changes).ok)
+        patterns = {"a": [1, 0], "b": [0, 1]}
+        self.assertTrue(self.client.apply_output_patterns(patterns).ok)
+        request = self.server.get_requests("PUT", "/api/sensor/matchers/b")[-1]
+        self.assertEqual(
+            json.loads(request.body.decode()), {"output_pattern": {"states": [0, 1]}}
+        )
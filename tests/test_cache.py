@@ -0,0 +1,92 @@
+import time
+import unittest
+
+from urwerk_api_client.cache import cached_response, invalidates, ResponseCache
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_get_and_put(self):
+        cache = ResponseCache(maxsize=2)
+        self.assertEqual(cache.get("a"), (False, None))
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), (True, 1))
+        cache.put("c", 3)
+        # "b" was the least recently used entry
+        self.assertEqual(cache.get("b"), (False, None))
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["evictions"], stats["size"]), (1, 1, 2))
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0.05)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl=10)
+        time.sleep(0.1)
+        self.assertEqual(cache.get("a"), (False, None))
+        self.assertEqual(cache.get("b"), (True, 2))
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.put("a", 1, tags=("system",), scope="device1")
+        cache.put("b", 2, tags=("profile",), scope="device1")
+        cache.put("c", 3, tags=("system",), scope="device2")
+        cache.invalidate("system", scope="device1")
+        self.assertEqual([cache.get(key)[0] for key in "abc"], [False, True, True])
+        cache.invalidate(scope="device1")
+        self.assertEqual([cache.get(key)[0] for key in "bc"], [False, True])
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+
+class _Client:
+    def __init__(self, root_url, cache):
+        self.root_url = root_url
+        self._response_cache = cache
+        self.reads = 0
+
+    @cached_response("system")
+    def get_system(self, detail=None):
+        self.reads += 1
+        return {"device": self.root_url, "detail": detail}
+
+    @cached_response("profile")
+    def get_profile(self):
+        self.reads += 1
+        return {}
+
+    @invalidates("system")
+    def change_system(self):
+        pass
+
+    @invalidates()
+    def reboot(self):
+        pass
+
+
+class CachedResponseTest(unittest.TestCase):
+    def test_cached_per_arguments(self):
+        client = _Client("http://a/api", ResponseCache())
+        client.get_system()
+        client.get_system()
+        client.get_system(detail=1)
+        self.assertEqual(client.reads, 2)
+        client.change_system()
+        client.get_system()
+        client.get_profile()
+        client.get_profile()
+        self.assertEqual(client.reads, 4)
+
+    def test_invalidation_is_scoped_to_the_device(self):
+        cache = ResponseCache()
+        first = _Client("http://a/api", cache)
+        second = _Client("http://b/api", cache)
+        for client in (first, second):
+            client.get_system()
+            client.get_profile()
+        self.assertNotEqual(first.get_system(), second.get_system())
+        first.reboot()
+        second.get_system()
+        second.get_profile()
+        self.assertEqual(second.reads, 2)
+        first.get_system()
+        self.assertEqual(first.reads, 3)
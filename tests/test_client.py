@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from tests.scripted_server import ScriptedServer
+import urwerk_api_client
+from urwerk_api_client import HTTPRequester, make_client
+from urwerk_api_client.colorsensor import (
+    ColorsensorAPI,
+    DeviceAPI,
+    FirmwareAPI,
+    SamplesAPI,
+)
+from urwerk_api_client.lazy import lazy_import, LazyModule
+
+
+def _validated_system(request):
+    if request.headers.get("If-None-Match") == '"1"':
+        return 304, b"", {"ETag": '"1"'}
+    return 200, {"data": {"hostname": "a"}}, {"ETag": '"1"'}
+
+
+class ConditionalRequestTest(unittest.TestCase):
+    def test_not_modified(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/system", _validated_system)
+            client = ColorsensorAPI(server.api_url, conditional_requests=True)
+            first = client.get_system()
+            self.assertIs(client.get_system(), first)
+            self.assertEqual(first, {"hostname": "a"})
+            requests = server.get_requests("GET", "/api/system")
+            self.assertNotIn("If-None-Match", requests[0].headers)
+            self.assertEqual(requests[1].headers["If-None-Match"], '"1"')
+
+    def test_disabled(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/system", _validated_system)
+            client = ColorsensorAPI(server.api_url)
+            client.get_system()
+            client.get_system()
+            for request in server.get_requests():
+                self.assertNotIn("If-None-Match", request.headers)
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_repeated_reads(self):
+        status = {"data": {"version": "1.0", "build_id": "b1"}}
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/firmware/status", status)
+            server.add_response("PUT", "/api/system", {"data": {}})
+            client = ColorsensorAPI(server.api_url)
+            with client.snapshot():
+                with client.snapshot():
+                    self.assertEqual(client.get_firmware_version(), "1.0")
+                self.assertEqual(client.get_current_build_id(), "b1")
+                self.assertEqual(len(server.requests), 1)
+                # writes discard the snapshot
+                client.change_system({"hostname": "b"})
+                client.get_firmware_version()
+                self.assertEqual(len(server.get_requests("GET")), 2)
+            client.get_firmware_version()
+            self.assertEqual(len(server.get_requests("GET")), 3)
+
+
+class MakeClientTest(unittest.TestCase):
+    def test_mixins(self):
+        client = make_client("http://sensor/api/", SamplesAPI, DeviceAPI, timeout=2)
+        self.assertIsInstance(client, SamplesAPI)
+        self.assertIsInstance(client, DeviceAPI)
+        self.assertNotIsInstance(client, FirmwareAPI)
+        self.assertEqual(client.root_url, "http://sensor/api")
+        self.assertIs(type(make_client("", SamplesAPI, DeviceAPI)), type(client))
+        self.assertIs(type(make_client("")).__bases__[0], HTTPRequester)
+        with self.assertRaises(TypeError):
+            make_client("", object)
+
+    def test_requests(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/sensor/samples/current", {"data": [1, 2]})
+            client = make_client(server.api_url, SamplesAPI)
+            self.assertEqual(client.get_current_sample(), [1, 2])
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_lazy_module(self):
+        sys.modules.pop("colorsys", None)
+        module = lazy_import("colorsys")
+        self.assertIsInstance(module, LazyModule)
+        self.assertNotIn("colorsys", sys.modules)
+        self.assertEqual(module.rgb_to_hsv(1, 0, 0), (0, 1, 1))
+        self.assertIn("colorsys", sys.modules)
+        self.assertIs(lazy_import("colorsys"), sys.modules["colorsys"])
+
+    def test_slow_modules_are_not_imported(self):
+        code = (
+            "import sys, urwerk_api_client.colorsensor; "
+            "print(' '.join(name for name in ('http.client', 'json', 'urllib.request')"
+            " if name in sys.modules))"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code])
+        self.assertEqual(output.strip(), b"")
+
+    def test_submodules(self):
+        # every module is available as an attribute of the package
+        directory = os.path.dirname(urwerk_api_client.__file__)
+        modules = {
+            name[:-3]
+            for name in os.listdir(directory)
+            if name.endswith(".py") and name != "__init__.py"
+        }
+        self.assertEqual(urwerk_api_client._SUBMODULES, modules)
@@ -0,0 +1,55 @@
+import importlib.util
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client.codec import DEFAULT_CODEC, get_codec
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+
+def _get_available_codecs():
+    """return the names of the installed codecs"""
+    return [
+        name
+        for name in ("orjson", "ujson")
+        if importlib.util.find_spec(name) is not None
+    ] + ["json"]
+
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        value = {"name": "grün", "values": [1, 0.5, None, True]}
+        for name in _get_available_codecs():
+            codec = get_codec(name)
+            self.assertEqual(codec.name, name)
+            encoded = codec.dumps(value)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(codec.loads(encoded), value)
+            self.assertEqual(get_codec("json").loads(encoded), value)
+
+    def test_selection(self):
+        # ujson is never selected by default
+        default = "orjson" if "orjson" in _get_available_codecs() else "json"
+        # shared by all clients (and imported on first use)
+        self.assertIs(get_codec(), DEFAULT_CODEC)
+        self.assertEqual(get_codec().name, default)
+        self.assertEqual(DEFAULT_CODEC.name, default)
+        codec = get_codec("json")
+        self.assertIs(get_codec(codec), codec)
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+        for name in ("orjson", "ujson"):
+            if name not in _get_available_codecs():
+                with self.assertRaises(ImportError):
+                    get_codec(name)
+
+    def test_client(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/system", {"data": {"hostname": "grün"}})
+            server.add_response("PUT", "/api/system", {"data": {}})
+            for name in _get_available_codecs():
+                client = ColorsensorAPI(server.api_url, json_codec=name)
+                self.assertEqual(client.get_system()["hostname"], "grün")
+                client.change_system({"hostname": "grün"})
+                request = server.get_requests("PUT")[-1]
+                body = get_codec("json").loads(request.body)
+                self.assertEqual(body, {"hostname": "grün"})
@@ -0,0 +1,66 @@
+import time
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import APIRequestError
+from urwerk_api_client.fleet import DEFAULT_TIMEOUT, Fleet, FleetTimeoutError
+
+
+def _slow_system(request):
+    time.sleep(0.5)
+    return 200, {"data": {"hostname": "slow"}}, {}
+
+
+class FleetTest(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+        for hostname in ("a", "b"):
+            server = ScriptedServer().__enter__()
+            self.addCleanup(server.__exit__, None, None, None)
+            server.add_response("GET", "/api/system", {"data": {"hostname": hostname}})
+            self.servers.append(server)
+
+    def get_fleet(self, **kwargs):
+        fleet = Fleet([server.api_url for server in self.servers], **kwargs)
+        self.addCleanup(fleet.close)
+        return fleet
+
+    def test_results_by_host(self):
+        fleet = self.get_fleet()
+        # requests are never sent without a timeout
+        self.assertEqual(fleet._own_pool.timeout, DEFAULT_TIMEOUT)
+        result = fleet.get_system()
+        self.assertTrue(result.ok)
+        self.assertEqual(list(result.results), fleet.hosts)
+        self.assertEqual(
+            [value["hostname"] for value in result.results.values()], ["a", "b"]
+        )
+        result = fleet.call(lambda client, key: client.get_system()[key], "hostname")
+        self.assertEqual(list(result.results.values()), ["a", "b"])
+
+    def test_errors(self):
+        self.servers[1].add_response("GET", "/api/system", b"down", status=500)
+        fleet = self.get_fleet()
+        fleet.get_system()
+        result = fleet.get_system()
+        self.assertFalse(result.ok)
+        self.assertEqual(list(result.results), fleet.hosts[:1])
+        self.assertIsInstance(result.errors[fleet.hosts[1]], APIRequestError)
+        with self.assertRaises(APIRequestError):
+            result.raise_for_errors()
+        with self.assertRaises(AttributeError):
+            fleet.unknown_method()
+
+    def test_timeout(self):
+        self.servers[1].add_response("GET", "/api/system", _slow_system)
+        fleet = self.get_fleet(timeout=5)
+        fleet.get_system()
+        started = time.monotonic()
+        result = fleet.get_system(timeout=0.1)
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(list(result.results), fleet.hosts[:1])
+        self.assertIsInstance(result.errors[fleet.hosts[1]], FleetTimeoutError)
+
+    def test_duplicate_members(self):
+        with self.assertRaises(ValueError):
+            Fleet([self.servers[0].api_url] * 2)
@@ -0,0 +1,74 @@
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import APIRequestError, HistogramAggregator
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.instrumentation import LatencyHistogram
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.record(value / 1000)
+        summary = histogram.to_dict()
+        self.assertEqual(summary["count"], 100)
+        self.assertLess(summary["p50"], summary["p99"])
+
+
+class InstrumentationTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        detectables = {"data": {"detectables": [{"uuid": "a"}, {"uuid": "b"}]}}
+        self.server.add_response("GET", "/api/sensor/detectables", detectables)
+        samples = b"".join(
+            b'{"data": {"timestamp": %d}}\n' % index for index in range(100)
+        )
+        self.server.add_response(
+            "GET",
+            "/api/sensor/samples",
+            samples,
+            headers={"Content-Type": "application/json"},
+        )
+        self.client = ColorsensorAPI(self.server.api_url)
+        self.events = []
+        self.client.instrumentation.add_listener(self.events.append)
+        self.aggregator = self.client.instrumentation.add_listener(
+            HistogramAggregator()
+        )
+
+    def get_endpoint(self, url_template):
+        for endpoint in self.aggregator.dump():
+            if endpoint["url_template"] == url_template:
+                return endpoint
+        raise KeyError(url_template)
+
+    def test_requests(self):
+        self.client.get_detectables()
+        with self.assertRaises(APIRequestError):
+            self.client._get(url="unknown")
+        self.assertEqual([event.status for event in self.events], [200, 404])
+        self.assertGreater(self.events[0].bytes_received, 0)
+        self.assertIsNone(self.events[0].error)
+        self.assertIsNotNone(self.events[1].error)
+        self.assertEqual(self.get_endpoint("unknown")["errors"], 1)
+
+    def test_stream_closed_early(self):
+        stream = self.client.get_sample_stream(count=100)
+        for index, _ in enumerate(stream):
+            if index == 4:
+                break
+        stream.close()
+        self.assertEqual(len(self.events), 1)
+        self.assertIsNone(self.events[0].error)
+        endpoint = self.get_endpoint("sensor/samples")
+        self.assertEqual(endpoint["errors"], 0)
+        self.assertEqual(endpoint["statuses"], {"200": 1})
+
+    def test_decode_time_of_streams(self):
+        for buffer_size in (None, 1024):
+            self.events.clear()
+            stream = self.client.get_sample_stream(count=100, buffer_size=buffer_size)
+            self.assertEqual(len(list(stream)), 100)
+            self.assertGreater(self.events[0].decode_time, 0)
@@ -0,0 +1,78 @@
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.models import (
+    Detectable,
+    DetectionProfile,
+    Emitter,
+    Matcher,
+    ModelCollection,
+    Sample,
+)
+
+
+def _get_detectables():
+    return [
+        {"uuid": "a", "name": "red", "matcher_id": "m"},
+        {"uuid": "b", "name": "green", "matcher_id": "m"},
+        {"uuid": "c", "name": "blue", "matcher_id": None},
+    ]
+
+
+class ModelTest(unittest.TestCase):
+    def test_fields(self):
+        data = {"uuid": "p", "name": "profile", "emitters": [{"id": 1, "name": "e"}]}
+        profile = DetectionProfile(data)
+        self.assertEqual((profile.uuid, profile.name), ("p", "profile"))
+        self.assertIsInstance(profile.emitters, ModelCollection)
+        self.assertIs(profile.emitters, profile.emitters)
+        self.assertEqual(profile.emitters[0], Emitter({"id": 1, "name": "e"}))
+        self.assertEqual(profile["name"], "profile")
+        self.assertIs(profile.to_dict(), data)
+
+    def test_nested_model(self):
+        matcher = Matcher({"uuid": "m", "output_pattern": {"states": [1, 0]}})
+        self.assertEqual(matcher.output_pattern.states, [1, 0])
+        self.assertIsNone(Matcher({"uuid": "m"}).output_pattern)
+
+
+class ModelCollectionTest(unittest.TestCase):
+    def test_lookup(self):
+        detectables = ModelCollection(_get_detectables(), Detectable)
+        self.assertEqual(len(detectables), 3)
+        self.assertIn("b", detectables)
+        self.assertEqual(detectables.get("b").name, "green")
+        self.assertEqual(detectables.get_by_name("blue").uuid, "c")
+        self.assertIsNone(detectables.get("x"))
+        self.assertEqual([item.uuid for item in detectables], ["a", "b", "c"])
+        self.assertIs(detectables[-1], detectables[2])
+
+    def test_slice(self):
+        detectables = ModelCollection(_get_detectables(), Detectable)
+        self.assertEqual([item.uuid for item in detectables[0:2]], ["a", "b"])
+        self.assertEqual([item.uuid for item in detectables[::-2]], ["c", "a"])
+        self.assertEqual(detectables[5:], [])
+
+
+class ClientModelTest(unittest.TestCase):
+    def test_as_model(self):
+        with ScriptedServer() as server:
+            server.add_response(
+                "GET",
+                "/api/sensor/detectables",
+                {"data": {"detectables": _get_detectables()[::-1]}},
+            )
+            server.add_response(
+                "GET",
+                "/api/sensor/samples/current",
+                {"data": {"timestamp": 5, "color": [1.0, 2.0], "matches": ["a"]}},
+            )
+            client = ColorsensorAPI(server.api_url)
+            detectables = client.get_detectables(as_model=True)
+            sample = client.get_current_sample(as_model=True)
+            self.assertEqual(client.get_detectables(), _get_detectables())
+        self.assertEqual([item.uuid for item in detectables], ["a", "b", "c"])
+        self.assertIsInstance(sample, Sample)
+        self.assertEqual((sample.color, sample.matches), ([1.0, 2.0], ["a"]))
+        self.assertEqual(detectables.get(sample.matches[0]).name, "red")
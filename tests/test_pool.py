@@ -0,0 +1,73 @@
+import socket
+import unittest
+import urllib.error
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import ConnectionPool
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.add_response("GET", "/api/system", {"data": {"hostname": "a"}})
+        self.pool = ConnectionPool(max_idle=1)
+        self.addCleanup(self.pool.close)
+
+    def get_idle_connections(self):
+        return [conn for idle in self.pool._idle.values() for conn, _ in idle]
+
+    def test_connections_are_reused(self):
+        client = ColorsensorAPI(self.server.api_url, connection_pool=self.pool)
+        self.assertEqual(client.get_system(), {"hostname": "a"})
+        connections = self.get_idle_connections()
+        self.assertEqual(len(connections), 1)
+        self.assertEqual(client.get_system(), {"hostname": "a"})
+        self.assertEqual(self.get_idle_connections(), connections)
+
+    def test_unread_responses(self):
+        url = self.server.api_url + "/system"
+        first = self.pool.urlopen(url, "GET")
+        second = self.pool.urlopen(url, "GET")
+        # the body of the first response was not read: its connection is closed
+        self.pool.release(first)
+        self.assertEqual(self.get_idle_connections(), [])
+        second.read()
+        self.pool.release(second)
+        self.assertEqual(len(self.get_idle_connections()), 1)
+
+    def test_max_idle(self):
+        url = self.server.api_url + "/system"
+        # concurrent requests are not limited, surplus connections are closed
+        responses = [self.pool.urlopen(url, "GET") for _ in range(2)]
+        for response in responses:
+            response.read()
+            self.pool.release(response)
+        self.assertEqual(len(self.get_idle_connections()), 1)
+
+    def test_idle_timeout(self):
+        self.pool.idle_timeout = 0
+        client = ColorsensorAPI(self.server.api_url, connection_pool=self.pool)
+        client.get_system()
+        connection = self.get_idle_connections()[0]
+        client.get_system()
+        self.assertIsNone(connection.sock)
+        self.assertNotEqual(self.get_idle_connections(), [connection])
+
+    def test_closed_connections_are_replaced(self):
+        client = ColorsensorAPI(self.server.api_url, connection_pool=self.pool)
+        client.get_system()
+        # the idle connection is shut down in the meantime
+        self.get_idle_connections()[0].sock.shutdown(socket.SHUT_WR)
+        self.assertEqual(client.get_system(), {"hostname": "a"})
+
+    def test_errors(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.pool.urlopen(self.server.api_url + "/unknown", "GET")
+        self.assertEqual(context.exception.code, 404)
+        self.assertIn(b"unknown resource", context.exception.read())
+        # the connection is still usable
+        self.assertEqual(len(self.get_idle_connections()), 1)
+        with self.assertRaises(urllib.error.URLError):
+            self.pool.urlopen("ftp://127.0.0.1/api", "GET")
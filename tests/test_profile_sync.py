@@ -0,0 +1,165 @@
+import contextlib
+import unittest
+
+from urwerk_api_client import APIRequestError
+from urwerk_api_client.diff import get_changes, iter_differences, MISSING
+from urwerk_api_client.profile_sync import ProfileSync
+
+
+class _Client:
+    """an in-memory device recording the write requests"""
+
+    def __init__(self):
+        self.profile = {"name": "Recipe 1", "colorspace": {"space_id": 1}}
+        self.emitters = [{"id": 1, "brightness": 50}]
+        self.matchers = [
+            {"uuid": "m1", "name": "good", "output_pattern": {"states": [1, 0]}},
+            {"uuid": "m2", "name": "old", "output_pattern": {"states": [0, 0]}},
+        ]
+        self.detectables = [
+            {"uuid": "d1", "name": "red", "matcher_id": "m1", "tolerance": 5},
+            {"uuid": "d2", "name": "gone", "matcher_id": "m2", "tolerance": 5},
+        ]
+        self.requests = []
+        self.fail = set()
+
+    @contextlib.contextmanager
+    def keep_alive(self, max_idle=1):
+        yield
+
+    def _get_connection_pool(self):
+        return None
+
+    @contextlib.contextmanager
+    def _use_connection_pool(self, pool):
+        yield
+
+    def _write(self, *request):
+        self.requests.append(request)
+        if request[:2] in self.fail:
+            raise APIRequestError("failed", status_code=400)
+        return (
+            {"uuid": "new-" + str(request[2].get("name"))}
+            if request[0] == "post"
+            else {}
+        )
+
+    def get_detection_profile(self, any_id):
+        return self.profile
+
+    def get_emitters(self, profile=None):
+        return {"emitters": self.emitters}
+
+    def get_matchers(self, profile=None):
+        return self.matchers
+
+    def get_detectables(self, profile=None):
+        return self.detectables
+
+    def change_detection_profile(self, any_id, data):
+        return self._write("put", "profile", data)
+
+    def change_emitter(self, any_id, data, profile=None):
+        return self._write("put", "emitter", any_id, data)
+
+    def post_matcher(self, profile=None, data=None):
+        return self._write("post", "matcher", data)
+
+    def change_matcher(self, any_id, data, profile=None):
+        return self._write("put", "matcher", any_id, data)
+
+    def delete_matcher(self, any_id, profile=None):
+        return self._write("delete", "matcher", any_id)
+
+    def post_detectable(self, profile=None, data=None):
+        return self._write("post", "detectable", data)
+
+    def change_detectable(self, any_id, data, profile=None):
+        return self._write("put", "detectable", any_id, data)
+
+    def delete_detectable(self, any_id, profile=None):
+        return self._write("delete", "detectable", any_id)
+
+
+_DESIRED = {
+    "profile": {"name": "Recipe 7", "colorspace": {"space_id": 1}},
+    "emitters": {"1": {"brightness": 50}},
+    "matchers": [
+        {"name": "good", "output_pattern": {"states": [1, 1]}},
+        {"name": "new", "output_pattern": {"states": [0, 1]}},
+    ],
+    "detectables": [
+        {"name": "red", "matcher_id": "good", "tolerance": 5},
+        {"name": "blue", "matcher_id": "new"},
+    ],
+}
+
+
+class DiffTest(unittest.TestCase):
+    def test_iter_differences(self):
+        old = {"a": 1, "b": {"c": [1, 2], "d": 3}}
+        new = {"b": {"c": [1, 3], "d": 3}, "e": 4}
+        self.assertEqual(
+            list(iter_differences(old, new)),
+            [(("a",), 1, MISSING), (("b", "c"), [1, 2], [1, 3]), (("e",), MISSING, 4)],
+        )
+
+    def test_get_changes(self):
+        current = {"a": 1, "b": {"c": 2, "d": 3}, "e": 5}
+        self.assertEqual(get_changes(current, {"a": 1, "b": {"c": 4}}), {"b": {"c": 4}})
+        self.assertIs(get_changes(current, {"b": {"d": 3}}), MISSING)
+        self.assertEqual(get_changes(current, {"f": [1]}), {"f": [1]})
+
+
+class ProfileSyncTest(unittest.TestCase):
+    def test_plan(self):
+        client = _Client()
+        plan = ProfileSync(client).run(_DESIRED, dry_run=True)
+        self.assertEqual(client.requests, [])
+        self.assertEqual(
+            [(a.kind, a.resource, a.key) for a in plan],
+            [
+                ("change", "profile", "current"),
+                ("create", "matcher", "new"),
+                ("change", "matcher", "good"),
+                ("delete", "detectable", "gone"),
+                ("create", "detectable", "blue"),
+                ("delete", "matcher", "old"),
+            ],
+        )
+        # only the changed fields are sent
+        self.assertEqual(plan.actions[0].data, {"name": "Recipe 7"})
+        self.assertEqual(len(plan.format().splitlines()), 6)
+        plan = ProfileSync(client, prune=False).plan(_DESIRED)
+        self.assertNotIn("delete", [action.kind for action in plan])
+
+    def test_execute(self):
+        client = _Client()
+        plan = ProfileSync(client, max_workers=1).run(_DESIRED)
+        self.assertTrue(plan.ok)
+        self.assertEqual({action.state for action in plan}, {"done"})
+        # the detectable refers to the UUID of the created matcher
+        self.assertIn(
+            ("post", "detectable", {"name": "blue", "matcher_id": "new-new"}),
+            client.requests,
+        )
+
+    def test_failed_stage(self):
+        client = _Client()
+        client.fail.add(("post", "matcher"))
+        plan = ProfileSync(client).run(_DESIRED)
+        self.assertFalse(plan.ok)
+        self.assertEqual([action.key for action in plan.errors], ["new"])
+        self.assertEqual(
+            [action.state for action in plan],
+            ["done", "failed", "skipped", "skipped", "skipped", "skipped"],
+        )
+        with self.assertRaises(APIRequestError):
+            plan.raise_for_errors()
+
+    def test_invalid_specification(self):
+        sync = ProfileSync(_Client())
+        with self.assertRaises(ValueError):
+            sync.plan({"emitters": {"9": {"brightness": 1}}})
+        with self.assertRaises(ValueError):
+            sync.plan({"matchers": [{"name": "a"}, {"name": "a"}]})
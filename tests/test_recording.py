@@ -0,0 +1,140 @@
+from array import array
+import os
+import tempfile
+import time
+import unittest
+
+from urwerk_api_client.models import Sample
+from urwerk_api_client.recording import (
+    Recorder,
+    RecordingReader,
+    RecordingReplay,
+    SAMPLES,
+    SPECTRA,
+)
+from urwerk_api_client.spectrum import Spectrum
+
+_MATCH_ID = "6f1c5d2e-8a1b-4c3d-9e2f-00000000000{}"
+
+
+def _get_samples(count, start=0, channels=2):
+    return [
+        {
+            "timestamp": 1000 + 10 * index,
+            "color": [index + 0.5 * channel for channel in range(channels)],
+            "matches": [_MATCH_ID.format(index % 3)] if index % 2 else [],
+        }
+        for index in range(start, start + count)
+    ]
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "test.urwrec")
+
+    def record(self, samples, **kwargs):
+        with Recorder(self.path, chunk_size=4, **kwargs) as recorder:
+            self.assertEqual(recorder.record_samples(samples), len(samples))
+
+    def test_samples(self):
+        samples = _get_samples(10)
+        self.record(samples, metadata={"device": "a"})
+        with RecordingReader(self.path) as reader:
+            self.assertEqual(len(reader), 10)
+            self.assertEqual(
+                [chunk.count for chunk in reader.chunks if chunk.kind == SAMPLES],
+                [4, 4, 2],
+            )
+            self.assertEqual(reader.get_metadata(), {"device": "a"})
+            self.assertEqual(reader.get_time_range(), (1000, 1090))
+            self.assertIsNone(reader.get_time_range(SPECTRA))
+            self.assertEqual(list(reader.iter_samples()), samples)
+            # the range includes the start and excludes the end
+            selected = list(reader.iter_samples(start=1030, end=1070))
+            self.assertEqual(selected, samples[3:7])
+            batches = list(reader.iter_batches(start=1030, end=1070))
+            self.assertEqual([len(batch) for batch in batches], [1, 3])
+            self.assertEqual(batches[1].get_matches(1), [_MATCH_ID.format(2)])
+            self.assertEqual(batches[0].match_ids, [_MATCH_ID.format(0)])
+            self.assertEqual(batches[0].get_matches(0), [_MATCH_ID.format(0)])
+            self.assertEqual(batches[1].match_ids, [_MATCH_ID.format(2)])
+
+    def test_append(self):
+        self.record(_get_samples(6), metadata={"device": "a", "line": 1})
+        self.record(_get_samples(5, start=6, channels=3), metadata={"line": 3})
+        with RecordingReader(self.path) as reader:
+            self.assertEqual(len(reader), 11)
+            self.assertEqual(reader.get_metadata(), {"device": "a", "line": 3})
+            samples = list(reader.iter_samples(start=1050))
+        self.assertEqual([len(sample["color"]) for sample in samples], [2] + [3] * 5)
+
+    def test_recording_without_index(self):
+        recorder = Recorder(self.path, chunk_size=4)
+        self.addCleanup(recorder.close)
+        recorder.record_samples(_get_samples(6))
+        # a growing recording: only complete chunks are visible
+        with RecordingReader(self.path) as reader:
+            self.assertEqual(len(reader), 4)
+        recorder.flush()
+        with open(self.path, "ab") as recording:
+            # an incomplete chunk (e.g. after a crash)
+            recording.write(SAMPLES + b"\0" * 12)
+        with RecordingReader(self.path) as reader:
+            self.assertEqual(len(reader), 6)
+
+    def test_spectra(self):
+        axis = array("d", [400.0, 410.0, 420.0])
+        spectra = [Spectrum(axis, array("d", [n, n + 1, n + 2])) for n in range(5)]
+        with Recorder(self.path, spectrum_chunk_size=2) as recorder:
+            for index, spectrum in enumerate(spectra):
+                recorder.add_spectrum(spectrum, timestamp=index)
+            recorder.add_spectrum(Spectrum.from_points([[500, 1.0]]), timestamp=5)
+        with RecordingReader(self.path) as reader:
+            recorded = list(reader.iter_spectra(start=1))
+            self.assertEqual(reader.get_time_range(SPECTRA), (0, 5))
+        self.assertEqual([timestamp for timestamp, _ in recorded], [1, 2, 3, 4, 5])
+        self.assertEqual(recorded[0][1].to_points(), spectra[1].to_points())
+        self.assertEqual(recorded[-1][1].to_points(), [[500, 1.0]])
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as recording:
+            recording.write(b"something else")
+        with self.assertRaises(ValueError):
+            RecordingReader(self.path)
+
+
+class RecordingReplayTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "test.urwrec")
+        self.samples = _get_samples(10)
+        with Recorder(self.path, chunk_size=4) as recorder:
+            recorder.record_samples(self.samples)
+
+    def test_sample_stream(self):
+        with RecordingReplay(self.path, start=1020) as replay:
+            self.assertEqual(list(replay.get_sample_stream()), self.samples[2:])
+            self.assertEqual(
+                list(replay.get_sample_stream(count=2, format="csv")),
+                [[1020, 2.0, 2.5], [1030, 3.0, 3.5]],
+            )
+            with replay.get_sample_reader(count=5) as reader:
+                self.assertEqual(len(list(reader)), 5)
+            batches = list(replay.iter_sample_batches(batch_size=5))
+            self.assertEqual([len(batch) for batch in batches], [5, 3])
+
+    def test_current_sample(self):
+        with RecordingReplay(self.path, end=1020) as replay:
+            timestamps = [replay.get_current_sample()["timestamp"] for _ in range(3)]
+            self.assertEqual(timestamps, [1000, 1010, 1000])
+            self.assertIsInstance(replay.get_current_sample(as_model=True), Sample)
+
+    def test_speed(self):
+        # 10 ms between the samples, replayed at half speed
+        with RecordingReplay(self.path, speed=0.5) as replay:
+            started = time.monotonic()
+            self.assertEqual(len(list(replay.get_sample_stream(count=4))), 4)
+            self.assertGreaterEqual(time.monotonic() - started, 0.06)
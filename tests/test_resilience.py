@@ -0,0 +1,102 @@
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import (
+    APICircuitOpenError,
+    APIConnectionError,
+    APIRequestError,
+    CircuitBreaker,
+    ConnectionPool,
+    RetryPolicy,
+    Timeout,
+)
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+
+class TimeoutTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertIsNone(Timeout.parse(None))
+        timeout = Timeout.parse((1, 5))
+        self.assertEqual((timeout.connect, timeout.read), (1, 5))
+        self.assertEqual(Timeout.parse(3).get_total(), 3)
+        self.assertIsNone(Timeout().get_total())
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_is_retryable(self):
+        retry = RetryPolicy()
+        self.assertTrue(retry.is_retryable("GET", APIConnectionError("down")))
+        self.assertTrue(retry.is_retryable("GET", APIRequestError(status_code=503)))
+        self.assertFalse(retry.is_retryable("POST", APIConnectionError("down")))
+        self.assertFalse(retry.is_retryable("GET", APIRequestError(status_code=500)))
+        # the device answered, but with unexpected contents
+        self.assertFalse(retry.is_retryable("GET", APIRequestError("JSON error")))
+
+    def test_delay(self):
+        retry = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+        self.assertEqual([retry.get_delay(n) for n in range(4)], [0.5, 1, 2, 3])
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_open_and_close(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure("a")
+        self.assertFalse(breaker.is_open("a"))
+        breaker.record_failure("a")
+        self.assertTrue(breaker.is_open("a"))
+        self.assertEqual(breaker.get_open_hosts(), ["a"])
+        breaker.record_success("a")
+        self.assertFalse(breaker.is_open("a"))
+
+
+class RequestRetryTest(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2)
+
+    def get_client(self, server, pool=None):
+        return ColorsensorAPI(
+            server.api_url,
+            connection_pool=pool,
+            retry=RetryPolicy(total=2, backoff_factor=0),
+            circuit_breaker=self.breaker,
+        )
+
+    def test_status_errors_are_retried(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/system", b"busy", status=503)
+            server.add_response("GET", "/api/system", {"data": {"hostname": "a"}})
+            client = self.get_client(server)
+            self.assertEqual(client.get_system(), {"hostname": "a"})
+            self.assertEqual(len(server.requests), 2)
+
+    def test_broken_connections_are_retried(self):
+        for pool in (None, ConnectionPool()):
+            with ScriptedServer() as server:
+                server.add_response("GET", "/api/system", None)
+                server.add_response("GET", "/api/system", {"data": {"hostname": "a"}})
+                client = self.get_client(server, pool)
+                self.assertEqual(client.get_system(), {"hostname": "a"})
+                if pool is not None:
+                    pool.close()
+
+    def test_embedded_errors_are_not_retried(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/system", {"errors": ["invalid"]})
+            client = self.get_client(server)
+            for _ in range(3):
+                with self.assertRaises(APIRequestError) as context:
+                    client.get_system()
+                self.assertNotIsInstance(context.exception, APIConnectionError)
+            self.assertEqual(len(server.requests), 3)
+            # the device is working: the circuit stays closed
+            self.assertEqual(self.breaker.get_open_hosts(), [])
+
+    def test_circuit_opens(self):
+        with ScriptedServer() as server:
+            server.add_response("GET", "/api/system", b"down", status=502)
+            client = self.get_client(server)
+            with self.assertRaises(APIRequestError):
+                client.get_system()
+            with self.assertRaises(APICircuitOpenError):
+                client.get_system()
+            self.assertEqual(len(server.requests), 2)
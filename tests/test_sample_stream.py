@@ -0,0 +1,82 @@
+import io
+import json
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import _parse_delimited_record, _read_records
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+
+class _Response(io.BytesIO):
+    """a response returning at most 'block_size' bytes per read"""
+
+    def __init__(self, data, block_size):
+        super().__init__(data)
+        self.block_size = block_size
+
+    def read1(self, size=-1):
+        return self.read(min(size, self.block_size))
+
+
+class RecordParserTest(unittest.TestCase):
+    def test_read_records(self):
+        data = b"first\nsecond\n\nthird\nlast"
+        for block_size in (1, 3, 100):
+            records = list(_read_records(_Response(data, block_size), buffer_size=4))
+            self.assertEqual(records, [b"first", b"second", b"third", b"last"])
+        records = _read_records(_Response(b"a;;b;", 2), delimiter=b";")
+        self.assertEqual(list(records), [b"a", b"b"])
+
+    def test_parse_delimited_record(self):
+        self.assertEqual(
+            _parse_delimited_record(b"1600000000000, -2,0.5,abc"),
+            [1600000000000, -2, 0.5, "abc"],
+        )
+
+
+class SampleStreamTest(unittest.TestCase):
+    def test_buffered_stream(self):
+        body = b"".join(
+            b'{"data": {"timestamp": %d, "values": [0.5, %d]}}\n' % (index, index)
+            for index in range(100)
+        )
+        with ScriptedServer() as server:
+            server.add_response(
+                "GET",
+                "/api/sensor/samples",
+                body,
+                headers={"Content-Type": "application/json"},
+            )
+            client = ColorsensorAPI(server.api_url)
+            lines = list(client.get_sample_stream(count=100))
+            blocks = list(client.get_sample_stream(count=100, buffer_size=1024))
+        self.assertEqual(len(lines), 100)
+        self.assertEqual(lines[1], {"timestamp": 1, "values": [0.5, 1]})
+        self.assertEqual(blocks, lines)
+
+    def test_content_types(self):
+        samples = [{"timestamp": index, "values": [index]} for index in range(3)]
+        body = b"".join(
+            json.dumps({"data": sample}).encode() + b"\n" for sample in samples
+        )
+        content_types = ("application/json", "application/x-ndjson", "")
+        with ScriptedServer() as server:
+            for content_type in content_types:
+                server.add_response(
+                    "GET",
+                    "/api/sensor/samples",
+                    body,
+                    headers={"Content-Type": content_type},
+                )
+            server.add_response(
+                "GET",
+                "/api/sensor/samples",
+                b"1,2.5\n2,3.5\n",
+                headers={"Content-Type": "text/csv; charset=utf-8"},
+            )
+            client = ColorsensorAPI(server.api_url)
+            for content_type in content_types:
+                stream = client.get_sample_stream(count=3, buffer_size=16)
+                self.assertEqual(list(stream), samples, content_type)
+            stream = client.get_sample_stream(format="csv", buffer_size=16)
+            self.assertEqual(list(stream), [[1, 2.5], [2, 3.5]])
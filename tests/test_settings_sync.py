@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import io
+import json
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import APIRequestError
+from urwerk_api_client.cache import ResponseCache
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.settings_sync import (
+    decode_base64_stream,
+    encode_base64_stream,
+    get_base64_size,
+    get_category_digests,
+    SettingsSync,
+)
+
+_SETTINGS = {"network": {"dhcp": True}, "system": {"hostname": "a"}}
+
+
+def _encode(settings):
+    return base64.b64encode(json.dumps(settings).encode())
+
+
+class Base64StreamTest(unittest.TestCase):
+    def test_round_trip(self):
+        data = bytes(range(256)) * 7 + b"x"
+        for chunk_size in (3, 7, 48, 4096):
+            encoded = b"".join(encode_base64_stream(io.BytesIO(data), chunk_size))
+            self.assertEqual(encoded, base64.b64encode(data))
+            self.assertEqual(len(encoded), get_base64_size(len(data)))
+            decoded = io.BytesIO()
+            # line breaks within the encoded data are ignored
+            source = io.BytesIO(encoded[:100] + b"\n" + encoded[100:])
+            digest = decode_base64_stream(source, decoded, chunk_size)
+            self.assertEqual(decoded.getvalue(), data)
+            self.assertEqual(digest, hashlib.sha256(data).hexdigest())
+
+    def test_missing_padding(self):
+        decoded = io.BytesIO()
+        decode_base64_stream(io.BytesIO(b"YWJjZA"), decoded)
+        self.assertEqual(decoded.getvalue(), b"abcd")
+
+
+class SettingsAPITest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def _add_dump(self, payload, headers=None, status=200):
+        self.server.add_response(
+            "GET",
+            "/api/settings",
+            payload,
+            status=status,
+            headers={"Content-Type": "text/plain"} if headers is None else headers,
+        )
+
+    def test_get_settings(self):
+        self._add_dump(_encode(_SETTINGS))
+        # the dump within a JSON response
+        self._add_dump({"data": _encode(_SETTINGS).decode()}, headers={})
+        client = ColorsensorAPI(self.server.api_url)
+        self.assertEqual(client.get_settings(), _SETTINGS)
+        self.assertEqual(client.get_settings(), _SETTINGS)
+
+    def test_get_settings_within_snapshot(self):
+        self._add_dump(_encode(_SETTINGS))
+        client = ColorsensorAPI(self.server.api_url)
+        with client.snapshot():
+            self.assertEqual(client.get_settings(), _SETTINGS)
+            self.assertEqual(client.get_settings(), _SETTINGS)
+        self.assertEqual(len(self.server.get_requests("GET")), 1)
+
+    def test_conditional_get_settings(self):
+        self._add_dump(
+            _encode(_SETTINGS), headers={"Content-Type": "text/plain", "ETag": '"1"'}
+        )
+        self._add_dump(b"", status=304, headers={"ETag": '"1"'})
+        client = ColorsensorAPI(self.server.api_url, conditional_requests=True)
+        self.assertEqual(client.get_settings(), _SETTINGS)
+        self.assertEqual(client.get_settings(), _SETTINGS)
+        request = self.server.get_requests("GET")[1]
+        self.assertEqual(request.headers.get("If-None-Match"), '"1"')
+
+    def test_invalid_dumps(self):
+        self._add_dump(b"not base64!")
+        self._add_dump(base64.b64encode(b"{no json"))
+        self._add_dump({"data": {"network": {}}}, headers={})
+        self._add_dump(b"")
+        client = ColorsensorAPI(self.server.api_url)
+        for _ in range(4):
+            with self.assertRaises(APIRequestError):
+                client.get_settings()
+
+    def test_export_settings(self):
+        dump = json.dumps(_SETTINGS).encode()
+        self._add_dump(base64.b64encode(dump))
+        self._add_dump({"data": base64.b64encode(dump).decode()}, headers={})
+        client = ColorsensorAPI(self.server.api_url)
+        for _ in range(2):
+            target = io.BytesIO()
+            digest = client.export_settings(target)
+            self.assertEqual(target.getvalue(), dump)
+            self.assertEqual(digest, hashlib.sha256(dump).hexdigest())
+
+    def test_export_invalid_dumps(self):
+        self._add_dump(b"not base64!")
+        self._add_dump(b"")
+        self._add_dump({"data": ""}, headers={})
+        client = ColorsensorAPI(self.server.api_url)
+        for _ in range(3):
+            with self.assertRaises(APIRequestError):
+                client.export_settings(io.BytesIO())
+
+    def test_import_settings(self):
+        self.server.add_response("PUT", "/api/settings", {"data": {}})
+        client = ColorsensorAPI(self.server.api_url)
+        dump = json.dumps(_SETTINGS).encode()
+        client.import_settings(io.BytesIO(dump), categories=["system"])
+        upload = self.server.get_requests("PUT")[0]
+        self.assertEqual(base64.b64decode(upload.body), dump)
+        query = parse_qs(urlsplit(upload.path).query)
+        self.assertEqual(query, {"import_category_system": ["1"]})
+
+
+class SettingsSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.server.add_response(
+            "GET",
+            "/api/settings",
+            _encode(_SETTINGS),
+            headers={"Content-Type": "text/plain"},
+        )
+        self.server.add_response("PUT", "/api/settings", {"data": {}})
+        self.client = ColorsensorAPI(self.server.api_url)
+
+    def test_category_digests(self):
+        digests = get_category_digests(_SETTINGS)
+        self.assertEqual(sorted(digests), ["network", "system"])
+        reordered = {"system": {"hostname": "a"}, "network": {"dhcp": True}}
+        self.assertEqual(get_category_digests(reordered), digests)
+
+    def test_apply_changed_categories(self):
+        sync = SettingsSync(self.client)
+        self.assertEqual(sync.apply(_SETTINGS), [])
+        changed = dict(_SETTINGS, system={"hostname": "b"})
+        self.assertEqual(sync.apply(changed, dry_run=True), ["system"])
+        self.assertEqual(self.server.get_requests("PUT"), [])
+        self.assertEqual(sync.apply(changed), ["system"])
+        # the state was updated after the upload
+        self.assertEqual(sync.apply(changed), [])
+        self.assertEqual(len(self.server.get_requests("GET")), 1)
+        upload = self.server.get_requests("PUT")[0]
+        self.assertEqual(
+            json.loads(base64.b64decode(upload.body).decode()),
+            {"system": {"hostname": "b"}},
+        )
+        query = parse_qs(urlsplit(upload.path).query)
+        self.assertEqual(query, {"import_category_system": ["1"]})
+
+    def test_shared_state(self):
+        cache = ResponseCache()
+        SettingsSync(self.client, cache).refresh()
+        sync = SettingsSync(ColorsensorAPI(self.server.api_url), cache)
+        self.assertEqual(sync.get_changed_categories(_SETTINGS), [])
+        self.assertEqual(len(self.server.get_requests("GET")), 1)
@@ -0,0 +1,173 @@
+from array import array
+import itertools
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client.spectral_imager import SpectralImagerAPI, SpectralSample
+from urwerk_api_client.spectral_processing import _import_numpy, SpectralPipeline
+from urwerk_api_client.spectrum import Spectrum
+
+_POINTS = [[400.0, 0.5], [410.0, 1.0], [420.0, 0.0], [430.0, 2.0]]
+
+
+def _spectrum(*values):
+    return Spectrum(array("d", [400.0, 410.0, 420.0]), array("d", values))
+
+
+class SpectralSampleTest(unittest.TestCase):
+    def test_from_response(self):
+        sample = SpectralSample.from_response(
+            {"spectrum": _POINTS, "regions_of_interest": [{}], "frame": 3}
+        )
+        self.assertEqual(sample.spectrum, _POINTS)
+        self.assertEqual(sample.regions_of_interest, [{}])
+        self.assertEqual(sample.metadata, {"frame": 3})
+        self.assertEqual(
+            sample.get_spectrum_dict()[1], {"wavelength": 410.0, "value": 1}
+        )
+        self.assertEqual(sample.get_spectrum_array().to_points(), _POINTS)
+
+
+class SpectrumTest(unittest.TestCase):
+    def test_points(self):
+        spectrum = Spectrum.from_points(_POINTS)
+        self.assertEqual(len(spectrum), 4)
+        self.assertEqual(spectrum.to_points(), _POINTS)
+        # a matching wavelength axis is shared
+        self.assertIs(
+            Spectrum.from_points(_POINTS, spectrum.wavelengths).wavelengths,
+            spectrum.wavelengths,
+        )
+        other = Spectrum.from_points(_POINTS[:2], spectrum.wavelengths)
+        self.assertEqual(list(other.wavelengths), [400.0, 410.0])
+        with self.assertRaises(ValueError):
+            Spectrum(array("d", [1.0]), array("d"))
+
+    def test_values(self):
+        spectrum = Spectrum.from_points(_POINTS)
+        self.assertEqual(spectrum.get_value(410), 1.0)
+        self.assertEqual(spectrum.get_value(405), 0.75)
+        self.assertEqual(list(spectrum.interpolate([400, 425])), [0.5, 1.0])
+        with self.assertRaises(ValueError):
+            spectrum.get_value(440)
+        self.assertEqual(spectrum.get_range(405, 420).to_points(), _POINTS[1:3])
+        self.assertEqual(
+            spectrum.get_regions_of_interest([(400, 420), (415, None)]),
+            [
+                {"x_min": 420.0, "y_min": 0.0, "x_max": 410.0, "y_max": 1.0},
+                {"x_min": 420.0, "y_min": 0.0, "x_max": 430.0, "y_max": 2.0},
+            ],
+        )
+        with self.assertRaises(ValueError):
+            spectrum.get_extrema(500, 600)
+
+
+class SpectralPipelineTest(unittest.TestCase):
+    def get_pipelines(self, **kwargs):
+        pipelines = [SpectralPipeline(use_numpy=False, **kwargs)]
+        if _import_numpy() is not None:
+            pipelines.append(SpectralPipeline(use_numpy=True, **kwargs))
+        return pipelines
+
+    def assertValues(self, spectra, expected):
+        self.assertEqual(
+            [[round(value, 6) for value in spectrum.values] for spectrum in spectra],
+            expected,
+        )
+
+    def test_references(self):
+        for pipeline in self.get_pipelines():
+            pipeline.set_dark_reference([_spectrum(1, 1, 1), _spectrum(3, 1, 1)])
+            pipeline.set_white_reference(_spectrum(4, 3, 1))
+            result = pipeline.process(_spectrum(3, 2, 5))
+            # (value - dark) / (white - dark), zero for an invalid reference
+            self.assertValues([result], [[0.5, 0.5, 0.0]])
+            pipeline.reset_white_reference()
+            pipeline.reset_dark_reference()
+            self.assertValues([pipeline.process(_spectrum(3, 2, 5))], [[3, 2, 5]])
+
+    def test_averaging(self):
+        frames = [_spectrum(value, 0, 0) for value in (3, 6, 9, 0)]
+        for pipeline in self.get_pipelines(average_count=2):
+            # the history is kept between batches
+            result = pipeline.process_batch(frames[:3]) + pipeline.process_batch(
+                frames[3:]
+            )
+            self.assertValues(
+                result, [[3, 0, 0], [4.5, 0, 0], [7.5, 0, 0], [4.5, 0, 0]]
+            )
+            self.assertIs(result[0].wavelengths, frames[0].wavelengths)
+
+    def test_smoothing(self):
+        frames = [_spectrum(value, 0, 0) for value in (4, 0, 0)]
+        for pipeline in self.get_pipelines(smoothing=0.5):
+            self.assertValues(
+                pipeline.process_batch(frames), [[4, 0, 0], [2, 0, 0], [1, 0, 0]]
+            )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SpectralPipeline(average_count=0)
+        with self.assertRaises(ValueError):
+            SpectralPipeline(smoothing=2)
+        pipeline = SpectralPipeline()
+        with self.assertRaises(ValueError):
+            pipeline.process_batch([_spectrum(1, 2, 3), Spectrum.from_points(_POINTS)])
+        with self.assertRaises(ValueError):
+            pipeline.set_dark_reference([])
+
+
+class SpectralAPITest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        frames = itertools.count()
+
+        def get_sample(request):
+            return 200, {"data": {"spectrum": _POINTS, "frame": next(frames)}}, {}
+
+        self.server.add_response("GET", "/api/sensor/spectral/sample", get_sample)
+        wavelengths = {"data": {"wavelengths": [point[0] for point in _POINTS]}}
+        self.server.add_response("GET", "/api/sensor/spectral/wavelengths", wavelengths)
+
+    def test_iter_spectral_samples(self):
+        client = SpectralImagerAPI(self.server.api_url)
+        self.assertEqual(client.get_spectral_sample().metadata, {"frame": 0})
+        samples = client.iter_spectral_samples(count=3)
+        frames = [next(samples).metadata["frame"]]
+        # the connection of the paused acquisition is not used by other requests
+        self.assertIsNone(client._get_connection_pool())
+        client.get_spectral_sample()
+        frames.extend(sample.metadata["frame"] for sample in samples)
+        self.assertEqual(frames, [1, 3, 4])
+
+    def test_abandoned_acquisition(self):
+        client = SpectralImagerAPI(self.server.api_url)
+        samples = client.iter_spectral_samples()
+        next(samples)
+        samples.close()
+        self.assertIsNone(client._get_connection_pool())
+        self.assertEqual(client.get_spectral_sample().metadata, {"frame": 1})
+
+    def test_spectrum_arrays(self):
+        client = SpectralImagerAPI(self.server.api_url)
+        spectra = [client.get_spectrum_array() for _ in range(2)]
+        self.assertIs(spectra[0].wavelengths, spectra[1].wavelengths)
+        self.assertIs(spectra[0].wavelengths, client.get_wavelength_axis())
+        self.assertEqual(spectra[1].to_points(), _POINTS)
+        self.assertEqual(
+            len(self.server.get_requests(path="/api/sensor/spectral/wavelengths")), 1
+        )
+
+    def test_processed_spectra(self):
+        client = SpectralImagerAPI(self.server.api_url)
+        client.set_spectral_pipeline(
+            SpectralPipeline(average_count=2, regions_of_interest=[(405, 425)])
+        )
+        client.set_local_dark_reference(count=2)
+        processed = list(client.iter_processed_spectra(count=3, batch_size=2))
+        self.assertEqual(len(processed), 3)
+        spectrum, regions = processed[0]
+        # the dark reference equals the (constant) frames
+        self.assertEqual(spectrum.to_points(), [[point[0], 0.0] for point in _POINTS])
+        self.assertEqual(len(regions), 1)
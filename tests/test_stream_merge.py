@@ -0,0 +1,108 @@
+import time
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.stream_merge import (
+    estimate_clock_offset,
+    parse_system_time,
+    StreamMerger,
+)
+
+
+class _SlowStreamClient:
+    """yields 'count' samples with a pause before every sample"""
+
+    def __init__(self, count, interval, start=1600000000000):
+        self.count = count
+        self.interval = interval
+        self.start = start
+
+    def get_sample_stream(self, count=None, **kwargs):
+        for index in range(self.count):
+            time.sleep(self.interval)
+            yield {"timestamp": self.start + index * 1000, "color": [index]}
+
+
+class ParseSystemTimeTest(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_system_time(12.5), 12.5)
+        self.assertEqual(parse_system_time("1970-01-01T00:01:00Z"), 60)
+        self.assertEqual(parse_system_time("1970-01-01 01:00:00+01:00"), 0)
+        self.assertEqual(parse_system_time({"time": "1970-01-01T00:00:01.5"}), 1.5)
+        with self.assertRaises(ValueError):
+            parse_system_time({"unknown": 1})
+
+    def test_clock_offset(self):
+        with ScriptedServer() as server:
+            server.add_response(
+                "GET",
+                "/api/system/time",
+                lambda request: (200, {"data": {"time": time.time() + 10}}, {}),
+            )
+            offset = estimate_clock_offset(ColorsensorAPI(server.api_url), rounds=3)
+            self.assertEqual(len(server.get_requests()), 3)
+        self.assertAlmostEqual(offset, 10, delta=0.5)
+
+
+class StreamMergerTest(unittest.TestCase):
+    def test_frames(self):
+        clients = {
+            "left": _SlowStreamClient(5, 0),
+            "right": _SlowStreamClient(5, 0, start=1600000000002),
+        }
+        with StreamMerger(
+            clients, window=0.01, clock_offsets={"left": 0, "right": 0}
+        ) as merger:
+            frames = list(merger)
+        self.assertEqual(len(frames), 5)
+        self.assertTrue(all(frame.is_complete() for frame in frames))
+        self.assertEqual(
+            [frame.samples["right"]["color"] for frame in frames],
+            [[index] for index in range(5)],
+        )
+
+    def test_slow_streams_do_not_end_the_merged_stream(self):
+        clients = {
+            "left": _SlowStreamClient(3, 0.3),
+            "right": _SlowStreamClient(3, 0.3),
+        }
+        merger = StreamMerger(
+            clients, max_delay=0.1, clock_offsets={"left": 0, "right": 0}
+        )
+        with merger:
+            frames = list(merger)
+        samples = sum(
+            sample is not None for frame in frames for sample in frame.samples.values()
+        )
+        self.assertEqual(samples, 6)
+
+    def test_buffer_policies(self):
+        offsets = {"left": 0, "right": 0}
+
+        def merge(policy):
+            clients = {
+                "left": _SlowStreamClient(20, 0),
+                "right": _SlowStreamClient(20, 0),
+            }
+            merger = StreamMerger(
+                clients, capacity=2, policy=policy, clock_offsets=offsets
+            )
+            with merger:
+                # the consumer falls behind
+                time.sleep(0.2)
+                frames = list(merger)
+            return frames, merger.get_stats()
+
+        # no samples are lost by default
+        frames, stats = merge("block")
+        self.assertEqual(len(frames), 20)
+        self.assertEqual([stats[name]["dropped"] for name in offsets], [0, 0])
+        frames, stats = merge("drop-oldest")
+        self.assertLess(len(frames), 20)
+        self.assertEqual([stats[name]["dropped"] for name in offsets], [18, 18])
+
+    def test_stop_without_start(self):
+        merger = StreamMerger([])
+        merger.stop()
+        self.assertEqual(merger.get_stats(), {})
@@ -0,0 +1,131 @@
+import threading
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import APIConnectionError
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.resilience import RetryPolicy
+from urwerk_api_client.stream_reader import SampleStreamReader
+
+
+class _StreamClient:
+    """a device sending numbered samples (breaking the stream after 'break_after')"""
+
+    def __init__(self, break_after=None, fail_after=None, malformed_after=None):
+        self.break_after = break_after
+        self.fail_after = fail_after
+        self.malformed_after = malformed_after
+        self.sent = 0
+        self.requested = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def get_sample_stream(self, count=None, **kwargs):
+        self.requested.append(count)
+        if self.fail_after is not None and self.sent >= self.fail_after:
+            raise APIConnectionError("API Connect Error: down")
+        index = 0
+        while count is None or index < count:
+            self.release.wait()
+            if self.break_after is not None and index == self.break_after:
+                raise APIConnectionError("API Read Error: broken stream")
+            if self.malformed_after is not None and index == self.malformed_after:
+                raise ValueError("malformed record")
+            yield {"timestamp": self.sent}
+            self.sent += 1
+            index += 1
+
+
+def _get_timestamps(samples):
+    return [sample["timestamp"] for sample in samples]
+
+
+class SampleStreamReaderTest(unittest.TestCase):
+    def test_drop_oldest(self):
+        client = _StreamClient()
+        client.release.clear()
+        reader = SampleStreamReader(client, capacity=3, count=10)
+        with reader:
+            client.release.set()
+            reader._thread.join(5)
+            self.assertEqual(_get_timestamps(reader.get_batch(2)), [7, 8])
+            self.assertEqual(_get_timestamps(reader), [9])
+        stats = reader.get_stats()
+        self.assertEqual((stats["received"], stats["dropped"]), (10, 7))
+        self.assertEqual(stats["max_lag"], 3)
+        self.assertFalse(stats["running"])
+
+    def test_block(self):
+        client = _StreamClient()
+        with SampleStreamReader(client, capacity=2, policy="block", count=20) as reader:
+            self.assertEqual(_get_timestamps(reader), list(range(20)))
+            self.assertEqual(reader.get_stats()["dropped"], 0)
+        with self.assertRaises(ValueError):
+            SampleStreamReader(client, policy="latest")
+
+    def test_reconnect(self):
+        client = _StreamClient(break_after=4)
+        retry = RetryPolicy(total=2, backoff_factor=0)
+        with SampleStreamReader(client, count=10, retry=retry) as reader:
+            self.assertEqual(_get_timestamps(reader), list(range(10)))
+        # only the missing samples are requested again
+        self.assertEqual(client.requested, [10, 6, 2])
+        self.assertEqual(reader.get_stats()["reconnects"], 2)
+
+    def test_errors(self):
+        client = _StreamClient(break_after=3, fail_after=3)
+        retry = RetryPolicy(total=2, backoff_factor=0)
+        samples = []
+        with SampleStreamReader(client, retry=retry) as reader:
+            # the error is raised after the buffered samples
+            with self.assertRaises(APIConnectionError):
+                for sample in reader:
+                    samples.append(sample)
+        self.assertEqual(_get_timestamps(samples), [0, 1, 2])
+        self.assertEqual(len(client.requested), 3)
+        with SampleStreamReader(
+            _StreamClient(break_after=1), reconnect=False
+        ) as reader:
+            self.assertEqual(reader.get(timeout=5), {"timestamp": 0})
+            with self.assertRaises(APIConnectionError):
+                reader.get(timeout=5)
+
+    def test_malformed_records(self):
+        client = _StreamClient(malformed_after=2)
+        with SampleStreamReader(client) as reader:
+            self.assertEqual(reader.get(timeout=5), {"timestamp": 0})
+            self.assertEqual(reader.get(timeout=5), {"timestamp": 1})
+            # reported to the consumer instead of reconnecting
+            with self.assertRaises(ValueError):
+                reader.get(timeout=5)
+        self.assertEqual(client.requested, [None])
+        self.assertEqual(reader.get_stats()["reconnects"], 0)
+
+    def test_timeout(self):
+        client = _StreamClient()
+        client.release.clear()
+        with SampleStreamReader(client) as reader:
+            with self.assertRaises(TimeoutError):
+                reader.get(timeout=0.05)
+            self.assertEqual(reader.lag, 0)
+            client.release.set()
+            self.assertEqual(reader.get(timeout=5), {"timestamp": 0})
+
+
+class SampleReaderClientTest(unittest.TestCase):
+    def test_get_sample_reader(self):
+        with ScriptedServer() as server:
+            samples = b"".join(b"%d,0.5,1.5\n" % index for index in range(20))
+            server.add_response(
+                "GET",
+                "/api/sensor/samples",
+                samples,
+                headers={"Content-Type": "text/csv"},
+            )
+            client = ColorsensorAPI(server.api_url)
+            # 'buffer_size' is passed on to get_sample_stream
+            with client.get_sample_reader(
+                capacity=5, policy="block", count=20, format="csv", buffer_size=16
+            ) as reader:
+                self.assertEqual([sample[0] for sample in reader], list(range(20)))
+            self.assertEqual(reader.get_stats()["dropped"], 0)
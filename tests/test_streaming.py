@@ -0,0 +1,125 @@
+import base64
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from tests.scripted_server import ScriptedServer
+from urwerk_api_client import BufferWriter, ConnectionPool, RetryPolicy, StreamingBody
+from urwerk_api_client.colorsensor import ColorsensorAPI
+
+_BLOB = bytes(range(256)) * 1024
+
+
+def _echo(request):
+    return 200, {"data": {"size": len(request.body)}}, {}
+
+
+class StreamingBodyTest(unittest.TestCase):
+    def test_file(self):
+        source = io.BytesIO(b"0123456789")
+        source.seek(2)
+        body = StreamingBody(source, chunk_size=3)
+        self.assertEqual(body.get_headers(), {"Content-Length": "8"})
+        self.assertEqual(b"".join(body), b"23456789")
+        self.assertTrue(body.rewind())
+        self.assertEqual(b"".join(body), b"23456789")
+        self.assertEqual(body.bytes_sent, 8)
+
+    def test_iterables(self):
+        body = StreamingBody(iter([b"ab", b"", b"c"]))
+        self.assertEqual(body.get_headers(), {"Transfer-Encoding": "chunked"})
+        self.assertEqual(list(body), [b"ab", b"c"])
+        self.assertFalse(body.rewind())
+        factory = StreamingBody(lambda: iter([b"ab"]), length=2)
+        self.assertEqual(list(factory), [b"ab"])
+        self.assertTrue(factory.rewind())
+        self.assertEqual(list(factory), [b"ab"])
+
+    def test_buffer_writer(self):
+        writer = BufferWriter(bytearray(4))
+        writer.write(b"ab")
+        writer.write(b"cd")
+        self.assertEqual(bytes(writer.getbuffer()), b"abcd")
+        with self.assertRaises(ValueError):
+            writer.write(b"e")
+
+
+class StreamingRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ScriptedServer().__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.pool = ConnectionPool()
+        self.addCleanup(self.pool.close)
+
+    def get_clients(self):
+        retry = RetryPolicy(total=2, backoff_factor=0)
+        return [
+            ColorsensorAPI(self.server.api_url, retry=retry),
+            ColorsensorAPI(self.server.api_url, retry=retry, connection_pool=self.pool),
+        ]
+
+    def test_upload(self):
+        self.server.add_response("PUT", "/api/blob", _echo)
+        for client in self.get_clients():
+            with tempfile.TemporaryFile() as source:
+                source.write(_BLOB)
+                source.seek(0)
+                self.assertEqual(
+                    client._put(url="blob", data=source), {"size": len(_BLOB)}
+                )
+            chunks = (_BLOB[start : start + 1000] for start in range(0, 5000, 1000))
+            self.assertEqual(client._put(url="blob", data=chunks), {"size": 5000})
+        requests = self.server.get_requests("PUT")
+        self.assertEqual(requests[0].headers["Content-Length"], str(len(_BLOB)))
+        self.assertEqual(requests[0].body, _BLOB)
+        self.assertEqual(requests[1].headers["Transfer-Encoding"], "chunked")
+        self.assertEqual(requests[1].body, _BLOB[:5000])
+
+    def test_download(self):
+        self.server.add_response("GET", "/api/blob", _BLOB)
+        for client in self.get_clients():
+            output = io.BytesIO()
+            self.assertEqual(client.download("blob", output), len(_BLOB))
+            self.assertEqual(output.getvalue(), _BLOB)
+            buffer = bytearray(len(_BLOB) + 10)
+            self.assertEqual(client.download("blob", memoryview(buffer)), len(_BLOB))
+            self.assertEqual(bytes(buffer[: len(_BLOB)]), _BLOB)
+            with self.assertRaises(ValueError):
+                client.download("blob", bytearray(100))
+        path = tempfile.mktemp()
+        self.addCleanup(os.remove, path)
+        client.download(("blob",), path)
+        with open(path, "rb") as result:
+            self.assertEqual(result.read(), _BLOB)
+
+    def test_interrupted_download_is_retried(self):
+        self.server.add_response("GET", "/api/blob", None)
+        self.server.add_response("GET", "/api/blob", _BLOB)
+        client = self.get_clients()[0]
+        output = io.BytesIO(b"head")
+        output.seek(4)
+        self.assertEqual(client.download("blob", output), len(_BLOB))
+        self.assertEqual(output.getvalue(), b"head" + _BLOB)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_settings(self):
+        dump = json.dumps({"network": {"dhcp": True}}).encode()
+        self.server.add_response(
+            "GET",
+            "/api/settings",
+            base64.b64encode(dump),
+            headers={"Content-Type": "text/plain"},
+        )
+        self.server.add_response("PUT", "/api/settings", {"data": {}})
+        for client in self.get_clients():
+            writer = BufferWriter(bytearray(1024))
+            client.export_settings(writer)
+            self.assertEqual(bytes(writer.getbuffer()), dump)
+            self.assertEqual(client.get_settings(), {"network": {"dhcp": True}})
+            client.import_settings(io.BytesIO(dump), categories=["network"])
+        upload = self.server.get_requests("PUT")[-1]
+        self.assertEqual(base64.b64decode(upload.body), dump)
+        self.assertEqual(upload.headers["Content-Length"], str(len(upload.body)))
+        self.assertIn("import_category_network=1", upload.path)
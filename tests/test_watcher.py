@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from urwerk_api_client.diff import MISSING
+from urwerk_api_client.watcher import AsyncChangeWatcher, ChangeWatcher
+
+
+class _Client:
+    """an in-memory device whose resources are changed by the tests"""
+
+    def __init__(self):
+        self.profile = {"name": "Recipe 1", "colorspace": {"space_id": 1}}
+        self.detectables = [{"uuid": "d1", "name": "red"}]
+        self.keypad_lock = False
+        self.reads = 0
+
+    def get_current_detection_profile(self):
+        self.reads += 1
+        return dict(self.profile)
+
+    def get_detectables(self):
+        self.reads += 1
+        return [dict(item) for item in self.detectables]
+
+    def get_matchers(self):
+        self.reads += 1
+        return []
+
+    def get_keypad_lock_state(self):
+        if self.keypad_lock is None:
+            raise OSError("down")
+        self.reads += 1
+        return self.keypad_lock
+
+
+class _AsyncClient(_Client):
+    async def get_current_detection_profile(self):
+        return super().get_current_detection_profile()
+
+    async def get_detectables(self):
+        return super().get_detectables()
+
+    async def get_matchers(self):
+        return super().get_matchers()
+
+    async def get_keypad_lock_state(self):
+        return super().get_keypad_lock_state()
+
+
+class ChangeWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.client = _Client()
+        self.errors = []
+        self.watcher = ChangeWatcher(
+            self.client,
+            min_interval=1,
+            max_interval=4,
+            backoff=2,
+            on_error=lambda name, error: self.errors.append((name, error)),
+        )
+
+    def poll(self):
+        # make every resource due
+        for resource in self.watcher._resources.values():
+            resource.next_poll = 0
+        self.watcher.poll()
+
+    def test_change_events(self):
+        events = []
+        self.watcher.subscribe(events.append)
+        self.poll()
+        self.assertEqual(events, [])
+        self.assertEqual(self.watcher.get_value("keypad_lock"), False)
+        self.client.profile["name"] = "Recipe 2"
+        self.client.detectables.append({"uuid": "d2", "name": "blue"})
+        self.client.detectables[0]["name"] = "dark red"
+        self.poll()
+        self.assertEqual(
+            [(event.resource, event.path, event.kind) for event in events],
+            [
+                ("detection_profile", ("name",), "changed"),
+                ("detectables", ("d1", "name"), "changed"),
+                ("detectables", ("d2",), "added"),
+            ],
+        )
+        self.assertEqual(events[0][2:], ("Recipe 1", "Recipe 2"))
+        self.assertIs(events[2].old, MISSING)
+
+    def test_subscribed_resources(self):
+        events = []
+        subscription = self.watcher.subscribe(events.append, ["keypad_lock"])
+        self.poll()
+        self.assertEqual(self.client.reads, 1)
+        self.client.keypad_lock = True
+        self.client.profile["name"] = "Recipe 2"
+        self.poll()
+        self.assertEqual([event.resource for event in events], ["keypad_lock"])
+        subscription.cancel()
+        self.poll()
+        self.assertEqual(self.client.reads, 2)
+        self.assertEqual(self.watcher.get_stats()["keypad_lock"]["subscribers"], 0)
+        with self.assertRaises(ValueError):
+            self.watcher.subscribe(events.append, ["unknown"])
+
+    def test_intervals(self):
+        self.watcher.subscribe(lambda event: None)
+        intervals = []
+        for _ in range(4):
+            self.poll()
+            intervals.append(self.watcher.get_stats()["matchers"]["interval"])
+        self.assertEqual(intervals, [2, 4, 4, 4])
+        # a change resets the intervals of all resources
+        self.client.keypad_lock = True
+        self.poll()
+        self.assertEqual(self.watcher.get_stats()["matchers"]["interval"], 1)
+
+    def test_errors(self):
+        def fail(event):
+            raise RuntimeError("callback failed")
+
+        self.watcher.subscribe(fail)
+        self.poll()
+        self.client.keypad_lock = None
+        self.client.profile["name"] = "Recipe 2"
+        self.poll()
+        self.assertEqual(
+            [(name, type(error)) for name, error in self.errors],
+            [("keypad_lock", OSError), ("detection_profile", RuntimeError)],
+        )
+        self.assertEqual(self.watcher.get_stats()["keypad_lock"]["errors"], 1)
+
+    def test_thread(self):
+        changed = threading.Event()
+        watcher = ChangeWatcher(self.client, min_interval=0.01, max_interval=0.02)
+        with watcher:
+            watcher.subscribe(lambda event: changed.set(), ["keypad_lock"])
+            while watcher.get_stats()["keypad_lock"]["polls"] == 0:
+                time.sleep(0.01)
+            self.client.keypad_lock = True
+            self.assertTrue(changed.wait(5))
+
+
+class AsyncChangeWatcherTest(unittest.TestCase):
+    def test_events(self):
+        client = _AsyncClient()
+
+        async def run():
+            watcher = AsyncChangeWatcher(client, min_interval=0.01, max_interval=0.02)
+            async with watcher:
+                async with watcher.events(resources=["detectables"]) as events:
+                    while watcher.get_stats()["detectables"]["polls"] == 0:
+                        await asyncio.sleep(0.01)
+                    client.detectables = []
+                    return await asyncio.wait_for(events.__anext__(), 5)
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        event = loop.run_until_complete(run())
+        self.assertEqual((event.path, event.kind), (("d1",), "removed"))
@@ -1,14 +1,86 @@
-from base64 import encodebytes
+import contextlib
 import enum
 import functools
-import http.client
-import json
-import urllib.error
-from urllib.parse import urlencode
-import urllib.request
+import threading
+import time
+import types
+
+from urwerk_api_client.cache import ResponseCache
+from urwerk_api_client.codec import DEFAULT_CODEC, get_codec
+from urwerk_api_client.instrumentation import (  # noqa: F401
+    get_url_template,
+    HistogramAggregator,
+    Instrumentation,
+    TracedResponse,
+)
+from urwerk_api_client.lazy import lazy_import
+from urwerk_api_client.pool import ConnectionPool
+from urwerk_api_client.resilience import (  # noqa: F401
+    CircuitBreaker,
+    RetryPolicy,
+    Timeout,
+)
+from urwerk_api_client.streaming import (  # noqa: F401
+    BufferWriter,
+    copy_response,
+    get_stream_position,
+    rewind_body,
+    StreamingBody,
+)
 
 __version__ = "0.19.0"
 
+_DEFAULT_USER_AGENT = "urwerk-api-client/{}".format(__version__)
+
+# slow to import: loaded with the first request
+_base64 = lazy_import("base64")
+_http_client = lazy_import("http.client")
+_json = lazy_import("json")
+_urllib_error = lazy_import("urllib.error")
+_urllib_parse = lazy_import("urllib.parse")
+_urllib_request = lazy_import("urllib.request")
+
+# submodules available as attributes of the package (imported on first access)
+_SUBMODULES = frozenset(
+    (
+        "aio",
+        "aio_colorsensor",
+        "aio_spectral_imager",
+        "batches",
+        "bulk",
+        "cache",
+        "codec",
+        "colorsensor",
+        "diff",
+        "fleet",
+        "instrumentation",
+        "lazy",
+        "models",
+        "pool",
+        "profile_sync",
+        "recording",
+        "resilience",
+        "results",
+        "settings_sync",
+        "spectral_imager",
+        "spectral_processing",
+        "spectrum",
+        "stream_merge",
+        "stream_reader",
+        "streaming",
+        "watcher",
+    )
+)
+
+
+def __getattr__(name):
+    # python3.7 and later: "urwerk_api_client.colorsensor" without importing it before
+    if name in _SUBMODULES:
+        import importlib
+
+        return importlib.import_module("{}.{}".format(__name__, name))
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
 
 class APIRequestError(IOError):
     """exceptions raised by API requests"""
@@ -27,8 +99,8 @@ class APIRequestError(IOError):
     def get_embedded_errors(self):
         if self.error_body is not None:
             try:
-                errors = json.loads(self.error_body.decode())["errors"]
-            except (UnicodeError, json.JSONDecodeError, KeyError):
+                errors = _json.loads(self.error_body.decode())["errors"]
+            except (UnicodeError, ValueError, KeyError):
                 pass
             else:
                 for error in errors:
@@ -51,17 +123,29 @@ class APIAuthorizationError(APIRequestError):
     are not sufficient"""
 
 
+class APIConnectionError(APIRequestError):
+    """raised in case the device could not be reached or the connection failed while
+    receiving the response (including timeouts)"""
+
+
+class APICircuitOpenError(APIRequestError):
+    """raised instead of sending a request to a host which is known to be unavailable"""
+
+
 def encode_data():
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, data=None, headers=None, **kwargs):
             if data:
                 headers = dict(headers) if headers is not None else {}
-                if isinstance(data, bytes):
+                if hasattr(data, "read") or hasattr(data, "__next__"):
+                    # file objects and iterators are sent while they are read
+                    data = StreamingBody(data)
+                if isinstance(data, (bytes, StreamingBody)):
                     headers.setdefault("Content-Type", "application/octet-stream")
                 else:
                     headers.setdefault("Content-Type", "application/json")
-                    data = json.dumps(data).encode("UTF-8")
+                    data = args[0]._json_codec.dumps(data)
             return func(*args, data=data, headers=headers, **kwargs)
 
         return wrapper
@@ -69,74 +153,337 @@ def encode_data():
     return decorator
 
 
-def _handle_request(url, method, data, headers, handler, user_agent=None):
+# returned by '_handle_request' for responses to conditional requests without changes
+_NOT_MODIFIED = object()
+
+
+def _get_error_type(status_code):
+    error_types = {
+        401: APIAuthenticationError,
+        403: APIAuthorizationError,
+    }
+    return error_types.get(status_code, APIRequestError)
+
+
+def _unpack_data(url, content_type, data, codec=DEFAULT_CODEC):
+    if not data:
+        # responses are never supposed to be empty
+        raise APIRequestError("API Empty Response Error: {}".format(url))
+    if content_type == "text/plain":
+        # used for the blickwerk settings dump
+        return data.decode("utf-8")
+    return _unpack_json(url, codec.loads(data))
+
+
+def _unpack_json(url, json_string):
+    # The ddb does not send "errors" (yet?)
+    if "errors" in json_string.keys() and json_string["errors"]:
+        raise APIRequestError(
+            "JSON encode error: {0} -> {1}".format(url, json_string["errors"])
+        )
+    if "results" in json_string.keys():  # ddb
+        return json_string["results"]
+    elif "data" in json_string.keys():  # schall, colorsensor
+        return json_string["data"]
+    else:  # ddb
+        return json_string
+
+
+def _read_records(response, delimiter=b"\n", buffer_size=64 * 1024):
+    """split a response body into records separated by the given delimiter
+
+    The body is read in large blocks (instead of line by line).  Reading returns as soon
+    as any data is available, thus records are not delayed by a partially filled block.
+    """
+    read = getattr(response, "read1", response.read)
+    pending = bytearray()
+    while True:
+        block = read(buffer_size)
+        if not block:
+            break
+        pending += block
+        start = 0
+        while True:
+            end = pending.find(delimiter, start)
+            if end < 0:
+                break
+            if end > start:
+                yield bytes(pending[start:end])
+            start = end + len(delimiter)
+        # keep the incomplete remainder (the buffer itself is reused)
+        del pending[:start]
+    if pending.strip():
+        yield bytes(pending)
+
+
+# content types of streams whose records are parsed as comma separated values
+_DELIMITED_CONTENT_TYPES = frozenset(("text/csv", "text/plain"))
+
+
+def _parse_delimited_value(value):
+    if value.isdigit() or (value[:1] == b"-" and value[1:].isdigit()):
+        return int(value)
+    try:
+        return float(value)
+    except ValueError:
+        return value.decode("utf-8")
+
+
+def _parse_delimited_record(record, separator=b","):
+    """parse a record of comma separated values (e.g. the "csv" sample format)"""
+    return [
+        _parse_delimited_value(value.strip())
+        for value in record.strip().split(separator)
+    ]
+
+
+def _trace_decoding(unpack_data, trace):
+    def traced_unpack_data(data):
+        started = time.perf_counter()
+        try:
+            return unpack_data(data)
+        finally:
+            trace.decode_time += time.perf_counter() - started
+
+    return traced_unpack_data
+
+
+def _release_after(url, results, release):
+    try:
+        yield from results
+    except APIRequestError:
+        raise
+    except (OSError, _http_client.HTTPException) as exc:
+        raise APIConnectionError("API Read Error ({}): {}".format(url, exc)) from exc
+    finally:
+        release()
+
+
+def _handle_request(
+    url,
+    method,
+    data,
+    headers,
+    handler,
+    user_agent=None,
+    pool=None,
+    timeout=None,
+    trace=None,
+    codec=DEFAULT_CODEC,
+):
+    if trace is None:
+        return _send_request(
+            url, method, data, headers, handler, user_agent, pool, timeout, codec
+        )
+    try:
+        result = _send_request(
+            url,
+            method,
+            data,
+            headers,
+            handler,
+            user_agent,
+            pool,
+            timeout,
+            codec,
+            trace,
+        )
+    except BaseException as exc:
+        trace.finish(exc)
+        raise
+    if isinstance(result, types.GeneratorType):
+        return _finish_after(result, trace)
+    trace.finish()
+    return result
+
+
+def _finish_after(results, trace):
+    try:
+        yield from results
+    except GeneratorExit:
+        # the consumer closed the stream early: not a failure of the request
+        trace.finish()
+        raise
+    except BaseException as exc:
+        trace.finish(exc)
+        raise
+    else:
+        trace.finish()
+
+
+def _send_request(
+    url, method, data, headers, handler, user_agent, pool, timeout, codec, trace=None
+):
     headers = dict(headers) if headers is not None else {}
     if user_agent is not None:
         headers.setdefault("User-Agent", user_agent)
     if isinstance(data, dict):
         # python3.5 does not accept a dict
-        data = json.dumps(data).encode()
+        data = _json.dumps(data).encode()
+    elif isinstance(data, StreamingBody):
+        for key, value in data.get_headers().items():
+            headers.setdefault(key, value)
     # Todo: correctly accept a 'permanently moved' (e.g. 301) status code
-    request = urllib.request.Request(url=url, method=method, data=data, headers=headers)
     try:
-        response = urllib.request.urlopen(request)
-    except urllib.error.HTTPError as exc:
+        if pool is None:
+            request = _urllib_request.Request(
+                url=url, method=method, data=data, headers=headers
+            )
+            if timeout is None or timeout.get_total() is None:
+                response = _urllib_request.urlopen(request)
+            else:
+                response = _urllib_request.urlopen(request, timeout=timeout.get_total())
+        elif trace is None:
+            response = pool.urlopen(url, method, data, headers, timeout=timeout)
+        else:
+            response = pool.urlopen(
+                url, method, data, headers, timeout=timeout, trace=trace
+            )
+    except _urllib_error.HTTPError as exc:
+        if trace is not None:
+            trace.set_response(exc.code)
+        if exc.code == _http_client.NOT_MODIFIED:
+            # urllib treats all status codes besides 2xx as errors
+            exc.close()
+            return _NOT_MODIFIED
         error_body = exc.fp.read()
-        error_types = {
-            401: APIAuthenticationError,
-            403: APIAuthorizationError,
-        }
-        error_type = error_types.get(exc.code, APIRequestError)
-        raise error_type(
+        raise _get_error_type(exc.code)(
             "API Error ({} -> {}): {}".format(url, exc, error_body),
             error_body=error_body,
             status_code=exc.code,
         ) from exc
-    except urllib.error.URLError as exc:
-        raise APIRequestError("API Connect Error ({}): {}".format(url, exc)) from exc
+    except (OSError, _http_client.HTTPException) as exc:
+        # urllib.error.URLError or a failure while waiting for the response
+        raise APIConnectionError("API Connect Error ({}): {}".format(url, exc)) from exc
     else:
+        if pool is None:
+            release = response.close
+        else:
+            release = functools.partial(pool.release, response)
+        if trace is not None and isinstance(data, StreamingBody):
+            trace.bytes_sent = data.bytes_sent
 
         def unpack_data(data):
-            content = data.decode("utf-8")
-            if not content:
-                # responses are never supposed to be empty
-                raise APIRequestError("API Empty Response Error: {}".format(url))
-            if response.headers.get("Content-Type") == "text/plain":
-                # used for the blickwerk settings dump
-                return content
-            json_string = json.loads(content)
-            # The ddb does not send "errors" (yet?)
-            if "errors" in json_string.keys() and json_string["errors"]:
-                raise APIRequestError(
-                    "JSON encode error: {0} -> {1}".format(url, json_string["errors"])
-                )
-            if "results" in json_string.keys():  # ddb
-                return json_string["results"]
-            elif "data" in json_string.keys():  # schall, colorsensor
-                return json_string["data"]
-            else:  # ddb
-                return json_string
-
-        if response.status == http.client.OK or response.status == http.client.CREATED:
-            return handler(response, unpack_data)
-        elif response.status == http.client.NO_CONTENT:
+            return _unpack_data(url, response.headers.get("Content-Type"), data, codec)
+
+        if trace is not None:
+            trace.set_response(response.status)
+            response = TracedResponse(response, trace)
+            unpack_data = _trace_decoding(unpack_data, trace)
+
+        if (
+            response.status == _http_client.OK
+            or response.status == _http_client.CREATED
+        ):
+            try:
+                result = handler(response, unpack_data)
+            except APIRequestError:
+                release()
+                raise
+            except (OSError, _http_client.HTTPException) as exc:
+                release()
+                raise APIConnectionError(
+                    "API Read Error ({}): {}".format(url, exc)
+                ) from exc
+            except Exception:
+                release()
+                raise
+            if isinstance(result, types.GeneratorType):
+                # streaming handlers consume the response lazily
+                return _release_after(url, result, release)
+            release()
+            return result
+        elif response.status == _http_client.NO_CONTENT:
+            response.read()
+            release()
             return None
+        elif response.status == _http_client.NOT_MODIFIED:
+            response.read()
+            release()
+            return _NOT_MODIFIED
         else:
             msg = "API status error ({} -> {} ({})): {}".format(
                 url,
-                http.client.responses[response.status],
+                _http_client.responses[response.status],
                 response.status,
                 response.read(),
             )
+            release()
             raise APIRequestError(msg, status_code=response.status)
 
 
+def _get_body_size(data):
+    if isinstance(data, StreamingBody):
+        # the size of chunked bodies is known only after sending them
+        return data.length or 0
+    return len(data) if data else 0
+
+
 class HTTPRequester:
-    def __init__(self, api_url, user_agent=None):
+    """base class of all API clients
+
+    @param api_url: base URL of the API (e.g. "http://example.ddb/api")
+    @param user_agent: overrides the default User-Agent header
+    @param connection_pool: a ConnectionPool keeping connections alive between requests
+        (by default every request uses a new connection)
+    @param response_cache: a ResponseCache for rarely changing responses (by default
+        every client uses its own cache without expiry)
+    @param conditional_requests: remember the validators (ETag / Last-Modified) of
+        responses and repeat GET requests conditionally.  If the resource did not change,
+        the previously parsed response is returned (it must not be modified).
+    @param timeout: the default timeout of requests: a number of seconds, a tuple
+        (connect, read) or a Timeout (see 'request_timeout' for single requests)
+    @param retry: a RetryPolicy for transient failures of idempotent requests
+    @param circuit_breaker: a CircuitBreaker rejecting requests to unavailable hosts
+        immediately (may be shared by many clients)
+    @param instrumentation: an Instrumentation reporting every request to its listeners
+        (by default every client uses its own one, see 'instrumentation')
+    @param json_codec: the name of a JSON codec ("orjson", "ujson" or "json") or a codec
+        object (by default orjson if it is installed, see 'urwerk_api_client.codec')
+    """
+
+    def __init__(
+        self,
+        api_url,
+        user_agent=None,
+        connection_pool=None,
+        response_cache=None,
+        conditional_requests=False,
+        timeout=None,
+        retry=None,
+        circuit_breaker=None,
+        instrumentation=None,
+        json_codec=None,
+    ):
         self.root_url = api_url.rstrip("/")
-        self._user_agent = (
-            user_agent if user_agent else "urwerk-api-client/{}".format(__version__)
+        self._user_agent = user_agent if user_agent else _DEFAULT_USER_AGENT
+        self._connection_pool = connection_pool
+        self._response_cache = (
+            ResponseCache() if response_cache is None else response_cache
         )
+        self._validated_responses = ResponseCache() if conditional_requests else None
+        # per thread: the responses of a snapshot and the timeout override
+        self._thread_state = threading.local()
+        self._timeout = Timeout.parse(timeout)
+        self._retry = retry
+        self._circuit_breaker = circuit_breaker
+        # created on first access (see 'instrumentation')
+        self._instrumentation = instrumentation
+        self._json_codec = get_codec(json_codec)
+
+    @property
+    def response_cache(self):
+        return self._response_cache
+
+    @property
+    def instrumentation(self):
+        """listeners attached here receive a RequestEvent for every request
+
+        aggregator = client.instrumentation.add_listener(HistogramAggregator())
+        """
+        if self._instrumentation is None:
+            self._instrumentation = Instrumentation()
+        return self._instrumentation
 
     def get_user_agent(self):
         return self._user_agent
@@ -146,7 +493,7 @@ class HTTPRequester:
             url = "/".join(url)
         if params:
             assert isinstance(params, dict)
-            encoded_params = urlencode(params)
+            encoded_params = _urllib_parse.urlencode(params)
             url = "{}?{}".format(url, encoded_params)
         if url is None:
             path = ""
@@ -155,7 +502,7 @@ class HTTPRequester:
         return self.root_url + path
 
     def _get_auth_header(self, user, password):
-        __secret = encodebytes(
+        __secret = _base64.encodebytes(
             "{}:{}".format(user, password).replace("\n", "").encode()
         )
         return {"Authorization": "Basic {}".format(__secret.decode()).strip()}
@@ -163,44 +510,287 @@ class HTTPRequester:
     def _get_token_auth_header(self, token):
         return {"Authorization": "Token {}".format(token)}
 
+    @contextlib.contextmanager
+    def snapshot(self):
+        """fetch every resource at most once within the context
+
+        Repeated GET requests for the same URL (within the current thread) return the
+        first response (which must not be modified).  Any write request discards the
+        responses collected so far.  Nested snapshots share the outermost one.
+
+            with client.snapshot():
+                version = client.get_firmware_version()
+                build_id = client.get_current_build_id()
+        """
+        if getattr(self._thread_state, "responses", None) is not None:
+            yield
+            return
+        self._thread_state.responses = {}
+        try:
+            yield
+        finally:
+            self._thread_state.responses = None
+
+    @contextlib.contextmanager
+    def _use_connection_pool(self, pool):
+        """send the requests of the current thread via the given pool within the context
+
+        In contrast to replacing the pool of the client, this does not affect requests
+        of other threads.
+        """
+        previous = getattr(self._thread_state, "connection_pool", None)
+        self._thread_state.connection_pool = pool
+        try:
+            yield
+        finally:
+            self._thread_state.connection_pool = previous
+
+    def _get_connection_pool(self):
+        pool = getattr(self._thread_state, "connection_pool", None)
+        return self._connection_pool if pool is None else pool
+
+    @contextlib.contextmanager
+    def request_timeout(self, connect=None, read=None):
+        """override the timeouts of all requests within the context (in this thread)
+
+        with client.request_timeout(connect=1, read=5):
+            client.get_firmware_version()
+        """
+        previous = getattr(self._thread_state, "timeout", None)
+        self._thread_state.timeout = Timeout(connect, read)
+        try:
+            yield
+        finally:
+            self._thread_state.timeout = previous
+
+    def _get_timeout(self):
+        timeout = getattr(self._thread_state, "timeout", None)
+        return self._timeout if timeout is None else timeout
+
+    def _request(self, url, method, data, headers, handler):
+        """send a request with respect to timeouts, retries and the circuit breaker"""
+        host = _urllib_parse.urlsplit(url).netloc
+        breaker = self._circuit_breaker
+        attempt = 0
+        while True:
+            if breaker is not None and breaker.is_open(host):
+                raise APICircuitOpenError(
+                    "API Circuit Open Error ({}): host is unavailable".format(url)
+                )
+            if self._instrumentation:
+                trace = self._instrumentation.start_request(
+                    method,
+                    url,
+                    get_url_template(url, self.root_url),
+                    bytes_sent=_get_body_size(data),
+                )
+            else:
+                trace = None
+            try:
+                result = _handle_request(
+                    url,
+                    method,
+                    data,
+                    headers,
+                    handler,
+                    user_agent=self._user_agent,
+                    pool=self._get_connection_pool(),
+                    timeout=self._get_timeout(),
+                    trace=trace,
+                    codec=self._json_codec,
+                )
+            except APIRequestError as exc:
+                # only failures of the device itself count (no client errors or
+                # unexpected response contents)
+                if isinstance(exc, APIConnectionError) or (exc.status_code or 0) >= 500:
+                    if breaker is not None:
+                        breaker.record_failure(host)
+                    retry = self._retry
+                    if (
+                        retry is not None
+                        and attempt < retry.total
+                        and retry.is_retryable(method, exc)
+                        and not (breaker is not None and breaker.is_open(host))
+                        and rewind_body(data)
+                    ):
+                        time.sleep(retry.get_delay(attempt))
+                        attempt += 1
+                        continue
+                elif breaker is not None:
+                    breaker.record_success(host)
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success(host)
+                return result
+
+    @contextlib.contextmanager
+    def keep_alive(self, max_idle=1):
+        """reuse connections within the context (even without a connection pool)
+
+        Clients without a connection pool use a temporary one (keeping up to 'max_idle'
+        connections alive) for the requests of the current thread within the context.
+        """
+        if self._get_connection_pool() is not None:
+            yield
+            return
+        with ConnectionPool(max_idle=max_idle) as pool, self._use_connection_pool(pool):
+            yield
+
+    def _discard_snapshot(self):
+        responses = getattr(self._thread_state, "responses", None)
+        if responses:
+            responses.clear()
+
     def _get(self, url=None, params=None, headers=None, handler=None):
-        return (handler or self._get_response)(
-            self._get_url(url, params), "GET", None, headers=headers
-        )
+        url = self._get_url(url, params)
+        responses = getattr(self._thread_state, "responses", None)
+        if responses is None or handler is not None:
+            return (handler or self._get_response)(url, "GET", None, headers=headers)
+        if url not in responses:
+            responses[url] = self._get_response(url, "GET", None, headers=headers)
+        return responses[url]
 
     @encode_data()
     def _put(self, url=None, params=None, data=None, headers=None, handler=None):
+        self._discard_snapshot()
         return (handler or self._get_response)(
             self._get_url(url, params), "PUT", data, headers=headers
         )
 
     @encode_data()
     def _post(self, url=None, params=None, data=None, headers=None, handler=None):
+        self._discard_snapshot()
         return (handler or self._get_response)(
             self._get_url(url, params), "POST", data, headers=headers
         )
 
     def _delete(self, url=None, params=None, headers=None, handler=None):
+        self._discard_snapshot()
         return (handler or self._get_response)(
             self._get_url(url, params), "DELETE", None, headers=headers
         )
 
-    def _get_response(self, url, method, data, headers=None):
+    def download(self, url, target, params=None, headers=None, chunk_size=64 * 1024):
+        """write the body of a GET response to a path, a binary file object or a buffer
+
+        The body is written while it is received (see 'copy_response'): it is never kept
+        in memory as a whole.  Buffers (e.g. a bytearray or a memoryview) are filled in
+        place.  Failed attempts are retried (see 'retry') if the target is a buffer or a
+        seekable file.  Returns the number of bytes written.
+
+            buffer = bytearray(4 * 1024 * 1024)
+            size = client.download("sensor/spectral/sample", memoryview(buffer))
+
+        @param url: the resource relative to the API URL (a string or a tuple of parts)
+        @raises ValueError: the body does not fit into the buffer
+        """
+        if isinstance(target, (str, bytes)) or hasattr(target, "__fspath__"):
+            with open(target, "wb") as output:
+                return self.download(url, output, params, headers, chunk_size)
+        position = get_stream_position(target) if hasattr(target, "write") else 0
+        attempts = []
+
         def handler(res, unpacker):
-            return unpacker(res.read())
+            if attempts:
+                # a retry: discard the data written by the failed attempt
+                if position is None:
+                    raise ValueError("Download target is not seekable")
+                if hasattr(target, "write"):
+                    target.seek(position)
+                    target.truncate()
+            attempts.append(res)
+            return copy_response(res, target, chunk_size)
+
+        return self._request(self._get_url(url, params), "GET", None, headers, handler)
 
-        return _handle_request(
-            url, method, data, headers, handler, user_agent=self._user_agent
-        )
+    def _get_response(self, url, method, data, headers=None):
+        validated = self._validated_responses if method == "GET" else None
+        previous = None
+        if validated is not None:
+            found, previous = validated.get(url)
+            if found:
+                etag, last_modified, _ = previous
+                headers = dict(headers) if headers is not None else {}
+                if etag is not None:
+                    headers.setdefault("If-None-Match", etag)
+                if last_modified is not None:
+                    headers.setdefault("If-Modified-Since", last_modified)
+
+        def handler(res, unpacker):
+            result = unpacker(res.read())
+            if validated is not None:
+                etag = res.headers.get("ETag")
+                last_modified = res.headers.get("Last-Modified")
+                if etag is not None or last_modified is not None:
+                    validated.put(url, (etag, last_modified, result))
+            return result
+
+        result = self._request(url, method, data, headers, handler)
+        if result is _NOT_MODIFIED:
+            if previous is None:
+                raise APIRequestError(
+                    "API status error ({} -> Not Modified (304)): unexpected".format(
+                        url
+                    ),
+                    status_code=_http_client.NOT_MODIFIED,
+                )
+            return previous[2]
+        return result
 
     def _stream_response(self, url, method, data, headers=None):
         def handler(res, unpacker):
             for data in res:
                 yield unpacker(data)
 
-        yield from _handle_request(
-            url, method, data, headers, handler, user_agent=self._user_agent
-        )
+        yield from self._request(url, method, data, headers, handler)
+
+    def _stream_records(
+        self, url, method, data, headers=None, delimiter=None, buffer_size=64 * 1024
+    ):
+        """stream the records of a response separated by the given delimiter
+
+        In contrast to '_stream_response' the body is read in large blocks and the way of
+        parsing the records is determined only once (based on the content type):
+        plain text and CSV records are parsed as comma separated values, all others
+        (e.g. JSON or NDJSON) are unpacked like any other response.
+        """
+        delimiter = delimiter.encode() if delimiter else b"\n"
+
+        def handler(res, unpacker):
+            content_type = (res.headers.get("Content-Type") or "").split(";")[0].strip()
+            records = _read_records(res, delimiter, buffer_size)
+            if content_type in _DELIMITED_CONTENT_TYPES:
+                for record in records:
+                    if record.strip():
+                        yield _parse_delimited_record(record)
+            else:
+                for record in records:
+                    if record.strip():
+                        yield unpacker(record)
+
+        yield from self._request(url, method, data, headers, handler)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_client_class(mixins):
+    for mixin in mixins:
+        if not (isinstance(mixin, type) and issubclass(mixin, HTTPRequester)):
+            raise TypeError("Not an API mixin: {!r}".format(mixin))
+    name = "".join(mixin.__name__ for mixin in mixins) + "Client"
+    return type(name, mixins, {"__module__": __name__})
+
+
+def make_client(api_url, *mixins, **kwargs):
+    """create a client providing only the methods of the given API mixins
+
+    The client class is created once for every combination of mixins.  Mixins relying
+    on methods of other mixins (e.g. SpectralAPI on DetectionProfilesAPI) require these
+    to be included, too.  Further keyword arguments are passed on to HTTPRequester.
+
+        client = make_client(url, SamplesAPI, DeviceAPI, timeout=2)
+    """
+    return _get_client_class(mixins or (HTTPRequester,))(api_url, **kwargs)
 
 
 class IPProtocol(enum.Enum):
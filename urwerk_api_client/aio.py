@@ -0,0 +1,432 @@
+"""asyncio based variant of the HTTPRequester
+
+Only the standard library is used: requests are written to (and responses parsed from)
+asyncio streams.  Connections are kept alive and reused for subsequent requests.
+"""
+
+import asyncio
+import collections
+import functools
+import http.client
+import io
+import json
+from urllib.parse import urlsplit
+
+from urwerk_api_client import (
+    __version__,
+    _get_error_type,
+    _unpack_data,
+    APIConnectionError,
+    APIRequestError,
+    encode_data,
+    HTTPRequester,
+    ResponseCache,
+    rewind_body,
+    StreamingBody,
+)
+from urwerk_api_client.codec import get_codec
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+class _AsyncResponse:
+    def __init__(self, reader, status, reason, headers, method):
+        self._reader = reader
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        transfer_encoding = headers.get("Transfer-Encoding", "").lower()
+        self.chunked = "chunked" in transfer_encoding
+        length = headers.get("Content-Length")
+        self._length_left = int(length) if length is not None else None
+        self.will_close = headers.get("Connection", "").lower() == "close" or (
+            not self.chunked and self._length_left is None
+        )
+        bodyless = status in (http.client.NO_CONTENT, http.client.NOT_MODIFIED)
+        self._finished = bodyless or method == "HEAD" or self._length_left == 0
+
+    def isclosed(self):
+        return self._finished
+
+    async def read_chunk(self):
+        """return the next part of the body (an empty bytes object at its end)"""
+        if self._finished:
+            return b""
+        if self.chunked:
+            size_line = await self._reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # skip trailers
+                while (await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                self._finished = True
+                return b""
+            data = await self._reader.readexactly(size)
+            await self._reader.readline()
+            return data
+        elif self._length_left is not None:
+            data = await self._reader.read(min(self._length_left, _READ_CHUNK_SIZE))
+            if not data:
+                raise asyncio.IncompleteReadError(data, self._length_left)
+            self._length_left -= len(data)
+            self._finished = self._length_left == 0
+            return data
+        else:
+            data = await self._reader.read(_READ_CHUNK_SIZE)
+            self._finished = not data
+            return data
+
+    async def read(self):
+        chunks = []
+        while True:
+            chunk = await self.read_chunk()
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+class _AsyncConnection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class _AsyncResponseLines:
+    """asynchronous iterator over the lines of a response body"""
+
+    def __init__(self, response, unpacker, release):
+        self._response = response
+        self._unpacker = unpacker
+        self._release = release
+        self._lines = collections.deque()
+        self._pending = b""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._lines:
+            try:
+                chunk = await self._response.read_chunk()
+            except BaseException:
+                self.close()
+                raise
+            if not chunk:
+                pending, self._pending = self._pending, b""
+                self.close()
+                if pending:
+                    return self._unpacker(pending)
+                raise StopAsyncIteration
+            lines = (self._pending + chunk).split(b"\n")
+            self._pending = lines.pop()
+            self._lines.extend(line for line in lines if line.strip())
+        return self._unpacker(self._lines.popleft())
+
+    def close(self):
+        if self._release is not None:
+            release, self._release = self._release, None
+            release()
+
+
+class _AsyncStream:
+    """asynchronous iterator issuing its request lazily on first use
+
+    Streams which are not consumed completely should be closed explicitly (or used as
+    an asynchronous context manager) in order to release their connection.
+    """
+
+    def __init__(self, request):
+        self._request = request
+        self._lines = None
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    async def __anext__(self):
+        if self._lines is None:
+            self._lines = await self._request()
+            if self._lines is None:
+                raise StopAsyncIteration
+        return await self._lines.__anext__()
+
+    def close(self):
+        if self._lines is not None:
+            self._lines.close()
+
+
+class AsyncHTTPRequester:
+    """base class of all asyncio based API clients
+
+    All request methods are coroutines.  A single event loop can drive any number of
+    clients concurrently.
+
+    @param api_url: base URL of the API (e.g. "http://example.ddb/api")
+    @param user_agent: overrides the default User-Agent header
+    @param max_connections: maximum number of concurrent connections to the device
+    @param max_idle_connections: maximum number of idle connections kept open
+    @param response_cache: see HTTPRequester
+    @param json_codec: see HTTPRequester
+    """
+
+    def __init__(
+        self,
+        api_url,
+        user_agent=None,
+        max_connections=4,
+        max_idle_connections=2,
+        response_cache=None,
+        json_codec=None,
+    ):
+        self.root_url = api_url.rstrip("/")
+        self._user_agent = (
+            user_agent if user_agent else "urwerk-api-client/{}".format(__version__)
+        )
+        self._max_connections = max_connections
+        self._max_idle_connections = max_idle_connections
+        self._connection_slots = None
+        self._idle = collections.defaultdict(collections.deque)
+        self._response_cache = (
+            ResponseCache() if response_cache is None else response_cache
+        )
+        self._json_codec = get_codec(json_codec)
+
+    response_cache = HTTPRequester.response_cache
+    get_user_agent = HTTPRequester.get_user_agent
+    _get_url = HTTPRequester._get_url
+    _get_auth_header = HTTPRequester._get_auth_header
+    _get_token_auth_header = HTTPRequester._get_token_auth_header
+
+    async def _get(self, url=None, params=None, headers=None, handler=None):
+        return await (handler or self._get_response)(
+            self._get_url(url, params), "GET", None, headers=headers
+        )
+
+    @encode_data()
+    async def _put(self, url=None, params=None, data=None, headers=None, handler=None):
+        return await (handler or self._get_response)(
+            self._get_url(url, params), "PUT", data, headers=headers
+        )
+
+    @encode_data()
+    async def _post(self, url=None, params=None, data=None, headers=None, handler=None):
+        return await (handler or self._get_response)(
+            self._get_url(url, params), "POST", data, headers=headers
+        )
+
+    async def _delete(self, url=None, params=None, headers=None, handler=None):
+        return await (handler or self._get_response)(
+            self._get_url(url, params), "DELETE", None, headers=headers
+        )
+
+    async def _get_response(self, url, method, data, headers=None):
+        async def handler(res, unpacker, release):
+            try:
+                return unpacker(await res.read())
+            finally:
+                release()
+
+        return await self._handle_request(url, method, data, headers, handler)
+
+    def _stream_response(self, url, method, data, headers=None):
+        """return an asynchronous iterator over the unpacked lines of the response"""
+
+        async def handler(res, unpacker, release):
+            return _AsyncResponseLines(res, unpacker, release)
+
+        return _AsyncStream(
+            functools.partial(self._handle_request, url, method, data, headers, handler)
+        )
+
+    async def _open_connection(self, key):
+        scheme, host, port = key
+        if scheme == "https":
+            reader, writer = await asyncio.open_connection(
+                host, port or http.client.HTTPS_PORT, ssl=True
+            )
+        elif scheme == "http":
+            reader, writer = await asyncio.open_connection(
+                host, port or http.client.HTTP_PORT
+            )
+        else:
+            raise APIRequestError("unsupported URL scheme: {}".format(scheme))
+        return _AsyncConnection(reader, writer)
+
+    async def _send(self, connection, parts, method, data, headers):
+        target = parts.path or "/"
+        if parts.query:
+            target = "{}?{}".format(target, parts.query)
+        headers = dict(headers) if headers is not None else {}
+        headers.setdefault("User-Agent", self._user_agent)
+        headers.setdefault("Host", parts.netloc)
+        headers.setdefault("Accept-Encoding", "identity")
+        if isinstance(data, dict):
+            data = json.dumps(data).encode()
+        if isinstance(data, StreamingBody):
+            for key, value in data.get_headers().items():
+                headers.setdefault(key, value)
+        elif data is not None or method in ("POST", "PUT"):
+            headers.setdefault("Content-Length", str(len(data or b"")))
+        head = ["{} {} HTTP/1.1".format(method, target)]
+        head.extend("{}: {}".format(key, value) for key, value in headers.items())
+        connection.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if isinstance(data, StreamingBody):
+            await self._send_body(connection.writer, data)
+        elif data:
+            connection.writer.write(data)
+        await connection.writer.drain()
+        status_line = await connection.reader.readline()
+        if not status_line:
+            raise http.client.RemoteDisconnected("Remote end closed connection")
+        status_parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        if len(status_parts) < 2 or not status_parts[0].startswith("HTTP/"):
+            raise http.client.BadStatusLine(status_line)
+        header_lines = []
+        while True:
+            line = await connection.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            header_lines.append(line)
+        response_headers = http.client.parse_headers(
+            io.BytesIO(b"".join(header_lines) + b"\r\n")
+        )
+        return _AsyncResponse(
+            connection.reader,
+            int(status_parts[1]),
+            status_parts[2] if len(status_parts) > 2 else "",
+            response_headers,
+            method,
+        )
+
+    @staticmethod
+    async def _send_body(writer, body):
+        """write a StreamingBody block by block (chunked if its length is unknown)"""
+        chunked = body.is_chunked()
+        for block in body:
+            if chunked:
+                writer.write("{:x}\r\n".format(len(block)).encode("ascii"))
+                writer.write(block)
+                writer.write(b"\r\n")
+            else:
+                writer.write(block)
+            await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+
+    def _release(self, key, connection, response):
+        idle = self._idle[key]
+        if (
+            response.isclosed()
+            and not response.will_close
+            and len(idle) < self._max_idle_connections
+        ):
+            idle.append(connection)
+        else:
+            connection.close()
+        self._connection_slots.release()
+
+    async def _connect(self, url, parts, key, method, data, headers):
+        """send the request on an idle or a new connection - return it and the response"""
+        while True:
+            idle = self._idle[key]
+            reused = bool(idle)
+            try:
+                connection = idle.pop() if reused else await self._open_connection(key)
+            except OSError as exc:
+                raise APIConnectionError(
+                    "API Connect Error ({}): {}".format(url, exc)
+                ) from exc
+            try:
+                response = await self._send(connection, parts, method, data, headers)
+            except (
+                OSError,
+                http.client.HTTPException,
+                asyncio.IncompleteReadError,
+            ) as exc:
+                connection.close()
+                if (
+                    reused
+                    and isinstance(
+                        exc, (ConnectionResetError, http.client.RemoteDisconnected)
+                    )
+                    and rewind_body(data)
+                ):
+                    # the server closed the idle connection in the meantime
+                    continue
+                raise APIConnectionError(
+                    "API Connect Error ({}): {}".format(url, exc)
+                ) from exc
+            except BaseException:
+                # the state of the connection is unknown
+                connection.close()
+                raise
+            return connection, response
+
+    async def _handle_request(self, url, method, data, headers, handler):
+        if self._connection_slots is None:
+            self._connection_slots = asyncio.Semaphore(self._max_connections)
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        await self._connection_slots.acquire()
+        try:
+            connection, response = await self._connect(
+                url, parts, key, method, data, headers
+            )
+        except BaseException:
+            # including cancellation (e.g. by asyncio.wait_for)
+            self._connection_slots.release()
+            raise
+        release = functools.partial(self._release, key, connection, response)
+
+        def unpack_data(data):
+            return _unpack_data(
+                url, response.headers.get("Content-Type"), data, self._json_codec
+            )
+
+        try:
+            if response.status >= 400:
+                error_body = await response.read()
+                raise _get_error_type(response.status)(
+                    "API Error ({} -> HTTP Error {}: {}): {}".format(
+                        url, response.status, response.reason, error_body
+                    ),
+                    error_body=error_body,
+                    status_code=response.status,
+                )
+            elif response.status in (http.client.OK, http.client.CREATED):
+                return await handler(response, unpack_data, release)
+            elif response.status == http.client.NO_CONTENT:
+                return None
+            else:
+                msg = "API status error ({} -> {} ({})): {}".format(
+                    url,
+                    http.client.responses[response.status],
+                    response.status,
+                    await response.read(),
+                )
+                raise APIRequestError(msg, status_code=response.status)
+        except (OSError, asyncio.IncompleteReadError) as exc:
+            # the connection failed while receiving the response body
+            raise APIConnectionError(
+                "API Read Error ({}): {}".format(url, exc)
+            ) from exc
+        finally:
+            if response.status not in (http.client.OK, http.client.CREATED):
+                release()
+
+    def close(self):
+        """close all idle connections"""
+        for idle in self._idle.values():
+            while idle:
+                idle.pop().close()
@@ -0,0 +1,604 @@
+"""asyncio based variants of the API clients in 'urwerk_api_client.colorsensor'
+
+The mixins mirror the URLs and arguments of their synchronous counterparts.  Changes to
+a method of 'urwerk_api_client.colorsensor' must be applied here as well (the tests
+compare both clients).  The following features are only available synchronously:
+
+- bulk writes: 'post_detectables', 'change_detectables', 'post_matchers',
+  'change_matchers' and 'apply_output_patterns'
+- sample readers, batches and block-wise parsing: 'get_sample_reader',
+  'iter_sample_batches' and the 'buffer_size' argument of 'get_sample_stream'
+- the client options 'timeout', 'retry', 'circuit_breaker', 'conditional_requests'
+  and 'instrumentation', response snapshots ('snapshot') and timeout overrides
+  ('request_timeout'; use 'asyncio.wait_for' instead)
+- 'keep_alive' (the async clients always keep their connections alive)
+- streamed transfers: 'export_settings', 'import_settings' and
+  'HTTPRequester.download' (request bodies given as file objects or iterables are
+  streamed by the async clients, too)
+"""
+
+import base64
+import json
+from operator import itemgetter
+
+from urwerk_api_client import IPProtocol
+from urwerk_api_client.aio import AsyncHTTPRequester
+from urwerk_api_client.cache import cached_response, invalidates
+from urwerk_api_client.models import (
+    Detectable,
+    DetectionProfile,
+    Emitter,
+    Matcher,
+    ModelCollection,
+    Sample,
+)
+from urwerk_api_client.settings_sync import decode_settings
+
+
+class AsyncUserAPI(AsyncHTTPRequester):
+
+    __sub_url = "access/users"
+
+    async def get_users(self):
+        return (await self._get(url=self.__sub_url))["users"]
+
+    async def get_user_by_name(self, user_name):
+        return await self._get(url=(self.__sub_url, user_name))
+
+    async def post_user(self, data):
+        return await self._post(url=self.__sub_url, data=data)
+
+    async def change_user(self, user_name, data):
+        return await self._put(url=(self.__sub_url, user_name), data=data)
+
+    async def delete_user(self, user_name):
+        return await self._delete(url=(self.__sub_url, user_name))
+
+
+class AsyncSettingsAPI(AsyncHTTPRequester):
+
+    __sub_url = "settings"
+
+    async def get_settings(self):
+        raw = await self._get(url=self.__sub_url)
+        return decode_settings(self._get_url(self.__sub_url, None), raw)
+
+    @invalidates()
+    async def reset_settings(self):
+        return await self._delete(url=self.__sub_url)
+
+    @invalidates()
+    async def set_settings(self, settings, categories=None):
+        raw = base64.b64encode(json.dumps(settings).encode())
+        if categories is not None:
+            query_args = {
+                "import_category_{}".format(category): "1" for category in categories
+            }
+        else:
+            query_args = None
+        return await self._put(url=self.__sub_url, params=query_args, data=raw)
+
+    settings_reset = reset_settings
+
+
+class AsyncSystemAPI(AsyncHTTPRequester):
+
+    __sub_url = "system"
+
+    async def get_hostname(self):
+        return (await self.get_system())["hostname"]
+
+    async def set_hostname(self, hostname):
+        return await self.change_system({"hostname": hostname})
+
+    @invalidates()
+    async def reboot(self):
+        return await self._post(url=(self.__sub_url, "reboot"))
+
+    @invalidates()
+    async def factory_reset(self):
+        return await self._post(url=(self.__sub_url, "factory-reset"))
+
+    async def get_system(self):
+        return await self._get(url=self.__sub_url)
+
+    @invalidates("system")
+    async def change_system(self, data):
+        return await self._put(url=self.__sub_url, data=data)
+
+    async def get_system_time(self):
+        return await self._get(url=(self.__sub_url, "time"))
+
+    @invalidates("system")
+    async def change_system_time(self, data):
+        return await self._put(url=(self.__sub_url, "time"), data=data)
+
+    @cached_response("system")
+    async def get_system_time_zones(self):
+        return await self._get(url=(self.__sub_url, "time/zones"))
+
+
+class AsyncFirmwareAPI(AsyncHTTPRequester):
+
+    __sub_url = "firmware"
+
+    async def _get_firmware_status(self):
+        return await self._get(url=(self.__sub_url, "status"))
+
+    async def get_firmware_version(self):
+        return (await self._get_firmware_status())["version"]
+
+    async def get_firmware_source_url(self):
+        return (await self._get_firmware_status())["source_url"]
+
+    async def get_firmware_recovery_information(self):
+        return await self._get(url=(self.__sub_url, "recovery"))
+
+    @invalidates()
+    async def upgrade_recovery_image(self):
+        return await self._post(
+            url=(self.__sub_url, "recovery", "upgrade-from-current")
+        )
+
+    async def get_current_recovery_build_id(self):
+        return (await self._get(url=(self.__sub_url, "recovery")))["id"]
+
+    async def get_current_build_id(self):
+        return (await self._get_firmware_status())["build_id"]
+
+
+class AsyncNetworkAPI(AsyncHTTPRequester):
+
+    __sub_url = "network"
+
+    async def get_network_interfaces(self):
+        response = await self._get(url=(self.__sub_url, "interfaces"))
+        interfaces = response["network_interfaces"]
+        interfaces.sort(key=lambda item: item["iface"])
+        return interfaces
+
+    async def get_network_interface_by_name(self, name):
+        return await self._get(url=(self.__sub_url, "interfaces", name))
+
+    async def set_network_interface_address_in_domain(
+        self, iface: str, protocol: IPProtocol, configuration
+    ):
+        """see NetworkAPI.set_network_interface_address_in_domain"""
+        data = {protocol.id: {"address_configurations": configuration}}
+        return await self._put(url=(self.__sub_url, "interfaces", iface), data=data)
+
+    async def reset_network_settings_to_defaults(self):
+        return await self._delete(url=self.__sub_url)
+
+
+class AsyncPeripheralsAPI(AsyncHTTPRequester):
+
+    __sub_url = "peripherals"
+
+    async def get_rs232_baud_rate(self):
+        return (await self._get(url=(self.__sub_url, "rs232")))["baud_rate"]
+
+    async def set_rs232_baud_rate(self, baud_rate):
+        return await self._put(
+            url=(self.__sub_url, "rs232"), data={"baud_rate": baud_rate}
+        )
+
+    async def get_rs232_protocol(self):
+        return (await self._get(url=(self.__sub_url, "rs232")))["protocol"]
+
+    async def set_rs232_protocol(self, parameters):
+        return await self._put(
+            url=(self.__sub_url, "rs232"), data={"protocol": parameters}
+        )
+
+    async def get_usb_protocol(self):
+        return (await self._get(url=(self.__sub_url, "usb")))["protocol"]
+
+    async def set_usb_protocol(self, parameters):
+        return await self._put(
+            url=(self.__sub_url, "usb"), data={"protocol": parameters}
+        )
+
+
+class AsyncOutputsAPI(AsyncHTTPRequester):
+
+    __sub_url = "peripherals/outputs"
+
+    async def set_output_mode(self, mode):
+        data = {"output_driver": mode}
+        return (await self._put(url=self.__sub_url, data=data))["output_driver"]
+
+    async def get_output_mode(self):
+        return (await self._get(url=self.__sub_url))["output_driver"]
+
+
+class AsyncKeypadAPI(AsyncHTTPRequester):
+
+    __sub_url = "peripherals/keypad"
+
+    async def get_keypad_lock_state(self):
+        return (await self._get(url=self.__sub_url))["locked"]
+
+    async def set_keypad_lock_state(self, state):
+        return await self._put(url=self.__sub_url, data={"locked": bool(state)})
+
+
+class AsyncDeviceAPI(AsyncHTTPRequester):
+
+    __sub_url = "device"
+
+    @cached_response("device")
+    async def _get_device_info(self):
+        return await self._get(url=self.__sub_url)
+
+    async def get_device_id(self):
+        return (await self._get_device_info())["id"]
+
+    async def get_device_model_key(self):
+        return (await self._get_device_info())["model_key"]
+
+    async def get_device_model_name(self):
+        return (await self._get_device_info())["model_name"]
+
+    async def get_device_variant(self):
+        return (await self._get_device_info()).get("variant", None)
+
+    async def get_device_vendor_name(self):
+        return (await self._get_device_info())["vendor_name"]
+
+    async def get_device_vendor_key(self):
+        return (await self._get_device_info())["vendor_key"]
+
+    async def get_device_model(self):
+        return (await self._get_device_info())["model"]
+
+
+class AsyncActionTriggersAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/action-triggers"
+
+    async def delete_action_triggers(self):
+        return await self._delete(url=self.__sub_url)
+
+
+class AsyncCapabilitiesAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/capabilities"
+
+    @cached_response("capabilities")
+    async def _get_capabilities(self):
+        return await self._get(url=self.__sub_url)
+
+    async def get_output_pin_count(self):
+        return (await self._get_capabilities())["output_pin_count"]
+
+    async def get_trigger_sources(self):
+        return (await self._get_capabilities())["trigger_sources"]
+
+    async def get_maximum_sample_rate(self):
+        return (await self._get_capabilities())["maximum_sample_rate"]
+
+    async def get_maximum_detectables_count(self):
+        return (await self._get_capabilities())["maximum_detectables_count"]
+
+    async def get_maximum_matchers_count(self):
+        return (await self._get_capabilities())["maximum_matchers_count"]
+
+    async def get_switching_output_drivers(self):
+        return (await self._get_capabilities())["output_drivers"]
+
+    async def get_supported_tolerance_shapes(self):
+        capabilities = await self._get_capabilities()
+        return {item["shape"] for item in capabilities["tolerances"]}
+
+    async def get_supported_colorspaces(self):
+        capabilities = await self._get_capabilities()
+        return {item["space_id"] for item in capabilities["colorspaces"]}
+
+
+class AsyncDetectionProfilesAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/detection-profiles"
+
+    async def get_detection_profiles(self):
+        return await self._get(url=self.__sub_url)
+
+    async def get_current_detection_profile(self, as_model=False):
+        profile = await self._get(url=(self.__sub_url, "current"))
+        return DetectionProfile(profile) if as_model else profile
+
+    async def get_detection_profile(self, any_id, as_model=False):
+        profile = await self._get(url=(self.__sub_url, str(any_id)))
+        return DetectionProfile(profile) if as_model else profile
+
+    # for backwards compatibility
+    get_detection_profile_by_uuid = get_detection_profile
+
+    @invalidates("detection-profile")
+    async def post_detection_profile(self, data):
+        return await self._post(url=self.__sub_url, data=data)
+
+    @invalidates("detection-profile")
+    async def change_detection_profile(self, any_id, data):
+        return await self._put(url=(self.__sub_url, str(any_id)), data=data)
+
+    @invalidates("detection-profile")
+    async def delete_detection_profile(self, any_id):
+        return await self._delete(url=(self.__sub_url, str(any_id)))
+
+    @invalidates("detection-profile")
+    async def run_autogain(
+        self,
+        minimum_sample_rate=None,
+        target_level=None,
+        averages=None,
+        enable_internal_emitter=None,
+        enable_ambient_light_compensation=None,
+    ):
+        params = {}
+        if minimum_sample_rate is not None:
+            params["minimum_sample_rate"] = minimum_sample_rate
+        if target_level is not None:
+            params["level"] = target_level
+        if averages is not None:
+            params["averages"] = averages
+        if enable_internal_emitter is not None:
+            params["enable_internal_emitter"] = enable_internal_emitter
+        if enable_ambient_light_compensation is not None:
+            params["enable_ambient_light_compensation"] = (
+                enable_ambient_light_compensation
+            )
+        return await self._post(
+            url=(self.__sub_url, "current", "autogain"), data=params
+        )
+
+    @invalidates("detection-profile")
+    async def set_white_reference(self, profile_id="current"):
+        await self._post(url=(self.__sub_url, profile_id, "white-reference"))
+
+    @invalidates("detection-profile")
+    async def factory_reset_white_reference(self, profile_id="current"):
+        await self._delete(url=(self.__sub_url, profile_id, "white-reference"))
+
+    async def get_profile_normalization_constants(self, profile_id="current"):
+        """see DetectionProfilesAPI.get_profile_normalization_constants"""
+        profile = await self._get(url=(self.__sub_url, profile_id))
+        return profile["normalization_constant"]
+
+    @invalidates("detection-profile")
+    async def enable_compensation(self, profile_id="current"):
+        """see DetectionProfilesAPI.enable_compensation"""
+        params = {"compensation_settings": {"use_calibration_samples": True}}
+        return await self._put(url=(self.__sub_url, profile_id), data=params)
+
+    @invalidates("detection-profile")
+    async def disable_compensation(self, profile_id="current"):
+        """see DetectionProfilesAPI.disable_compensation"""
+        params = {"compensation_settings": {"use_calibration_samples": False}}
+        return await self._put(url=(self.__sub_url, profile_id), data=params)
+
+
+class AsyncDetectablesAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/detectables"
+
+    async def get_detectables(self, profile=None, matcher_id=None, as_model=False):
+        """see DetectablesAPI.get_detectables"""
+        params = {}
+        if profile is not None:
+            params["profile_id"] = profile
+        if matcher_id is not None:
+            params["matcher_id"] = matcher_id
+        response = await self._get(url=self.__sub_url, params=params)
+        detectables = response["detectables"]
+        detectables.sort(key=itemgetter("uuid"))
+        return ModelCollection(detectables, Detectable) if as_model else detectables
+
+    async def get_detectable(self, any_id, profile=None):
+        params = None if profile is None else {"profile_id": profile}
+        return await self._get(url=(self.__sub_url, str(any_id)), params=params)
+
+    # for backwards compatibility
+    get_detectable_by_uuid = get_detectable
+
+    async def post_detectable(self, profile=None, data=None):
+        data = {} if data is None else dict(data)
+        if profile is not None:
+            data["profile_id"] = profile
+        return await self._post(url=self.__sub_url, data=data)
+
+    async def change_detectable(self, any_id, data, profile=None):
+        data = {} if data is None else dict(data)
+        if profile is not None:
+            data["profile_id"] = profile
+        return await self._put(url=(self.__sub_url, str(any_id)), data=data)
+
+    async def delete_detectable(self, any_id, profile=None):
+        params = {} if profile is None else {"profile_id": profile}
+        return await self._delete(url=(self.__sub_url, str(any_id)), params=params)
+
+    async def delete_detectables(self, profile=None, matcher_id=None):
+        params = {}
+        if profile is not None:
+            params["profile_id"] = profile
+        if matcher_id is not None:
+            params["matcher_id"] = matcher_id
+        return await self._delete(url=(self.__sub_url), params=params)
+
+
+class AsyncEmitterAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/emitters"
+
+    async def get_emitters(self, profile=None, as_model=False):
+        params = None if profile is None else {"profile_id": profile}
+        emitters = await self._get(url=self.__sub_url, params=params)
+        if not as_model:
+            return emitters
+        if isinstance(emitters, dict):
+            emitters = emitters.get("emitters", [])
+        return ModelCollection(emitters, Emitter)
+
+    async def get_emitter_by_id(self, hid, profile=None):
+        params = None if profile is None else {"profile_id": profile}
+        return await self._get(url=(self.__sub_url, hid), params=params)
+
+    async def change_emitter(self, any_id, data, profile=None):
+        data = {} if data is None else dict(data)
+        if profile is not None:
+            data["profile_id"] = profile
+        return await self._put(url=(self.__sub_url, str(any_id)), data=data)
+
+
+class AsyncMatcherAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/matchers"
+
+    async def get_matchers(self, profile=None, as_model=False):
+        """see MatcherAPI.get_matchers"""
+        params = None if profile is None else {"profile_id": profile}
+        matchers = (await self._get(url=self.__sub_url, params=params))["matchers"]
+        matchers.sort(key=itemgetter("uuid"))
+        return ModelCollection(matchers, Matcher) if as_model else matchers
+
+    async def get_matcher(self, any_id, profile=None):
+        params = None if profile is None else {"profile_id": profile}
+        return await self._get(url=(self.__sub_url, str(any_id)), params=params)
+
+    # for backwards compatibility
+    get_matcher_by_uuid = get_matcher
+
+    async def post_matcher(self, profile=None, data=None):
+        data = {} if data is None else dict(data)
+        if profile is not None:
+            data["profile_id"] = profile
+        return await self._post(url=self.__sub_url, data=data)
+
+    async def change_matcher(self, any_id, data, profile=None):
+        data = {} if data is None else dict(data)
+        if profile is not None:
+            data["profile_id"] = profile
+        return await self._put(url=(self.__sub_url, str(any_id)), data=data)
+
+    async def delete_matcher(self, any_id, profile=None):
+        params = {} if profile is None else {"profile_id": profile}
+        return await self._delete(url=(self.__sub_url, str(any_id)), params=params)
+
+    async def delete_matchers(self):
+        return await self._delete(url=self.__sub_url)
+
+    async def set_matcher_output_pattern(self, any_id, pattern):
+        data = {"output_pattern": {"states": pattern}}
+        return await self._put(url=(self.__sub_url, str(any_id)), data=data)
+
+    async def get_matcher_output_pattern(self, any_id):
+        return await self._get(url=(self.__sub_url, str(any_id)))
+
+
+class AsyncAccessAPI(AsyncHTTPRequester):
+
+    __sub_url = "access"
+
+    async def get_blocked_remote_actions(self):
+        response = await self._get(url=self.__sub_url)
+        return response.get("blocked_remote_actions", [])
+
+    async def set_blocked_remote_actions(self, actions):
+        response = await self._put(
+            url=self.__sub_url,
+            data={"blocked_remote_actions": list(actions or [])},
+        )
+        return response.get("blocked_remote_actions", [])
+
+
+class AsyncSamplesAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/samples"
+
+    async def get_current_sample(self, as_model=False):
+        sample = await self._get(url=(self.__sub_url, "current"))
+        return Sample(sample) if as_model else sample
+
+    def get_sample_stream(self, count=None, format=None, delimiter=None):
+        """return an asynchronous iterator over the streamed samples
+
+        usage: async for sample in client.get_sample_stream(): ...
+        """
+        params = dict(stream=1)
+        if count:
+            params["stream_count"] = count
+        if format:
+            params["format"] = format
+        if delimiter:
+            params["delimiter"] = delimiter
+        return self._stream_response(self._get_url(self.__sub_url, params), "GET", None)
+
+
+class AsyncColorspacesAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/colorspaces"
+
+    async def get_colorspace(self):
+        return (await self.get_current_detection_profile())["colorspace"]
+
+    async def set_colorspace(self, colorspace_id):
+        return await self.change_detection_profile(
+            "current", {"colorspace": {"space_id": colorspace_id}}
+        )
+
+    @cached_response("colorspaces")
+    async def get_colorspaces(self):
+        return (await self._get(url=self.__sub_url))["colorspaces"]
+
+    async def get_colorspace_by_name(self, name):
+        return await self._get(url=(self.__sub_url, name))
+
+
+class AsyncDefaultsAPI(AsyncHTTPRequester):
+    __sub_url = "defaults"
+
+    async def set_default(self, object_type, key, value):
+        await self._post(
+            self.__sub_url,
+            data={
+                "object_type": object_type,
+                "key": key,
+                "value": value,
+            },
+        )
+
+    async def get_defaults(self):
+        return (await self._get(self.__sub_url))["defaults"]
+
+    async def get_factory_defaults(self):
+        return (await self._get(self.__sub_url))["factory_defaults"]
+
+    async def get_default(self, object_type, key):
+        for collection in (self.get_defaults, self.get_factory_defaults):
+            for obj in await collection():
+                if obj["object_type"] == object_type and obj["key"] == key:
+                    return obj
+
+
+class AsyncColorsensorAPI(
+    AsyncDetectablesAPI,
+    AsyncDefaultsAPI,
+    AsyncDetectionProfilesAPI,
+    AsyncEmitterAPI,
+    AsyncMatcherAPI,
+    AsyncNetworkAPI,
+    AsyncSamplesAPI,
+    AsyncSystemAPI,
+    AsyncDeviceAPI,
+    AsyncCapabilitiesAPI,
+    AsyncUserAPI,
+    AsyncColorspacesAPI,
+    AsyncKeypadAPI,
+    AsyncSettingsAPI,
+    AsyncFirmwareAPI,
+    AsyncOutputsAPI,
+    AsyncPeripheralsAPI,
+    AsyncActionTriggersAPI,
+    AsyncAccessAPI,
+):
+    """asyncio based API Client for all features of a colorsensor"""
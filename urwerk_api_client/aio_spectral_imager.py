@@ -0,0 +1,83 @@
+"""asyncio based variants of the API clients in 'urwerk_api_client.spectral_imager'
+
+Besides the features listed in 'urwerk_api_client.aio_colorsensor', the spectrum arrays
+('get_spectrum_array', 'get_wavelength_axis'), the continuous acquisition
+('iter_spectral_samples'), the local references and the spectral processing pipeline
+are only available synchronously.
+"""
+
+from urwerk_api_client.aio import AsyncHTTPRequester
+from urwerk_api_client.aio_colorsensor import AsyncColorsensorAPI
+from urwerk_api_client.spectral_imager import SpectralSample
+
+
+class AsyncSpectralAPI(AsyncHTTPRequester):
+
+    __sub_url = "sensor/spectral"
+
+    async def _get_spectral_sample(self):
+        return await self._get(url=(self.__sub_url, "sample"))
+
+    async def get_spectral_sample(self):
+        """see SpectralAPI.get_spectral_sample"""
+        return SpectralSample.from_response(await self._get_spectral_sample())
+
+    async def get_spectral_sampling_settings(self, profile_id="current"):
+        profile = await self.get_detection_profile_by_uuid(profile_id)
+        return profile["sampling_settings"]
+
+    async def get_spectrum(self):
+        """returns array of [wavelength, measured value]"""
+        return (await self._get_spectral_sample())["spectrum"]
+
+    async def get_spectrum_dict(self):
+        """returns array of point-dictionaries: [{"wavelength": 100.0, "value": 0.01}, ...]"""
+        spectrum = await self.get_spectrum()
+        return [{"wavelength": point[0], "value": point[1]} for point in spectrum]
+
+    async def get_wavelengths(self):
+        """returns array of used wavelengths"""
+        return (await self._get(url=(self.__sub_url, "wavelengths")))["wavelengths"]
+
+    async def reset_spectral_dark_reference(self):
+        return await self._delete(url=(self.__sub_url, "dark-reference"))
+
+    async def set_spectral_dark_reference(self):
+        return await self._post(url=(self.__sub_url, "dark-reference"))
+
+    async def get_average_count(self, profile_id="current"):
+        settings = await self.get_spectral_sampling_settings(profile_id)
+        return settings["average_count"]
+
+    async def set_average_count(self, average_count, profile_id="current"):
+        data = {"sampling_settings": {"average_count": average_count}}
+        return await self.change_detection_profile(profile_id, data)
+
+    async def get_integration_time(self, profile_id="current"):
+        settings = await self.get_spectral_sampling_settings(profile_id)
+        return settings["integration_time"]
+
+    async def set_integration_time(self, integration_time, profile_id="current"):
+        data = {"sampling_settings": {"integration_time": integration_time}}
+        return await self.change_detection_profile(profile_id, data)
+
+    async def spectral_normalize(self):
+        return await self._post(url=(self.__sub_url, "normalization"))
+
+    async def spectral_reset_normalization(self):
+        return await self._delete(url=(self.__sub_url, "normalization"))
+
+    async def get_regions_of_interest(self):
+        """see SpectralAPI.get_regions_of_interest"""
+        return (await self._get_spectral_sample())["regions_of_interest"]
+
+    async def set_regions_of_interest(self, boundaries=None):
+        """see SpectralAPI.set_regions_of_interest"""
+        data = {}
+        if boundaries is not None:
+            data["boundaries"] = boundaries
+        return await self._post(url=(self.__sub_url, "regions-of-interest"), data=data)
+
+
+class AsyncSpectralImagerAPI(AsyncSpectralAPI, AsyncColorsensorAPI):
+    """asyncio based API Client for some features of a spectral imager"""
@@ -0,0 +1,162 @@
+"""columnar (struct of arrays) containers for blocks of samples"""
+
+from array import array
+
+
+def get_sample_fields(
+    sample, timestamp_key="timestamp", color_key="color", matches_key="matches"
+):
+    """extract the timestamp, the channel values and the matched IDs of a sample
+
+    Samples are either dictionaries or lists of values (e.g. parsed CSV records).
+    Dictionaries contain the colour channels (named "color" like the colour of a
+    detectable) and the UUIDs of the matched detectables.  The first item of a list is
+    interpreted as the timestamp, all others as channel values.  Custom sample layouts
+    can be handled by a function with the same signature.
+    """
+    if isinstance(sample, dict):
+        values = sample[color_key]
+        if isinstance(values, dict):
+            values = list(values.values())
+        return sample[timestamp_key], values, sample.get(matches_key) or ()
+    else:
+        return sample[0], sample[1:], ()
+
+
+class SampleBatch:
+    """a block of samples stored in preallocated arrays
+
+    The accessors of the numeric columns return views on the underlying buffers
+    (without copying).  Use 'as_numpy' for zero-copy NumPy arrays.  The matched IDs
+    (detectable UUIDs) are strings: they are kept in a list.
+
+    @param capacity: the maximum number of samples in this batch
+    @param channel_count: the number of values per sample
+    """
+
+    def __init__(self, capacity, channel_count):
+        self.capacity = capacity
+        self.channel_count = channel_count
+        self.size = 0
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity * channel_count))
+        self._match_offsets = array("q", bytes(8 * (capacity + 1)))
+        self._match_ids = []
+
+    @classmethod
+    def from_buffers(cls, timestamps, values, match_offsets, match_ids):
+        """create a (full) batch backed by the given buffers without copying them
+
+        The buffers may be arrays or memoryviews (e.g. of a recording file).
+        'values' contains len(timestamps) * channel_count items, 'match_ids' is a list
+        and 'match_offsets' starts at 0.
+        """
+        batch = cls.__new__(cls)
+        batch.capacity = batch.size = len(timestamps)
+        batch.channel_count = len(values) // len(timestamps) if timestamps else 0
+        batch._timestamps = timestamps
+        batch._values = values
+        batch._match_offsets = match_offsets
+        batch._match_ids = match_ids
+        return batch
+
+    def __len__(self):
+        return self.size
+
+    def is_full(self):
+        return self.size >= self.capacity
+
+    def clear(self):
+        """discard all samples (the buffers are kept for reuse)"""
+        self.size = 0
+        del self._match_ids[:]
+
+    def append(self, timestamp, values, matches=()):
+        index = self.size
+        if index >= self.capacity:
+            raise IndexError("SampleBatch is full")
+        if len(values) != self.channel_count:
+            raise ValueError(
+                "Expected {} channel values, got {}".format(
+                    self.channel_count, len(values)
+                )
+            )
+        self._timestamps[index] = timestamp
+        start = index * self.channel_count
+        self._values[start : start + self.channel_count] = array("d", values)
+        self._match_ids.extend(matches)
+        self._match_offsets[index + 1] = len(self._match_ids)
+        self.size = index + 1
+
+    @property
+    def timestamps(self):
+        return memoryview(self._timestamps)[: self.size]
+
+    @property
+    def values(self):
+        """the channel values as two-dimensional view (sample, channel)"""
+        if self.size == 0 or self.channel_count == 0:
+            # memoryviews with a zero dimension cannot be created by casting
+            return memoryview(self._values)[:0]
+        flat = memoryview(self._values)[: self.size * self.channel_count]
+        return flat.cast("B").cast("d", [self.size, self.channel_count])
+
+    @property
+    def match_offsets(self):
+        """the matches of sample N are match_ids[match_offsets[N]:match_offsets[N + 1]]"""
+        return memoryview(self._match_offsets)[: self.size + 1]
+
+    @property
+    def match_ids(self):
+        """the matched IDs of all samples (a copy)"""
+        return self._match_ids[: self._match_offsets[self.size]]
+
+    def get_matches(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        start, end = self._match_offsets[index], self._match_offsets[index + 1]
+        return self._match_ids[start:end]
+
+    def as_numpy(self):
+        """return NumPy views of the buffers (requires NumPy)
+
+        The result is a dictionary with the keys "timestamps", "values" (two-dimensional),
+        "match_offsets" and "match_ids" (a copy with the dtype object).
+        """
+        import numpy
+
+        return {
+            "timestamps": numpy.frombuffer(self._timestamps, dtype=numpy.float64)[
+                : self.size
+            ],
+            "values": numpy.frombuffer(self._values, dtype=numpy.float64)[
+                : self.size * self.channel_count
+            ].reshape(self.size, self.channel_count),
+            "match_offsets": numpy.frombuffer(self._match_offsets, dtype=numpy.int64)[
+                : self.size + 1
+            ],
+            "match_ids": numpy.array(self.match_ids, dtype=object),
+        }
+
+
+def iter_batches(samples, batch_size, fields=get_sample_fields, reuse=False):
+    """collect samples into SampleBatch objects
+
+    @param fields: function returning timestamp, channel values and matched IDs of a sample
+    @param reuse: refill the same batch (and its buffers) for every block.  The previous
+        block (and any views on it) must not be used after requesting the next one.
+    """
+    batch = None
+    for sample in samples:
+        timestamp, values, matches = fields(sample)
+        if batch is None:
+            batch = SampleBatch(batch_size, len(values))
+        elif batch.is_full():
+            yield batch
+            if reuse:
+                batch.clear()
+            else:
+                batch = SampleBatch(batch_size, batch.channel_count)
+        batch.append(timestamp, values, matches)
+    if batch is not None and len(batch) > 0:
+        yield batch
@@ -0,0 +1,52 @@
+"""apply many write operations of the same kind with per-item results"""
+
+from urwerk_api_client import APIRequestError, ConnectionPool
+from urwerk_api_client.lazy import lazy_import
+from urwerk_api_client.results import MultiResult
+
+# only needed for concurrent bulk operations
+_futures = lazy_import("concurrent.futures")
+
+
+def run_bulk(client, operations, max_workers=1):
+    """execute (key, callable) operations of a client and collect their outcome
+
+    With a single worker the requests are sent one after another over a persistent
+    connection.  Otherwise up to 'max_workers' requests are sent in parallel (using
+    as many persistent connections).  Failed requests (APIRequestError) are reported
+    in the result - they do not stop the remaining operations.
+
+    The result is a MultiResult mapped by the keys of the operations (e.g. the index of
+    an item in a list or its ID).
+    """
+    operations = list(operations)
+    outcome = {}
+    pool = client._get_connection_pool()
+    own_pool = None if pool is not None else ConnectionPool(max_idle=max_workers)
+
+    def run(key, operation):
+        # the pool is passed to every worker explicitly (the pool of the client and the
+        # requests of other threads are not affected)
+        with client._use_connection_pool(pool or own_pool):
+            try:
+                outcome[key] = (True, operation())
+            except APIRequestError as exc:
+                outcome[key] = (False, exc)
+
+    try:
+        if max_workers <= 1:
+            for key, operation in operations:
+                run(key, operation)
+        else:
+            with _futures.ThreadPoolExecutor(max_workers) as executor:
+                futures = [
+                    executor.submit(run, key, operation)
+                    for key, operation in operations
+                ]
+                for future in futures:
+                    # propagate unexpected exceptions
+                    future.result()
+    finally:
+        if own_pool is not None:
+            own_pool.close()
+    return MultiResult.from_outcome((key for key, _ in operations), outcome)
@@ -0,0 +1,170 @@
+"""per client cache for rarely changing API responses"""
+
+import collections
+import functools
+import threading
+import time
+
+# 'inspect.CO_COROUTINE' (importing inspect is slow)
+_CO_COROUTINE = 0x80
+
+
+def _is_coroutine_function(func):
+    code = getattr(func, "__code__", None)
+    return code is not None and bool(code.co_flags & _CO_COROUTINE)
+
+
+class ResponseCache:
+    """a size limited cache with expiring entries
+
+    Every entry is labelled with tags and an optional scope (the API URL of the device
+    for cached responses).  Write operations invalidate all entries of the device with
+    related tags (see 'invalidates').
+
+    @param maxsize: maximum number of entries (the least recently used ones are dropped)
+    @param ttl: default lifetime (in seconds) of entries (None: unlimited)
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """return a tuple (found, value) for the given key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires, _, _ = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, ttl=None, tags=(), scope=None):
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires, frozenset(tags), scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tags, scope=None):
+        """discard all entries labelled with any of the given tags (or all without tags)
+
+        @param scope: discard only the entries of this scope (None: of all scopes)
+        """
+        with self._lock:
+            keys = [
+                key
+                for key, (_, _, entry_tags, entry_scope) in self._entries.items()
+                if (scope is None or entry_scope == scope)
+                and (not tags or entry_tags.intersection(tags))
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    clear = invalidate
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def cached_response(*tags, ttl=None):
+    """cache the result of an API method in the response cache of the client
+
+    This replaces 'functools.lru_cache' for methods: the cache belongs to the client
+    instance (instead of keeping the instance alive), entries may expire and they are
+    invalidated by related write operations.  Coroutine methods are supported, too.
+
+    @param tags: labels used for invalidating the cached result
+    @param ttl: lifetime of the cached result (defaults to the TTL of the cache)
+    """
+
+    def get_key(client, func, args, kwargs):
+        # a cache may be shared by clients of different devices
+        return (client.root_url, func.__qualname__, args, frozenset(kwargs.items()))
+
+    def decorator(func):
+        if _is_coroutine_function(func):
+
+            @functools.wraps(func)
+            async def wrapper(self, *args, **kwargs):
+                key = get_key(self, func, args, kwargs)
+                found, value = self._response_cache.get(key)
+                if not found:
+                    value = await func(self, *args, **kwargs)
+                    self._response_cache.put(
+                        key, value, ttl=ttl, tags=tags, scope=self.root_url
+                    )
+                return value
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                key = get_key(self, func, args, kwargs)
+                found, value = self._response_cache.get(key)
+                if not found:
+                    value = func(self, *args, **kwargs)
+                    self._response_cache.put(
+                        key, value, ttl=ttl, tags=tags, scope=self.root_url
+                    )
+                return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*tags):
+    """invalidate cached responses with the given tags (or all) after a write operation
+
+    Only the responses of the device of the client are invalidated.
+    """
+
+    def decorator(func):
+        if _is_coroutine_function(func):
+
+            @functools.wraps(func)
+            async def wrapper(self, *args, **kwargs):
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    self._response_cache.invalidate(*tags, scope=self.root_url)
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                try:
+                    return func(self, *args, **kwargs)
+                finally:
+                    self._response_cache.invalidate(*tags, scope=self.root_url)
+
+        return wrapper
+
+    return decorator
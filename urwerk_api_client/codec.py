@@ -0,0 +1,119 @@
+"""JSON encoding and decoding of request and response bodies
+
+orjson is used by default if it is installed, otherwise the json module of the standard
+library.  ujson is only used if it is requested by name: it parses floats with less
+precision and accepts some invalid documents.  All codecs encode to and decode from
+bytes.
+"""
+
+import sys
+
+
+class JSONCodec:
+    """the json module of the standard library"""
+
+    name = "json"
+
+    def __init__(self):
+        import json
+
+        self._json = json
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, self.name)
+
+    def dumps(self, value):
+        return self._json.dumps(value).encode("utf-8")
+
+    if sys.version_info >= (3, 6):
+
+        def loads(self, data):
+            return self._json.loads(data)
+
+    else:
+
+        def loads(self, data):
+            # python3.5 does not accept bytes
+            return self._json.loads(data.decode("utf-8"))
+
+
+class OrjsonCodec(JSONCodec):
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value):
+        return self._orjson.dumps(value, option=self._options)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def dumps(self, value):
+        return self._ujson.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+_CODEC_CLASSES = (OrjsonCodec, UjsonCodec, JSONCodec)
+
+
+def _create_codec(name=None):
+    if name is None:
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return JSONCodec()
+    for codec_class in _CODEC_CLASSES:
+        if name == codec_class.name:
+            return codec_class()
+    raise ValueError("Unknown JSON codec: {}".format(name))
+
+
+class _DefaultCodec:
+    """the default codec - selected (and imported) on first use"""
+
+    def __repr__(self):
+        return repr(self._codec)
+
+    def __getattr__(self, attribute):
+        # replace this method by the attributes of the selected codec
+        codec = _create_codec()
+        self.__dict__.update(
+            _codec=codec, name=codec.name, dumps=codec.dumps, loads=codec.loads
+        )
+        if attribute in self.__dict__:
+            return self.__dict__[attribute]
+        return getattr(codec, attribute)
+
+
+def get_codec(codec=None):
+    """return a codec by name ("orjson", "ujson" or "json") or the default one
+
+    The default codec is orjson (if installed) or json.  Codec objects are returned
+    unchanged.  An ImportError is raised if the requested codec is not installed.
+    """
+    if codec is None:
+        # shared by all clients
+        return DEFAULT_CODEC
+    if not isinstance(codec, str):
+        return codec
+    return _create_codec(codec)
+
+
+DEFAULT_CODEC = _DefaultCodec()
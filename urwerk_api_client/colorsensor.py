@@ -1,8 +1,35 @@
-import base64
-from functools import lru_cache
-import json
+from functools import partial
+from operator import itemgetter
 
 from urwerk_api_client import HTTPRequester, IPProtocol
+from urwerk_api_client.batches import get_sample_fields, iter_batches
+from urwerk_api_client.bulk import run_bulk
+from urwerk_api_client.cache import cached_response, invalidates
+from urwerk_api_client.lazy import lazy_import
+from urwerk_api_client.models import (
+    Detectable,
+    DetectionProfile,
+    Emitter,
+    Matcher,
+    ModelCollection,
+    Sample,
+)
+from urwerk_api_client.settings_sync import (
+    decode_settings,
+    download_settings,
+    encode_base64_stream,
+    get_base64_size,
+)
+from urwerk_api_client.stream_reader import SampleStreamReader
+from urwerk_api_client.streaming import (
+    get_remaining_size,
+    get_stream_position,
+    StreamingBody,
+)
+
+# only used for settings dumps
+_base64 = lazy_import("base64")
+_json = lazy_import("json")
 
 
 class UserAPI(HTTPRequester):
@@ -29,22 +56,73 @@ class SettingsAPI(HTTPRequester):
 
     __sub_url = "settings"
 
+    def _download_settings(self, target):
+        url = self._get_url(self.__sub_url, None)
+        return self._request(
+            url, "GET", None, None, partial(download_settings, url, target=target)
+        )
+
     def get_settings(self):
         raw = self._get(url=self.__sub_url)
-        return json.loads(base64.b64decode(raw.encode()).decode())
+        return decode_settings(self._get_url(self.__sub_url, None), raw)
+
+    def export_settings(self, target):
+        """write the (decoded) settings dump to a path or a binary file object
+
+        The dump is decoded while it is received - it is never kept in memory as a
+        whole.  Use a BufferWriter for writing the dump into a preallocated buffer.
+        Returns the SHA-256 digest of the dump.
+        """
+        if isinstance(target, (str, bytes)) or hasattr(target, "__fspath__"):
+            with open(target, "wb") as dump:
+                return self._download_settings(dump)
+        return self._download_settings(target)
+
+    @invalidates()
+    def import_settings(self, source, categories=None):
+        """upload a settings dump from a path or a binary file object (see 'set_settings')
+
+        The dump is not parsed.  It is encoded while it is sent - it is never kept in
+        memory as a whole.
+        """
+        if isinstance(source, (str, bytes)) or hasattr(source, "__fspath__"):
+            with open(source, "rb") as dump:
+                return self.import_settings(dump, categories)
+        position = get_stream_position(source)
+        size = get_remaining_size(source, position)
+        if position is None:
+            encoded = encode_base64_stream(source)
+        else:
+
+            def encoded():
+                # called again for retrying the request
+                source.seek(position)
+                return encode_base64_stream(source)
+
+        return self._put(
+            url=self.__sub_url,
+            params=self._get_category_args(categories),
+            data=StreamingBody(
+                encoded, length=None if size is None else get_base64_size(size)
+            ),
+        )
 
+    @invalidates()
     def reset_settings(self):
         return self._delete(url=self.__sub_url)
 
+    @invalidates()
     def set_settings(self, settings, categories=None):
-        raw = base64.b64encode(json.dumps(settings).encode())
-        if categories is not None:
-            query_args = {
-                "import_category_{}".format(category): "1" for category in categories
-            }
-        else:
-            query_args = None
-        return self._put(url=self.__sub_url, params=query_args, data=raw)
+        raw = _base64.b64encode(_json.dumps(settings).encode())
+        return self._put(
+            url=self.__sub_url, params=self._get_category_args(categories), data=raw
+        )
+
+    @staticmethod
+    def _get_category_args(categories):
+        if categories is None:
+            return None
+        return {"import_category_{}".format(category): "1" for category in categories}
 
     settings_reset = reset_settings
 
@@ -59,25 +137,29 @@ class SystemAPI(HTTPRequester):
     def set_hostname(self, hostname):
         return self.change_system({"hostname": hostname})
 
+    @invalidates()
     def reboot(self):
         return self._post(url=(self.__sub_url, "reboot"))
 
+    @invalidates()
     def factory_reset(self):
         return self._post(url=(self.__sub_url, "factory-reset"))
 
     def get_system(self):
         return self._get(url=self.__sub_url)
 
+    @invalidates("system")
     def change_system(self, data):
         return self._put(url=self.__sub_url, data=data)
 
     def get_system_time(self):
         return self._get(url=(self.__sub_url, "time"))
 
+    @invalidates("system")
     def change_system_time(self, data):
         return self._put(url=(self.__sub_url, "time"), data=data)
 
-    @lru_cache()
+    @cached_response("system")
     def get_system_time_zones(self):
         return self._get(url=(self.__sub_url, "time/zones"))
 
@@ -98,6 +180,7 @@ class FirmwareAPI(HTTPRequester):
     def get_firmware_recovery_information(self):
         return self._get(url=(self.__sub_url, "recovery"))
 
+    @invalidates()
     def upgrade_recovery_image(self):
         return self._post(url=(self.__sub_url, "recovery", "upgrade-from-current"))
 
@@ -105,7 +188,7 @@ class FirmwareAPI(HTTPRequester):
         return self._get(url=(self.__sub_url, "recovery"))["id"]
 
     def get_current_build_id(self):
-        return self._get(url=(self.__sub_url, "status"))["build_id"]
+        return self._get_firmware_status()["build_id"]
 
 
 class NetworkAPI(HTTPRequester):
@@ -189,7 +272,7 @@ class DeviceAPI(HTTPRequester):
 
     __sub_url = "device"
 
-    @lru_cache()
+    @cached_response("device")
     def _get_device_info(self):
         return self._get(url=self.__sub_url)
 
@@ -227,7 +310,7 @@ class CapabilitiesAPI(HTTPRequester):
 
     __sub_url = "sensor/capabilities"
 
-    @lru_cache()
+    @cached_response("capabilities")
     def _get_capabilities(self):
         return self._get(url=self.__sub_url)
 
@@ -263,24 +346,30 @@ class DetectionProfilesAPI(HTTPRequester):
     def get_detection_profiles(self):
         return self._get(url=self.__sub_url)
 
-    def get_current_detection_profile(self):
-        return self._get(url=(self.__sub_url, "current"))
+    def get_current_detection_profile(self, as_model=False):
+        profile = self._get(url=(self.__sub_url, "current"))
+        return DetectionProfile(profile) if as_model else profile
 
-    def get_detection_profile(self, any_id):
-        return self._get(url=(self.__sub_url, str(any_id)))
+    def get_detection_profile(self, any_id, as_model=False):
+        profile = self._get(url=(self.__sub_url, str(any_id)))
+        return DetectionProfile(profile) if as_model else profile
 
     # for backwards compatibility
     get_detection_profile_by_uuid = get_detection_profile
 
+    @invalidates("detection-profile")
     def post_detection_profile(self, data):
         return self._post(url=self.__sub_url, data=data)
 
+    @invalidates("detection-profile")
     def change_detection_profile(self, any_id, data):
         return self._put(url=(self.__sub_url, str(any_id)), data=data)
 
+    @invalidates("detection-profile")
     def delete_detection_profile(self, any_id):
         return self._delete(url=(self.__sub_url, str(any_id)))
 
+    @invalidates("detection-profile")
     def run_autogain(
         self,
         minimum_sample_rate=None,
@@ -304,9 +393,11 @@ class DetectionProfilesAPI(HTTPRequester):
             ] = enable_ambient_light_compensation
         return self._post(url=(self.__sub_url, "current", "autogain"), data=params)
 
+    @invalidates("detection-profile")
     def set_white_reference(self, profile_id="current"):
         self._post(url=(self.__sub_url, profile_id, "white-reference"))
 
+    @invalidates("detection-profile")
     def factory_reset_white_reference(self, profile_id="current"):
         self._delete(url=(self.__sub_url, profile_id, "white-reference"))
 
@@ -319,6 +410,7 @@ class DetectionProfilesAPI(HTTPRequester):
         """
         return self._get(url=(self.__sub_url, profile_id))["normalization_constant"]
 
+    @invalidates("detection-profile")
     def enable_compensation(self, profile_id="current"):
         """Enable the transformation of colorvalues to reduce inter-sensor variability for the
         given profile.
@@ -328,6 +420,7 @@ class DetectionProfilesAPI(HTTPRequester):
         params = {"compensation_settings": {"use_calibration_samples": True}}
         return self._put(url=(self.__sub_url, profile_id), data=params)
 
+    @invalidates("detection-profile")
     def disable_compensation(self, profile_id="current"):
         """Disable the transformation of colorvalues to reduce inter-sensor variability for the
         given profile."""
@@ -340,16 +433,20 @@ class DetectablesAPI(HTTPRequester):
 
     __sub_url = "sensor/detectables"
 
-    def get_detectables(self, profile=None, matcher_id=None):
-        """return all detectables sorted by UUID"""
+    def get_detectables(self, profile=None, matcher_id=None, as_model=False):
+        """return all detectables sorted by UUID
+
+        @param as_model: return a ModelCollection of Detectable models (indexed by UUID
+            and name) instead of a list of dicts
+        """
         params = {}
         if profile is not None:
             params["profile_id"] = profile
         if matcher_id is not None:
             params["matcher_id"] = matcher_id
         detectables = self._get(url=self.__sub_url, params=params)["detectables"]
-        detectables.sort(key=lambda item: item["uuid"])
-        return detectables
+        detectables.sort(key=itemgetter("uuid"))
+        return ModelCollection(detectables, Detectable) if as_model else detectables
 
     def get_detectable(self, any_id, profile=None):
         params = None if profile is None else {"profile_id": profile}
@@ -370,6 +467,32 @@ class DetectablesAPI(HTTPRequester):
             data["profile_id"] = profile
         return self._put(url=(self.__sub_url, str(any_id)), data=data)
 
+    def post_detectables(self, items, profile=None, max_workers=1):
+        """create many detectables and return a MultiResult (keyed by list index)
+
+        The requests are sent over a persistent connection - or in parallel if
+        'max_workers' is larger than one.
+        """
+        return run_bulk(
+            self,
+            (
+                (index, partial(self.post_detectable, profile=profile, data=data))
+                for index, data in enumerate(items)
+            ),
+            max_workers=max_workers,
+        )
+
+    def change_detectables(self, changes, profile=None, max_workers=1):
+        """apply a mapping of detectable IDs to data and return a MultiResult"""
+        return run_bulk(
+            self,
+            (
+                (any_id, partial(self.change_detectable, any_id, data, profile=profile))
+                for any_id, data in changes.items()
+            ),
+            max_workers=max_workers,
+        )
+
     def delete_detectable(self, any_id, profile=None):
         params = {} if profile is None else {"profile_id": profile}
         return self._delete(url=(self.__sub_url, str(any_id)), params=params)
@@ -387,9 +510,14 @@ class EmitterAPI(HTTPRequester):
 
     __sub_url = "sensor/emitters"
 
-    def get_emitters(self, profile=None):
+    def get_emitters(self, profile=None, as_model=False):
         params = None if profile is None else {"profile_id": profile}
-        return self._get(url=self.__sub_url, params=params)
+        emitters = self._get(url=self.__sub_url, params=params)
+        if not as_model:
+            return emitters
+        if isinstance(emitters, dict):
+            emitters = emitters.get("emitters", [])
+        return ModelCollection(emitters, Emitter)
 
     def get_emitter_by_id(self, hid, profile=None):
         params = None if profile is None else {"profile_id": profile}
@@ -406,12 +534,16 @@ class MatcherAPI(HTTPRequester):
 
     __sub_url = "sensor/matchers"
 
-    def get_matchers(self, profile=None):
-        """return all matchers sorted by UUID"""
+    def get_matchers(self, profile=None, as_model=False):
+        """return all matchers sorted by UUID
+
+        @param as_model: return a ModelCollection of Matcher models (indexed by UUID and
+            name) instead of a list of dicts
+        """
         params = None if profile is None else {"profile_id": profile}
         matchers = self._get(url=self.__sub_url, params=params)["matchers"]
-        matchers.sort(key=lambda item: item["uuid"])
-        return matchers
+        matchers.sort(key=itemgetter("uuid"))
+        return ModelCollection(matchers, Matcher) if as_model else matchers
 
     def get_matcher(self, any_id, profile=None):
         params = None if profile is None else {"profile_id": profile}
@@ -432,6 +564,32 @@ class MatcherAPI(HTTPRequester):
             data["profile_id"] = profile
         return self._put(url=(self.__sub_url, str(any_id)), data=data)
 
+    def post_matchers(self, items, profile=None, max_workers=1):
+        """create many matchers and return a MultiResult (keyed by list index)
+
+        The requests are sent over a persistent connection - or in parallel if
+        'max_workers' is larger than one.
+        """
+        return run_bulk(
+            self,
+            (
+                (index, partial(self.post_matcher, profile=profile, data=data))
+                for index, data in enumerate(items)
+            ),
+            max_workers=max_workers,
+        )
+
+    def change_matchers(self, changes, profile=None, max_workers=1):
+        """apply a mapping of matcher IDs to data and return a MultiResult"""
+        return run_bulk(
+            self,
+            (
+                (any_id, partial(self.change_matcher, any_id, data, profile=profile))
+                for any_id, data in changes.items()
+            ),
+            max_workers=max_workers,
+        )
+
     def delete_matcher(self, any_id, profile=None):
         params = {} if profile is None else {"profile_id": profile}
         return self._delete(url=(self.__sub_url, str(any_id)), params=params)
@@ -443,6 +601,17 @@ class MatcherAPI(HTTPRequester):
         data = {"output_pattern": {"states": pattern}}
         return self._put(url=(self.__sub_url, str(any_id)), data=data)
 
+    def apply_output_patterns(self, patterns, max_workers=1):
+        """set the output patterns of a mapping of matcher IDs and return a MultiResult"""
+        return run_bulk(
+            self,
+            (
+                (any_id, partial(self.set_matcher_output_pattern, any_id, pattern))
+                for any_id, pattern in patterns.items()
+            ),
+            max_workers=max_workers,
+        )
+
     def get_matcher_output_pattern(self, any_id):
         return self._get(url=(self.__sub_url, str(any_id)))
 
@@ -466,10 +635,20 @@ class SamplesAPI(HTTPRequester):
 
     __sub_url = "sensor/samples"
 
-    def get_current_sample(self):
-        return self._get(url=(self.__sub_url, "current"))
+    def get_current_sample(self, as_model=False):
+        sample = self._get(url=(self.__sub_url, "current"))
+        return Sample(sample) if as_model else sample
+
+    def get_sample_stream(
+        self, count=None, format=None, delimiter=None, buffer_size=None
+    ):
+        """stream samples from the device
 
-    def get_sample_stream(self, count=None, format=None, delimiter=None):
+        By default the stream is parsed line by line.  If 'buffer_size' is given, the
+        stream is read in blocks of this size and split into records by the delimiter.
+        This is considerably faster for high sample rates.  Records sent as CSV or plain
+        text are returned as lists of values.
+        """
         params = dict(stream=1)
         if count:
             params["stream_count"] = count
@@ -477,9 +656,52 @@ class SamplesAPI(HTTPRequester):
             params["format"] = format
         if delimiter:
             params["delimiter"] = delimiter
-        yield from self._get(
-            url=self.__sub_url, params=params, handler=self._stream_response
+        if buffer_size:
+            handler = partial(
+                self._stream_records, delimiter=delimiter, buffer_size=buffer_size
+            )
+        else:
+            handler = self._stream_response
+        yield from self._get(url=self.__sub_url, params=params, handler=handler)
+
+    def get_sample_reader(
+        self, capacity=10000, policy="drop-oldest", count=None, **kwargs
+    ):
+        """read the sample stream in the background (see SampleStreamReader)
+
+        The reader is already started.  Further keyword arguments are passed on to the
+        SampleStreamReader or to 'get_sample_stream'.
+        """
+        reader = SampleStreamReader(
+            self, capacity=capacity, policy=policy, count=count, **kwargs
+        )
+        reader.start()
+        return reader
+
+    def iter_sample_batches(
+        self,
+        batch_size=1024,
+        count=None,
+        format=None,
+        delimiter=None,
+        fields=get_sample_fields,
+        reuse=False,
+        buffer_size=64 * 1024,
+    ):
+        """stream samples from the device collected in columnar blocks (SampleBatch)
+
+        Timestamps, channel values and matched detectable IDs are stored in preallocated
+        arrays (see 'SampleBatch.as_numpy' for NumPy views).
+
+        @param fields: function returning timestamp, channel values and matched IDs of a
+            sample (see 'urwerk_api_client.batches.get_sample_fields')
+        @param reuse: refill the buffers of the previous batch instead of allocating new
+            ones.  A batch must not be used anymore after requesting the next one.
+        """
+        samples = self.get_sample_stream(
+            count=count, format=format, delimiter=delimiter, buffer_size=buffer_size
         )
+        yield from iter_batches(samples, batch_size, fields=fields, reuse=reuse)
 
 
 class ColorspacesAPI(HTTPRequester):
@@ -494,7 +716,7 @@ class ColorspacesAPI(HTTPRequester):
             "current", {"colorspace": {"space_id": colorspace_id}}
         )
 
-    @lru_cache()
+    @cached_response("colorspaces")
     def get_colorspaces(self):
         return self._get(url=self.__sub_url)["colorspaces"]
 
@@ -528,12 +750,14 @@ class DefaultsAPI(HTTPRequester):
                     if test(obj):
                         return obj
 
-        return _find(
-            self.get_defaults,
-            self.get_factory_defaults,
-            test=lambda d, o=object_type, k=key: d["object_type"] == o
-            and d["key"] == k,
-        )
+        # both collections are part of the same resource
+        with self.snapshot():
+            return _find(
+                self.get_defaults,
+                self.get_factory_defaults,
+                test=lambda d, o=object_type, k=key: d["object_type"] == o
+                and d["key"] == k,
+            )
 
 
 class ColorsensorAPI(
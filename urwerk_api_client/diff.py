@@ -0,0 +1,41 @@
+"""structural comparison of API resources (nested dicts and lists)"""
+
+# marks values which are missing on one side of a difference
+MISSING = type("Missing", (), {"__repr__": lambda self: "MISSING"})()
+
+
+def iter_differences(old, new, path=()):
+    """yield (path, old_value, new_value) for every difference between two structures
+
+    Dicts are compared key by key (a missing key is reported with the value MISSING),
+    all other values (including lists) are compared as a whole.  The path is a tuple of
+    dict keys.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                yield path + (key,), old[key], MISSING
+            else:
+                yield from iter_differences(old[key], new[key], path + (key,))
+        for key in new:
+            if key not in old:
+                yield path + (key,), MISSING, new[key]
+    elif old != new:
+        yield path, old, new
+
+
+def get_changes(current, desired):
+    """return the parts of 'desired' which differ from 'current'
+
+    In contrast to 'iter_differences' only the keys contained in 'desired' matter (keys
+    which are only present in 'current' are ignored).  The result may be sent as a
+    partial update.  MISSING is returned if nothing changed.
+    """
+    if isinstance(current, dict) and isinstance(desired, dict):
+        changes = {}
+        for key, value in desired.items():
+            change = get_changes(current[key], value) if key in current else value
+            if change is not MISSING:
+                changes[key] = change
+        return changes if changes else MISSING
+    return MISSING if current == desired else desired
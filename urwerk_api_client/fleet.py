@@ -0,0 +1,157 @@
+"""run the same API operation on many devices in parallel"""
+
+import collections
+import concurrent.futures
+import functools
+import threading
+import time
+from urllib.parse import urlsplit
+
+from urwerk_api_client import CircuitBreaker, ConnectionPool
+from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.results import MultiResult
+
+# the default time (in seconds) granted to every device
+DEFAULT_TIMEOUT = 30
+
+
+class FleetTimeoutError(TimeoutError):
+    """raised (and reported) in case a device did not respond in time"""
+
+
+class Fleet:
+    """a group of devices which is operated in parallel
+
+    Any method of the client class can be called on the fleet.  It is executed for all
+    members concurrently and a MultiResult (mapped by host) is returned:
+
+        fleet = Fleet(["http://sensor1/api", "http://sensor2/api"], max_workers=4)
+        versions = fleet.get_firmware_version()
+        fleet.change_detection_profile("current", {...}, timeout=10)
+
+    Keyword arguments not listed below are passed on to the client class.  Unless
+    specified otherwise, all clients share a connection pool and a circuit breaker (thus
+    devices which are known to be down fail fast) and use the fleet timeout for their
+    requests.
+
+    A device which did not respond in time is reported as FleetTimeoutError.  Its
+    request cannot be interrupted, though: the worker thread stays busy until the
+    client timeout ends the request.  Thus the fleet timeout should not be disabled.
+
+    @param api_urls: the API URLs of all members (one per host)
+    @param client_class: the API client used for every member
+    @param max_workers: the maximum number of concurrent requests
+    @param timeout: the default timeout (in seconds) for every device (None waits
+        forever)
+    """
+
+    def __init__(
+        self,
+        api_urls,
+        client_class=ColorsensorAPI,
+        max_workers=8,
+        timeout=DEFAULT_TIMEOUT,
+        **client_kwargs
+    ):
+        self.timeout = timeout
+        self._own_pool = None
+        if "connection_pool" not in client_kwargs:
+            self._own_pool = ConnectionPool(max_idle=2, timeout=timeout)
+            client_kwargs["connection_pool"] = self._own_pool
+        client_kwargs.setdefault("timeout", timeout)
+        client_kwargs.setdefault("circuit_breaker", CircuitBreaker())
+        self.clients = collections.OrderedDict()
+        for api_url in api_urls:
+            host = urlsplit(api_url).netloc
+            if host in self.clients:
+                raise ValueError("Duplicate fleet member: {}".format(host))
+            self.clients[host] = client_class(api_url, **client_kwargs)
+        self._client_class = client_class
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not callable(
+            getattr(self._client_class, name, None)
+        ):
+            raise AttributeError(name)
+        return functools.partial(self.call, name)
+
+    @property
+    def hosts(self):
+        return list(self.clients)
+
+    def call(self, operation, *args, timeout=None, **kwargs):
+        """execute an operation on all members of the fleet
+
+        @param operation: the name of a client method or a callable which is called with
+            the client as its first argument
+        @param timeout: the time (in seconds) granted to every device, starting when its
+            request is issued (overrides the default timeout of the fleet)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        started = {}
+        lock = threading.Lock()
+
+        def run(host, client):
+            with lock:
+                started[host] = time.monotonic()
+            if callable(operation):
+                return operation(client, *args, **kwargs)
+            else:
+                return getattr(client, operation)(*args, **kwargs)
+
+        pending = {
+            self._executor.submit(run, host, client): host
+            for host, client in self.clients.items()
+        }
+        outcome = {}
+        while pending:
+            wait_time = None
+            if timeout is not None:
+                with lock:
+                    start_times = [started[h] for h in pending.values() if h in started]
+                if start_times:
+                    wait_time = max(0, min(start_times) + timeout - time.monotonic())
+                else:
+                    wait_time = timeout
+            done, _ = concurrent.futures.wait(
+                pending,
+                timeout=wait_time,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                host = pending.pop(future)
+                try:
+                    outcome[host] = (True, future.result())
+                except Exception as exc:
+                    outcome[host] = (False, exc)
+            if timeout is not None:
+                now = time.monotonic()
+                for future, host in list(pending.items()):
+                    with lock:
+                        start_time = started.get(host)
+                    if start_time is not None and now - start_time >= timeout:
+                        # the worker thread cannot be interrupted - we just stop waiting
+                        del pending[future]
+                        outcome[host] = (
+                            False,
+                            FleetTimeoutError(
+                                "Device did not respond within {} seconds: {}".format(
+                                    timeout, host
+                                )
+                            ),
+                        )
+        return MultiResult.from_outcome(self.clients, outcome)
+
+    def close(self):
+        """stop accepting operations and close idle connections"""
+        self._executor.shutdown(wait=False)
+        if self._own_pool is not None:
+            self._own_pool.close()
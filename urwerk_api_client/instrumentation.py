@@ -0,0 +1,343 @@
+"""observe the timing and the size of API requests
+
+Listeners are attached to an Instrumentation (see 'HTTPRequester.instrumentation').
+Without listeners requests are not measured at all.
+"""
+
+import bisect
+import collections
+import math
+import threading
+import time
+
+from urwerk_api_client.lazy import lazy_import
+
+# only needed as soon as requests are measured
+_re = lazy_import("re")
+_urllib_parse = lazy_import("urllib.parse")
+
+# numeric IDs and UUIDs
+_ID_SEGMENT_PATTERN = (
+    r"^(\d+"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+)
+
+
+def get_url_template(url, root_url=""):
+    """return the path of an URL relative to the API root with IDs replaced by "{id}"
+
+    example: "http://host/api/sensor/detectables/7?profile_id=2"
+        -> "sensor/detectables/{id}"
+    """
+    if root_url and url.startswith(root_url):
+        url = url[len(root_url) :]
+    path = _urllib_parse.urlsplit(url).path.strip("/")
+    # the compiled pattern is cached by the re module
+    return "/".join(
+        "{id}" if _re.match(_ID_SEGMENT_PATTERN, segment) else segment
+        for segment in path.split("/")
+    )
+
+
+class RequestEvent:
+    """measurements of a single request
+
+    All times are given in seconds and measured from the start of the request:
+        connect_time: establishing a new connection (only measured for pooled
+            connections - otherwise it is part of 'first_byte_time')
+        first_byte_time: until the status and the headers of the response arrived
+        read_time: reading the body (for streams: until the stream was consumed)
+        decode_time: parsing JSON responses and JSON records of streams (part of
+            'read_time', delimited records are parsed while they are read)
+    'bytes_received' is the size of the response body read so far.
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "url_template",
+        "status",
+        "bytes_sent",
+        "bytes_received",
+        "connect_time",
+        "first_byte_time",
+        "read_time",
+        "decode_time",
+        "total_time",
+        "error",
+        "_instrumentation",
+        "_started",
+        "_first_byte",
+    )
+
+    def __init__(self, instrumentation, method, url, url_template, bytes_sent=0):
+        self._instrumentation = instrumentation
+        self.method = method
+        self.url = url
+        self.url_template = url_template
+        self.status = None
+        self.bytes_sent = bytes_sent
+        self.bytes_received = 0
+        self.connect_time = None
+        self.first_byte_time = None
+        self.read_time = None
+        self.decode_time = 0.0
+        self.total_time = None
+        self.error = None
+        self._started = time.perf_counter()
+        self._first_byte = None
+
+    def __repr__(self):
+        return "<RequestEvent {} {} status={} total={:.6f}s>".format(
+            self.method, self.url_template, self.status, self.total_time or 0.0
+        )
+
+    def set_response(self, status):
+        self._first_byte = time.perf_counter()
+        self.first_byte_time = self._first_byte - self._started
+        self.status = status
+
+    def finish(self, error=None):
+        now = time.perf_counter()
+        self.total_time = now - self._started
+        if self._first_byte is not None:
+            self.read_time = now - self._first_byte
+        if error is not None:
+            self.error = error
+            if self.status is None:
+                self.status = getattr(error, "status_code", None)
+        self._instrumentation.emit(self)
+
+
+class TracedResponse:
+    """count the bytes read from a response"""
+
+    def __init__(self, response, trace):
+        self._response = response
+        self._trace = trace
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def _count(self, data):
+        self._trace.bytes_received += len(data)
+        return data
+
+    def read(self, *args):
+        return self._count(self._response.read(*args))
+
+    def read1(self, *args):
+        return self._count(self._response.read1(*args))
+
+    def readline(self, *args):
+        return self._count(self._response.readline(*args))
+
+    def readinto(self, buffer):
+        count = self._response.readinto(buffer)
+        self._trace.bytes_received += count
+        return count
+
+
+class Instrumentation:
+    """dispatch RequestEvents to listeners (callables accepting a RequestEvent)
+
+    A single instrumentation may be shared by many clients.  Listeners are called in the
+    thread of the request and should return quickly.
+    """
+
+    def __init__(self):
+        self._listeners = []
+
+    def __bool__(self):
+        return bool(self._listeners)
+
+    def add_listener(self, listener):
+        self._listeners = self._listeners + [listener]
+        return listener
+
+    def remove_listener(self, listener):
+        self._listeners = [item for item in self._listeners if item is not listener]
+
+    def start_request(self, method, url, url_template, bytes_sent=0):
+        return RequestEvent(self, method, url, url_template, bytes_sent=bytes_sent)
+
+    def emit(self, event):
+        for listener in self._listeners:
+            listener(event)
+
+
+class LatencyHistogram:
+    """histogram with logarithmic buckets (about 9% relative resolution)
+
+    Recording a value is cheap (a bisection); percentiles are estimated from the
+    buckets.
+    """
+
+    BUCKET_BOUNDS = tuple(1e-5 * 2 ** (index / 8) for index in range(8 * 24))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def get_percentile(self, percent):
+        """estimate the value below which the given percentage of values lies"""
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                upper = (
+                    self.BUCKET_BOUNDS[index]
+                    if index < len(self.BUCKET_BOUNDS)
+                    else self.max
+                )
+                return max(self.min, min(upper, self.max))
+        return self.max
+
+    def to_dict(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count,
+            "p50": self.get_percentile(50),
+            "p90": self.get_percentile(90),
+            "p99": self.get_percentile(99),
+        }
+
+
+class HistogramAggregator:
+    """collect latency histograms and traffic counters per method and URL template
+
+    Use it as a listener of an Instrumentation:
+
+        aggregator = client.instrumentation.add_listener(HistogramAggregator())
+        ...
+        print(aggregator.dump())
+    """
+
+    PHASES = ("total", "connect", "first_byte", "read", "decode")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = collections.OrderedDict()
+
+    def __call__(self, event):
+        key = (event.method, event.url_template)
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = {
+                    "histograms": {phase: LatencyHistogram() for phase in self.PHASES},
+                    "statuses": collections.Counter(),
+                    "errors": 0,
+                    "bytes_sent": 0,
+                    "bytes_received": 0,
+                }
+            histograms = endpoint["histograms"]
+            for phase, value in (
+                ("total", event.total_time),
+                ("connect", event.connect_time),
+                ("first_byte", event.first_byte_time),
+                ("read", event.read_time),
+                ("decode", event.decode_time),
+            ):
+                if value is not None:
+                    histograms[phase].record(value)
+            endpoint["statuses"][event.status] += 1
+            if event.error is not None:
+                endpoint["errors"] += 1
+            endpoint["bytes_sent"] += event.bytes_sent
+            endpoint["bytes_received"] += event.bytes_received
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def dump(self):
+        """return all measurements as a JSON serializable list"""
+        with self._lock:
+            return [
+                {
+                    "method": method,
+                    "url_template": url_template,
+                    "statuses": {
+                        str(status): count
+                        for status, count in endpoint["statuses"].items()
+                    },
+                    "errors": endpoint["errors"],
+                    "bytes_sent": endpoint["bytes_sent"],
+                    "bytes_received": endpoint["bytes_received"],
+                    "latency": {
+                        phase: histogram.to_dict()
+                        for phase, histogram in endpoint["histograms"].items()
+                    },
+                }
+                for (method, url_template), endpoint in self._endpoints.items()
+            ]
+
+    def to_prometheus(self, prefix="urwerk_api_request"):
+        """return the measurements in the Prometheus text exposition format"""
+        lines = ["# TYPE {}_seconds histogram".format(prefix)]
+        with self._lock:
+            endpoints = [
+                ('method="{}",endpoint="{}"'.format(method, url_template), endpoint)
+                for (method, url_template), endpoint in self._endpoints.items()
+            ]
+            for labels, endpoint in endpoints:
+                histogram = endpoint["histograms"]["total"]
+                cumulative = 0
+                for bound, count in zip(histogram.BUCKET_BOUNDS, histogram.counts):
+                    cumulative += count
+                    if count:
+                        lines.append(
+                            '{}_seconds_bucket{{{},le="{:.6g}"}} {}'.format(
+                                prefix, labels, bound, cumulative
+                            )
+                        )
+                lines.append(
+                    '{}_seconds_bucket{{{},le="+Inf"}} {}'.format(
+                        prefix, labels, histogram.count
+                    )
+                )
+                lines.append(
+                    "{}_seconds_sum{{{}}} {}".format(prefix, labels, histogram.sum)
+                )
+                lines.append(
+                    "{}_seconds_count{{{}}} {}".format(prefix, labels, histogram.count)
+                )
+            for name in ("bytes_sent", "bytes_received", "errors"):
+                lines.append("# TYPE {}_{}_total counter".format(prefix, name))
+                for labels, endpoint in endpoints:
+                    lines.append(
+                        "{}_{}_total{{{}}} {}".format(
+                            prefix, name, labels, endpoint[name]
+                        )
+                    )
+        return "\n".join(lines) + "\n"
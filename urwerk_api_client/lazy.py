@@ -0,0 +1,36 @@
+"""defer the import of modules until they are used
+
+Short-lived scripts often need only a small part of the client.  Modules which are slow
+to import (e.g. http.client) are therefore loaded on first attribute access:
+
+    http_client = lazy_import("http.client")
+"""
+
+import sys
+
+
+class LazyModule:
+    """a placeholder importing the module as soon as any of its attributes is accessed
+
+    Attributes are copied to the placeholder on first access: later accesses are as fast
+    as for the module itself.  The import is thread-safe (see 'importlib.import_module').
+    """
+
+    def __init__(self, name):
+        self.__name__ = name
+
+    def __repr__(self):
+        return "<LazyModule {!r}>".format(self.__name__)
+
+    def __getattr__(self, attribute):
+        import importlib
+
+        value = getattr(importlib.import_module(self.__name__), attribute)
+        setattr(self, attribute, value)
+        return value
+
+
+def lazy_import(name):
+    """return a LazyModule (or the module itself if it was imported before)"""
+    module = sys.modules.get(name)
+    return LazyModule(name) if module is None else module
@@ -0,0 +1,194 @@
+"""lightweight typed views of API responses
+
+Models wrap the parsed JSON of a response without copying it.  Simple fields are read
+from the underlying dict on access, nested fields are turned into models on first access
+(and cached).  The raw data is available via 'to_dict' (it must not be modified).
+"""
+
+
+class Field:
+    """a field of a model backed by a key of the response
+
+    @param key: the key within the response (default: the attribute name)
+    @param model: a Model class for nested objects (lists are turned into collections)
+    """
+
+    __slots__ = ("name", "key", "model")
+
+    def __init__(self, key=None, model=None):
+        self.name = None
+        self.key = key
+        self.model = model
+
+    def __set_name__(self, owner, name):
+        # python3.5 does not call this automatically (see _ModelType)
+        self.name = name
+        if self.key is None:
+            self.key = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance._data.get(self.key)
+        if self.model is None or value is None:
+            return value
+        parsed = instance._parsed
+        if parsed is None:
+            parsed = instance._parsed = {}
+        elif self.name in parsed:
+            return parsed[self.name]
+        if isinstance(value, list):
+            value = ModelCollection(value, self.model)
+        else:
+            value = self.model(value)
+        parsed[self.name] = value
+        return value
+
+
+class _ModelType(type):
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        for attribute, value in namespace.items():
+            if isinstance(value, Field) and value.name is None:
+                value.__set_name__(cls, attribute)
+
+
+class Model(metaclass=_ModelType):
+    """base class of all models"""
+
+    __slots__ = ("_data", "_parsed")
+
+    def __init__(self, data):
+        self._data = data
+        self._parsed = None
+
+    def __repr__(self):
+        return "<{} {}>".format(
+            type(self).__name__, self._data.get("uuid", self._data.get("name", ""))
+        )
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._data == other._data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def to_dict(self):
+        return self._data
+
+
+class ModelCollection:
+    """a sequence of models indexed by UUID and name
+
+    The models are created on first access.  The indexes are built on first lookup.
+    """
+
+    __slots__ = ("_items", "_model", "_models", "_by_uuid", "_by_name")
+
+    def __init__(self, items, model):
+        self._items = items
+        self._model = model
+        self._models = [None] * len(items)
+        self._by_uuid = None
+        self._by_name = None
+
+    def __repr__(self):
+        return "<ModelCollection {} items={}>".format(
+            self._model.__name__, len(self._items)
+        )
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        model = self._models[index]
+        if model is None:
+            model = self._models[index] = self._model(self._items[index])
+        return model
+
+    def __iter__(self):
+        for index in range(len(self._items)):
+            yield self[index]
+
+    def __contains__(self, uuid):
+        return uuid in self._get_uuid_index()
+
+    def _get_uuid_index(self):
+        if self._by_uuid is None:
+            self._by_uuid = {
+                item.get("uuid"): index for index, item in enumerate(self._items)
+            }
+        return self._by_uuid
+
+    def get(self, uuid, default=None):
+        """return the model with the given UUID"""
+        index = self._get_uuid_index().get(uuid)
+        return default if index is None else self[index]
+
+    def get_by_name(self, name, default=None):
+        """return the (first) model with the given name"""
+        if self._by_name is None:
+            by_name = {}
+            for index, item in enumerate(self._items):
+                by_name.setdefault(item.get("name"), index)
+            self._by_name = by_name
+        index = self._by_name.get(name)
+        return default if index is None else self[index]
+
+    def to_list(self):
+        return self._items
+
+
+class OutputPattern(Model):
+    __slots__ = ()
+
+    states = Field()
+
+
+class Matcher(Model):
+    __slots__ = ()
+
+    uuid = Field()
+    name = Field()
+    output_pattern = Field(model=OutputPattern)
+
+
+class Detectable(Model):
+    __slots__ = ()
+
+    uuid = Field()
+    name = Field()
+    matcher_id = Field()
+
+
+class Emitter(Model):
+    __slots__ = ()
+
+    id = Field()
+    name = Field()
+
+
+class DetectionProfile(Model):
+    __slots__ = ()
+
+    uuid = Field()
+    name = Field()
+    emitters = Field(model=Emitter)
+
+
+class Sample(Model):
+    """a sample (see 'SamplesAPI') - the field names match 'get_sample_fields'"""
+
+    __slots__ = ()
+
+    timestamp = Field()
+    color = Field()
+    matches = Field()
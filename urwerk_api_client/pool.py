@@ -0,0 +1,170 @@
+import collections
+import io
+import threading
+import time
+
+from urwerk_api_client.lazy import lazy_import
+from urwerk_api_client.streaming import rewind_body
+
+# slow to import: loaded with the first connection
+_http_client = lazy_import("http.client")
+_socket = lazy_import("socket")
+_urllib_error = lazy_import("urllib.error")
+_urllib_parse = lazy_import("urllib.parse")
+
+
+class ConnectionPool:
+    """keep HTTP/1.1 connections alive and reuse them for subsequent requests
+
+    Idle connections are kept separately for every host.  A single pool may be shared
+    by any number of API clients (and threads).
+
+    The pool does not limit the number of connections in use at the same time; it only
+    limits how many of them are kept open for reuse once their responses were consumed.
+
+    @param max_idle: maximum number of idle connections kept per host
+    @param idle_timeout: idle connections older than this (in seconds) are discarded
+    @param timeout: socket timeout (in seconds) used for new connections
+    """
+
+    def __init__(self, max_idle=4, idle_timeout=30.0, timeout=None):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.defaultdict(collections.deque)
+        self._leased = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _get_key(url):
+        parts = _urllib_parse.urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = "{}?{}".format(target, parts.query)
+        return (parts.scheme, parts.hostname, parts.port), target
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        kwargs = {} if self.timeout is None else {"timeout": self.timeout}
+        if scheme == "https":
+            return _http_client.HTTPSConnection(host, port, **kwargs)
+        elif scheme == "http":
+            return _http_client.HTTPConnection(host, port, **kwargs)
+        else:
+            raise _urllib_error.URLError("unsupported URL scheme: {}".format(scheme))
+
+    def _acquire(self, key):
+        """return an idle connection (if available) or a new one
+
+        The second item of the result indicates whether the connection was reused.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle[key]
+            # the oldest connections are on the left side
+            while idle and (now - idle[0][1] > self.idle_timeout):
+                idle.popleft()[0].close()
+            if idle:
+                return idle.pop()[0], True
+        return self._new_connection(key), False
+
+    def _release(self, key, conn, response):
+        # a connection can only be reused after its previous response was consumed
+        if response.isclosed() and conn.sock is not None:
+            with self._lock:
+                idle = self._idle[key]
+                if len(idle) < self.max_idle:
+                    idle.append((conn, time.monotonic()))
+                    return
+        response.close()
+        conn.close()
+
+    def release(self, response):
+        """hand back the connection used for the given response
+
+        Connections with unread response data are closed instead of being reused.
+        """
+        with self._lock:
+            lease = self._leased.pop(response, None)
+        if lease is None:
+            response.close()
+        else:
+            self._release(lease[0], lease[1], response)
+
+    def urlopen(self, url, method, data=None, headers=None, timeout=None, trace=None):
+        """send a request via a pooled connection
+
+        The behaviour mimics 'urllib.request.urlopen': HTTP error status codes are raised
+        as 'urllib.error.HTTPError' and connection problems as 'urllib.error.URLError'.
+        The response should be handed back via 'release' as soon as it was consumed.
+
+        @param timeout: a Timeout overriding the default timeout of the pool
+        @param trace: a RequestEvent receiving the time needed for connecting
+        """
+        key, target = self._get_key(url)
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                if conn.sock is None:
+                    if timeout is not None and timeout.connect is not None:
+                        conn.timeout = timeout.connect
+                    if trace is None:
+                        conn.connect()
+                    else:
+                        started = time.perf_counter()
+                        conn.connect()
+                        trace.connect_time = time.perf_counter() - started
+                # reused connections may still carry the timeout of a previous request
+                if timeout is not None and timeout.read is not None:
+                    conn.sock.settimeout(timeout.read)
+                elif self.timeout is not None:
+                    conn.sock.settimeout(self.timeout)
+                else:
+                    conn.sock.settimeout(_socket.getdefaulttimeout())
+                headers = headers or {}
+                if headers.get("Transfer-Encoding") == "chunked":
+                    # a streamed body of unknown size (requires python3.6)
+                    conn.request(
+                        method, target, body=data, headers=headers, encode_chunked=True
+                    )
+                else:
+                    conn.request(method, target, body=data, headers=headers)
+                response = conn.getresponse()
+            except (ConnectionResetError, BrokenPipeError) as exc:
+                conn.close()
+                if reused and rewind_body(data):
+                    # the server closed the idle connection in the meantime
+                    continue
+                raise _urllib_error.URLError(exc) from exc
+            except (OSError, _http_client.HTTPException) as exc:
+                conn.close()
+                raise _urllib_error.URLError(exc) from exc
+            else:
+                break
+        if response.status >= 400:
+            error_body = response.read()
+            self._release(key, conn, response)
+            raise _urllib_error.HTTPError(
+                url,
+                response.status,
+                response.reason,
+                response.headers,
+                io.BytesIO(error_body),
+            )
+        with self._lock:
+            self._leased[response] = (key, conn)
+        return response
+
+    def close(self):
+        """close all idle connections"""
+        with self._lock:
+            for idle in self._idle.values():
+                while idle:
+                    idle.pop()[0].close()
+            self._idle.clear()
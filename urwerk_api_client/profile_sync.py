@@ -0,0 +1,330 @@
+"""bring a detection profile in line with a declarative specification
+
+    sync = ProfileSync(client, profile="current")
+    plan = sync.run(
+        {
+            "profile": {"name": "Recipe 7"},
+            "emitters": {"1": {"brightness": 80}},
+            "matchers": [{"name": "good", "output_pattern": {"states": [1, 0]}}],
+            "detectables": [{"name": "red", "matcher_id": "good", "color": ...}],
+        },
+        dry_run=True,
+    )
+    print(plan.format())
+
+Matchers and detectables are identified by a key (by default their "name").  A matcher
+reference of a detectable may either be an UUID or the key of a matcher within the
+specification.  Only the fields given in the specification are compared and sent.
+"""
+
+from functools import partial
+
+from urwerk_api_client.bulk import run_bulk
+from urwerk_api_client.diff import get_changes, MISSING
+
+
+class SyncAction:
+    """a single request of a sync plan
+
+    @param kind: "change", "create" or "delete"
+    @param resource: "profile", "emitter", "matcher" or "detectable"
+    @param key: the key of the item within the specification (or its UUID if unknown)
+    @param uuid: the ID of the existing item (None for items to be created)
+    @param data: the data to be sent
+    """
+
+    __slots__ = ("kind", "resource", "key", "uuid", "data", "state", "result", "error")
+
+    def __init__(self, kind, resource, key, uuid=None, data=None):
+        self.kind = kind
+        self.resource = resource
+        self.key = key
+        self.uuid = uuid
+        self.data = data
+        # "pending", "done", "failed" or "skipped"
+        self.state = "pending"
+        self.result = None
+        self.error = None
+
+    def __repr__(self):
+        return "<SyncAction {} {} {!r} {}>".format(
+            self.kind, self.resource, self.key, self.state
+        )
+
+    def format(self):
+        text = "{} {} {!r}".format(self.kind, self.resource, self.key)
+        if self.data is not None:
+            text += ": {}".format(self.data)
+        if self.error is not None:
+            text += " -> {}".format(self.error)
+        return text
+
+
+class SyncPlan:
+    """the ordered stages of actions needed for reaching the desired state
+
+    The actions within a stage are independent of each other (and may run in parallel).
+    """
+
+    STAGES = (
+        ("change", "profile"),
+        ("change", "emitter"),
+        ("create", "matcher"),
+        ("change", "matcher"),
+        ("delete", "detectable"),
+        ("create", "detectable"),
+        ("change", "detectable"),
+        ("delete", "matcher"),
+    )
+
+    def __init__(self, actions):
+        order = {stage: index for index, stage in enumerate(self.STAGES)}
+        self.actions = sorted(
+            actions, key=lambda action: order[(action.kind, action.resource)]
+        )
+
+    def __repr__(self):
+        return "<SyncPlan actions={}>".format(len(self.actions))
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def get_stages(self):
+        """return the actions grouped by stage (in order of execution)"""
+        stages = []
+        for stage in self.STAGES:
+            actions = [a for a in self.actions if (a.kind, a.resource) == stage]
+            if actions:
+                stages.append(actions)
+        return stages
+
+    @property
+    def ok(self):
+        return all(action.state in ("pending", "done") for action in self.actions)
+
+    @property
+    def errors(self):
+        return [action for action in self.actions if action.state == "failed"]
+
+    def raise_for_errors(self):
+        """raise the first error of the sync (if any)"""
+        for action in self.errors:
+            raise action.error
+
+    def format(self):
+        """return a human readable description of the plan (one action per line)"""
+        return "\n".join(
+            "[{}] {}".format(action.state, action.format()) for action in self.actions
+        )
+
+
+class ProfileSync:
+    """apply a specification to a detection profile with a minimal number of requests
+
+    The current state is fetched once.  Afterwards only changed items are sent: first
+    the profile and the emitters, then new or changed matchers, then the detectables
+    (which may refer to matchers) and finally obsolete matchers are removed.  The
+    requests of every stage are sent in parallel.  The sync stops after a stage with
+    failed requests (the remaining actions are marked as "skipped").
+
+    @param client: an API client providing the profile, emitter, matcher and detectable
+        methods (e.g. ColorsensorAPI)
+    @param profile: the ID of the detection profile (None: the current profile)
+    @param key: the field identifying matchers and detectables in the specification
+    @param emitter_key: the field identifying emitters
+    @param matcher_field: the field of a detectable referring to its matcher
+    @param prune: delete matchers and detectables which are not specified
+    @param max_workers: the number of parallel requests within a stage
+    """
+
+    def __init__(
+        self,
+        client,
+        profile=None,
+        key="name",
+        emitter_key="id",
+        matcher_field="matcher_id",
+        prune=True,
+        max_workers=4,
+    ):
+        self.client = client
+        self.profile = profile
+        self.key = key
+        self.emitter_key = emitter_key
+        self.matcher_field = matcher_field
+        self.prune = prune
+        self.max_workers = max_workers
+
+    def fetch_state(self):
+        """return the current state in the structure of a specification"""
+        client = self.client
+        profile_id = "current" if self.profile is None else self.profile
+        with client.keep_alive():
+            emitters = client.get_emitters(profile=self.profile)
+            if isinstance(emitters, dict):
+                emitters = emitters.get("emitters", [])
+            return {
+                "profile": client.get_detection_profile(profile_id),
+                "emitters": {
+                    str(emitter[self.emitter_key]): emitter for emitter in emitters
+                },
+                "matchers": client.get_matchers(profile=self.profile),
+                "detectables": client.get_detectables(profile=self.profile),
+            }
+
+    def _get_items(self, items, resource):
+        result = {}
+        for item in items:
+            key = item.get(self.key, item.get("uuid"))
+            if key in result:
+                raise ValueError("Duplicate {} key: {}".format(resource, key))
+            result[key] = item
+        return result
+
+    def _diff_items(self, resource, current, desired, references=None):
+        actions = []
+        for key, item in desired.items():
+            if references and self.matcher_field in item:
+                item = dict(item)
+                item[self.matcher_field] = references.get(
+                    item[self.matcher_field], item[self.matcher_field]
+                )
+            existing = current.get(key)
+            if existing is None:
+                actions.append(SyncAction("create", resource, key, data=item))
+            else:
+                changes = get_changes(existing, item)
+                if changes is not MISSING:
+                    actions.append(
+                        SyncAction(
+                            "change", resource, key, uuid=existing["uuid"], data=changes
+                        )
+                    )
+        if self.prune:
+            for key, item in current.items():
+                if key not in desired:
+                    actions.append(
+                        SyncAction("delete", resource, key, uuid=item["uuid"])
+                    )
+        return actions
+
+    def plan(self, desired, state=None):
+        """return the SyncPlan for reaching the desired state (without changing anything)
+
+        @param state: the current state (see 'fetch_state'), fetched if not given
+        """
+        if state is None:
+            state = self.fetch_state()
+        actions = []
+        if desired.get("profile"):
+            changes = get_changes(state["profile"], desired["profile"])
+            if changes is not MISSING:
+                actions.append(
+                    SyncAction(
+                        "change",
+                        "profile",
+                        self.profile or "current",
+                        uuid=self.profile or "current",
+                        data=changes,
+                    )
+                )
+        for emitter_id, emitter in (desired.get("emitters") or {}).items():
+            current = state["emitters"].get(str(emitter_id))
+            if current is None:
+                raise ValueError("Unknown emitter: {}".format(emitter_id))
+            changes = get_changes(current, emitter)
+            if changes is not MISSING:
+                actions.append(
+                    SyncAction("change", "emitter", emitter_id, emitter_id, changes)
+                )
+        current_matchers = self._get_items(state["matchers"], "matcher")
+        if "matchers" in desired:
+            actions.extend(
+                self._diff_items(
+                    "matcher",
+                    current_matchers,
+                    self._get_items(desired["matchers"], "matcher"),
+                )
+            )
+        # matchers to be created are referenced by their key until they exist
+        references = {key: item["uuid"] for key, item in current_matchers.items()}
+        if "detectables" in desired:
+            actions.extend(
+                self._diff_items(
+                    "detectable",
+                    self._get_items(state["detectables"], "detectable"),
+                    self._get_items(desired["detectables"], "detectable"),
+                    references=references,
+                )
+            )
+        return SyncPlan(actions)
+
+    def _get_operation(self, action, created_matchers):
+        client = self.client
+        profile = self.profile
+        if action.resource == "profile":
+            return partial(client.change_detection_profile, action.uuid, action.data)
+        elif action.resource == "emitter":
+            return partial(
+                client.change_emitter, action.uuid, action.data, profile=profile
+            )
+        data = action.data
+        if action.resource == "detectable" and data is not None:
+            reference = data.get(self.matcher_field)
+            if reference in created_matchers:
+                data = dict(data)
+                data[self.matcher_field] = created_matchers[reference]
+        suffix = action.resource
+        if action.kind == "create":
+            return partial(
+                getattr(client, "post_" + suffix), profile=profile, data=data
+            )
+        elif action.kind == "change":
+            return partial(
+                getattr(client, "change_" + suffix), action.uuid, data, profile=profile
+            )
+        else:
+            return partial(
+                getattr(client, "delete_" + suffix), action.uuid, profile=profile
+            )
+
+    def execute(self, plan):
+        """send the requests of a plan (stage by stage)"""
+        created_matchers = {}
+        # the connections are shared by all stages (run_bulk hands them to its workers)
+        with self.client.keep_alive(max_idle=self.max_workers):
+            for actions in plan.get_stages():
+                if not plan.ok:
+                    for action in actions:
+                        action.state = "skipped"
+                    continue
+                outcome = run_bulk(
+                    self.client,
+                    (
+                        (index, self._get_operation(action, created_matchers))
+                        for index, action in enumerate(actions)
+                    ),
+                    max_workers=self.max_workers,
+                )
+                for index, action in enumerate(actions):
+                    if index in outcome.errors:
+                        action.state = "failed"
+                        action.error = outcome.errors[index]
+                    else:
+                        action.state = "done"
+                        action.result = outcome.results[index]
+                        if (
+                            action.kind == "create"
+                            and action.resource == "matcher"
+                            and isinstance(action.result, dict)
+                        ):
+                            created_matchers[action.key] = action.result.get("uuid")
+        return plan
+
+    def run(self, desired, dry_run=False):
+        """compute the plan for the desired state and execute it (unless 'dry_run')"""
+        plan = self.plan(desired)
+        return plan if dry_run else self.execute(plan)
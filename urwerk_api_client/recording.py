@@ -0,0 +1,535 @@
+"""record sample streams and spectra in a compact binary format
+
+A recording consists of a file header followed by chunks.  Every chunk starts with a
+header (kind, record count, values per record, payload size, first and last timestamp)
+followed by packed little-endian arrays:
+
+    samples: timestamps, channel values, match offsets (see SampleBatch) and the
+        matched IDs (detectable UUIDs) as a JSON array
+    spectra: the wavelength axis, the timestamps and the values of all spectra
+    metadata: a JSON object
+
+Chunks are only ever appended.  An index of all chunks (and a trailer pointing to it)
+is written when the recorder is closed and replaced when appending to the recording
+again.  Recordings without an index (e.g. after a crash) are read by scanning the chunk
+headers.
+
+    with Recorder("line3.urwrec", metadata={"device": client.root_url}) as recorder:
+        recorder.record_samples(client.get_sample_stream(count=100000))
+
+    with RecordingReader("line3.urwrec") as reader:
+        for batch in reader.iter_batches(start=1600000000000):
+            ...
+"""
+
+from array import array
+import bisect
+import collections
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+from urwerk_api_client.batches import get_sample_fields, SampleBatch
+from urwerk_api_client.colorsensor import SamplesAPI
+from urwerk_api_client.models import Sample
+from urwerk_api_client.spectrum import Spectrum
+
+SAMPLES = b"SMPL"
+SPECTRA = b"SPEC"
+METADATA = b"META"
+_INDEX = b"INDX"
+_CHUNK_KINDS = (SAMPLES, SPECTRA, METADATA)
+
+_MAGIC = b"URWREC"
+_VERSION = 1
+_INDEX_MAGIC = b"URWINDEX"
+# all structures are multiples of 8 bytes: the arrays of a payload stay aligned
+_FILE_HEADER = struct.Struct("<6sH")
+# kind, record count, values per record, payload size, first and last timestamp
+_CHUNK_HEADER = struct.Struct("<4sIIIdd")
+# offset, kind, record count, values per record, first and last timestamp
+_INDEX_ENTRY = struct.Struct("<Q4sIIxxxxdd")
+# offset of the index
+_TRAILER = struct.Struct("<Q8s")
+
+_IS_LITTLE_ENDIAN = sys.byteorder == "little"
+
+Chunk = collections.namedtuple(
+    "Chunk", ("offset", "kind", "count", "width", "first", "last")
+)
+
+
+def _to_little_endian(buffer, typecode):
+    if _IS_LITTLE_ENDIAN:
+        return buffer
+    values = array(typecode, bytes(buffer))
+    values.byteswap()
+    return values
+
+
+def _from_little_endian(view, typecode):
+    if _IS_LITTLE_ENDIAN:
+        return view.cast(typecode)
+    values = array(typecode, bytes(view))
+    values.byteswap()
+    return values
+
+
+def _encode_json(value):
+    payload = json.dumps(value).encode()
+    # pad with whitespace (valid JSON) to keep the following chunks aligned
+    return payload + b" " * (-len(payload) % 8)
+
+
+def _decode_json(view):
+    return json.loads(bytes(view).decode())
+
+
+def _read_layout(buffer):
+    """return the chunks of a recording and the offset behind the last chunk
+
+    The index is used if present.  Otherwise the chunk headers are scanned (an incomplete
+    chunk at the end is ignored).
+    """
+    if len(buffer) < _FILE_HEADER.size:
+        raise ValueError("Recording is too short")
+    magic, version = _FILE_HEADER.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise ValueError("Not a recording")
+    if version != _VERSION:
+        raise ValueError("Unsupported recording version: {}".format(version))
+    if len(buffer) >= _FILE_HEADER.size + _CHUNK_HEADER.size + _TRAILER.size:
+        index_offset, index_magic = _TRAILER.unpack_from(
+            buffer, len(buffer) - _TRAILER.size
+        )
+        if index_magic == _INDEX_MAGIC:
+            kind, count = _CHUNK_HEADER.unpack_from(buffer, index_offset)[:2]
+            if kind == _INDEX:
+                start = index_offset + _CHUNK_HEADER.size
+                chunks = [
+                    Chunk(
+                        *_INDEX_ENTRY.unpack_from(buffer, start + n * _INDEX_ENTRY.size)
+                    )
+                    for n in range(count)
+                ]
+                return chunks, index_offset
+    chunks = []
+    offset = _FILE_HEADER.size
+    while offset + _CHUNK_HEADER.size <= len(buffer):
+        kind, count, width, payload_size, first, last = _CHUNK_HEADER.unpack_from(
+            buffer, offset
+        )
+        end = offset + _CHUNK_HEADER.size + payload_size
+        if kind not in _CHUNK_KINDS or end > len(buffer):
+            break
+        chunks.append(Chunk(offset, kind, count, width, first, last))
+        offset = end
+    return chunks, offset
+
+
+class Recorder:
+    """append samples and spectra to a recording
+
+    Samples are collected in chunks of 'chunk_size' samples, spectra in chunks of
+    'spectrum_chunk_size' spectra.  A chunk is written as soon as it is full, a sample
+    with a different number of channels or a spectrum with a different wavelength axis
+    arrives or the recorder is flushed.  Only the timestamp, the channel values and the
+    matched IDs of a sample are recorded.  Timestamps must not decrease.
+
+    @param path: the recording file (new recordings are appended to existing ones)
+    @param metadata: a JSON serializable dict stored in the recording (e.g. the device)
+    @param fields: function returning timestamp, channel values and matched IDs of a
+        sample (see 'urwerk_api_client.batches.get_sample_fields')
+    """
+
+    def __init__(
+        self,
+        path,
+        chunk_size=4096,
+        spectrum_chunk_size=64,
+        metadata=None,
+        fields=get_sample_fields,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.spectrum_chunk_size = spectrum_chunk_size
+        self.fields = fields
+        self._chunks, end = self._open()
+        self._batch = None
+        self._axis = None
+        self._spectrum_timestamps = array("d")
+        self._spectrum_values = array("d")
+        self._file.seek(end)
+        self._file.truncate()
+        if metadata is not None:
+            self._write_metadata(metadata)
+
+    def _open(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            self._file = open(self.path, "wb")
+            self._file.write(_FILE_HEADER.pack(_MAGIC, _VERSION))
+            return [], _FILE_HEADER.size
+        self._file = open(self.path, "r+b")
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _read_layout(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def _write_chunk(self, kind, count, width, first, last, buffers):
+        offset = self._file.tell()
+        payload_size = sum(memoryview(buffer).nbytes for buffer in buffers)
+        self._file.write(
+            _CHUNK_HEADER.pack(kind, count, width, payload_size, first, last)
+        )
+        for buffer in buffers:
+            self._file.write(buffer)
+        # readers of a growing recording only see complete chunks
+        self._file.flush()
+        self._chunks.append(Chunk(offset, kind, count, width, first, last))
+
+    def _write_metadata(self, metadata):
+        self._write_chunk(METADATA, 1, 0, 0, 0, [_encode_json(metadata)])
+
+    def _flush_samples(self):
+        batch = self._batch
+        if batch is None or len(batch) == 0:
+            return
+        timestamps = batch.timestamps
+        self._write_chunk(
+            SAMPLES,
+            len(batch),
+            batch.channel_count,
+            timestamps[0],
+            timestamps[-1],
+            [
+                _to_little_endian(timestamps, "d"),
+                _to_little_endian(batch.values.cast("B").cast("d"), "d"),
+                _to_little_endian(batch.match_offsets, "q"),
+                _encode_json(batch.match_ids),
+            ],
+        )
+        batch.clear()
+
+    def _flush_spectra(self):
+        timestamps = self._spectrum_timestamps
+        if not timestamps:
+            return
+        self._write_chunk(
+            SPECTRA,
+            len(timestamps),
+            len(self._axis),
+            timestamps[0],
+            timestamps[-1],
+            [
+                _to_little_endian(self._axis, "d"),
+                _to_little_endian(timestamps, "d"),
+                _to_little_endian(self._spectrum_values, "d"),
+            ],
+        )
+        self._spectrum_timestamps = array("d")
+        self._spectrum_values = array("d")
+
+    def add_sample(self, sample):
+        timestamp, values, matches = self.fields(sample)
+        batch = self._batch
+        if batch is not None and (
+            batch.is_full() or batch.channel_count != len(values)
+        ):
+            self._flush_samples()
+            if batch.channel_count != len(values):
+                batch = None
+        if batch is None:
+            batch = self._batch = SampleBatch(self.chunk_size, len(values))
+        batch.append(timestamp, values, matches)
+
+    def record_samples(self, samples):
+        """add all samples (e.g. of 'SamplesAPI.get_sample_stream') and return their count"""
+        count = 0
+        for sample in samples:
+            self.add_sample(sample)
+            count += 1
+        return count
+
+    def add_spectrum(self, spectrum, timestamp=None):
+        """add a Spectrum taken at the given time (default: now, in seconds)"""
+        if timestamp is None:
+            timestamp = time.time()
+        wavelengths = spectrum.wavelengths
+        if self._axis is None or (
+            wavelengths is not self._axis and wavelengths != self._axis
+        ):
+            self._flush_spectra()
+            self._axis = wavelengths
+        elif len(self._spectrum_timestamps) >= self.spectrum_chunk_size:
+            self._flush_spectra()
+        self._spectrum_timestamps.append(timestamp)
+        self._spectrum_values.extend(spectrum.values)
+
+    def record_spectral_samples(self, client, count=None, interval=None):
+        """acquire spectra of a SpectralAPI client and return their count
+
+        See 'SpectralAPI.iter_spectral_samples' for the arguments.  Every spectrum is
+        recorded with the time it was received.
+        """
+        recorded = 0
+        for sample in client.iter_spectral_samples(count=count, interval=interval):
+            self.add_spectrum(client.get_spectrum_array(sample), time.time())
+            recorded += 1
+        return recorded
+
+    def flush(self):
+        """write the pending samples and spectra"""
+        self._flush_samples()
+        self._flush_spectra()
+
+    def close(self):
+        """flush the recording and write its index"""
+        if self.closed:
+            return
+        try:
+            self.flush()
+            entries = [_INDEX_ENTRY.pack(*chunk) for chunk in self._chunks]
+            index_offset = self._file.tell()
+            self._file.write(
+                _CHUNK_HEADER.pack(
+                    _INDEX, len(entries), 0, len(entries) * _INDEX_ENTRY.size, 0, 0
+                )
+            )
+            self._file.write(b"".join(entries))
+            self._file.write(_TRAILER.pack(index_offset, _INDEX_MAGIC))
+        finally:
+            self._file.close()
+
+
+class RecordingReader:
+    """read a recording via a memory map
+
+    Only the chunks overlapping the requested time range are accessed.  Time ranges
+    include 'start' and exclude 'end' (in the units of the recorded timestamps).  The
+    batches and sample values returned are views of the mapped file: they must not be
+    used after the reader was closed.
+
+    @param path: the recording file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.chunks = _read_layout(self._map)[0]
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        """the number of recorded samples"""
+        return sum(chunk.count for chunk in self.chunks if chunk.kind == SAMPLES)
+
+    def close(self):
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # views are still in use: the map is closed as soon as they are released
+            pass
+        self._file.close()
+
+    def get_metadata(self):
+        """return the metadata of the recording (merged if appended multiple times)"""
+        metadata = {}
+        for chunk in self.chunks:
+            if chunk.kind == METADATA:
+                metadata.update(_decode_json(self._get_payload(chunk)))
+        return metadata
+
+    def get_time_range(self, kind=SAMPLES):
+        """return the first and the last timestamp (None for an empty recording)"""
+        chunks = [chunk for chunk in self.chunks if chunk.kind == kind]
+        if not chunks:
+            return None
+        return (
+            min(chunk.first for chunk in chunks),
+            max(chunk.last for chunk in chunks),
+        )
+
+    def _get_payload(self, chunk):
+        payload_size = _CHUNK_HEADER.unpack_from(self._view, chunk.offset)[3]
+        start = chunk.offset + _CHUNK_HEADER.size
+        return self._view[start : start + payload_size]
+
+    def _iter_chunks(self, kind, start, end):
+        for chunk in self.chunks:
+            if (
+                chunk.kind == kind
+                and (start is None or chunk.last >= start)
+                and (end is None or chunk.first < end)
+            ):
+                yield chunk
+
+    @staticmethod
+    def _get_slice(timestamps, start, end):
+        first = 0 if start is None else bisect.bisect_left(timestamps, start)
+        last = len(timestamps) if end is None else bisect.bisect_left(timestamps, end)
+        return first, last
+
+    def iter_batches(self, start=None, end=None):
+        """yield a SampleBatch for every chunk of samples within the time range"""
+        for chunk in self._iter_chunks(SAMPLES, start, end):
+            payload = self._get_payload(chunk)
+            count, width = chunk.count, chunk.width
+            values_start = 8 * count
+            offsets_start = values_start + 8 * count * width
+            ids_start = offsets_start + 8 * (count + 1)
+            timestamps = _from_little_endian(payload[:values_start], "d")
+            values = _from_little_endian(payload[values_start:offsets_start], "d")
+            first, last = self._get_slice(timestamps, start, end)
+            if first >= last:
+                continue
+            match_offsets = _from_little_endian(payload[offsets_start:ids_start], "q")
+            match_offsets = match_offsets[first : last + 1]
+            match_ids = _decode_json(payload[ids_start:])
+            base = match_offsets[0]
+            if base:
+                # the batch starts within the chunk: its offsets must start at 0
+                match_ids = match_ids[base : match_offsets[-1]]
+                match_offsets = array("q", (offset - base for offset in match_offsets))
+            yield SampleBatch.from_buffers(
+                timestamps[first:last],
+                values[first * width : last * width],
+                match_offsets,
+                match_ids,
+            )
+
+    def iter_samples(self, start=None, end=None):
+        """yield the samples within the time range
+
+        Samples are dicts with the keys "timestamp", "color" and "matches" (see
+        'urwerk_api_client.batches.get_sample_fields').
+        """
+        for batch in self.iter_batches(start, end):
+            timestamps = batch.timestamps
+            values = batch.values.cast("B").cast("d")
+            width = batch.channel_count
+            for index in range(len(batch)):
+                yield {
+                    "timestamp": timestamps[index],
+                    "color": values[index * width : (index + 1) * width].tolist(),
+                    "matches": batch.get_matches(index),
+                }
+
+    def iter_spectra(self, start=None, end=None):
+        """yield (timestamp, Spectrum) tuples of the spectra within the time range
+
+        All spectra of a chunk share the same wavelength axis.
+        """
+        for chunk in self._iter_chunks(SPECTRA, start, end):
+            payload = self._get_payload(chunk)
+            count, width = chunk.count, chunk.width
+            values_start = 8 * width + 8 * count
+            wavelengths = array("d", bytes(payload[: 8 * width]))
+            timestamps = _from_little_endian(payload[8 * width : values_start], "d")
+            first, last = self._get_slice(timestamps, start, end)
+            if not _IS_LITTLE_ENDIAN:
+                wavelengths.byteswap()
+            for index in range(first, last):
+                offset = values_start + 8 * width * index
+                values = array("d", bytes(payload[offset : offset + 8 * width]))
+                if not _IS_LITTLE_ENDIAN:
+                    values.byteswap()
+                yield timestamps[index], Spectrum(wavelengths, values)
+
+
+class RecordingReplay:
+    """replay the samples of a recording in place of a SamplesAPI client (e.g. in tests)
+
+        replay = RecordingReplay("line3.urwrec", speed=1)
+        with replay.get_sample_reader() as reader:
+            ...
+
+    @param recording: the path of a recording or a RecordingReader
+    @param start, end: the time range to be replayed (see RecordingReader)
+    @param speed: replay the samples in real time (1) or faster / slower (default: as
+        fast as possible)
+    @param timestamp_scale: the number of sample timestamp units per second
+    """
+
+    def __init__(
+        self, recording, start=None, end=None, speed=None, timestamp_scale=1000
+    ):
+        if not isinstance(recording, RecordingReader):
+            recording = RecordingReader(recording)
+        self.reader = recording
+        self.start = start
+        self.end = end
+        self.speed = speed
+        self.timestamp_scale = timestamp_scale
+        self._current_samples = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.reader.close()
+
+    def get_current_sample(self, as_model=False):
+        """return the next recorded sample (starting over at the end of the recording)"""
+        sample = None
+        if self._current_samples is not None:
+            sample = next(self._current_samples, None)
+        if sample is None:
+            self._current_samples = self.reader.iter_samples(self.start, self.end)
+            sample = next(self._current_samples, None)
+            if sample is None:
+                raise ValueError("No samples recorded")
+        return Sample(sample) if as_model else sample
+
+    def get_sample_stream(
+        self, count=None, format=None, delimiter=None, buffer_size=None
+    ):
+        """replay the recorded samples (like 'SamplesAPI.get_sample_stream')
+
+        For formats other than JSON (e.g. CSV) the samples are returned as lists of the
+        timestamp and the channel values.  'delimiter' and 'buffer_size' are ignored.
+        """
+        samples = self.reader.iter_samples(self.start, self.end)
+        if count:
+            samples = itertools.islice(samples, count)
+        started = None
+        for sample in samples:
+            if self.speed:
+                offset = sample["timestamp"] / self.timestamp_scale / self.speed
+                if started is None:
+                    started = time.monotonic() - offset
+                delay = started + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if format and format != "json":
+                yield [sample["timestamp"]] + sample["color"]
+            else:
+                yield sample
+
+    get_sample_reader = SamplesAPI.get_sample_reader
+    iter_sample_batches = SamplesAPI.iter_sample_batches
@@ -0,0 +1,122 @@
+"""timeouts, retries and circuit breaking for API requests"""
+
+import random
+import threading
+import time
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class Timeout:
+    """separate timeouts (in seconds) for establishing a connection and reading data
+
+    The non-pooled transport (urllib) supports only a single timeout: the larger one is
+    used there.
+    """
+
+    def __init__(self, connect=None, read=None):
+        self.connect = connect
+        self.read = read
+
+    def __repr__(self):
+        return "Timeout(connect={}, read={})".format(self.connect, self.read)
+
+    @classmethod
+    def parse(cls, value):
+        """turn None, a number, a (connect, read) tuple or a Timeout into a Timeout"""
+        if value is None or isinstance(value, cls):
+            return value
+        elif isinstance(value, tuple):
+            return cls(*value)
+        else:
+            return cls(value, value)
+
+    def get_total(self):
+        values = [value for value in (self.connect, self.read) if value is not None]
+        return max(values) if values else None
+
+
+class RetryPolicy:
+    """retry failed requests with exponential backoff and jitter
+
+    Only requests with idempotent methods are retried.  Connection errors (including
+    timeouts, see APIConnectionError) and the given status codes are considered to be
+    transient.  Unexpected response contents (e.g. embedded errors) are not retried.
+
+    @param total: maximum number of retries
+    @param backoff_factor: the delay before retry N is up to backoff_factor * 2 ** N
+    @param max_backoff: upper limit of the delay (in seconds)
+    @param jitter: randomize the delay (between zero and the calculated value)
+    """
+
+    def __init__(
+        self,
+        total=3,
+        backoff_factor=0.2,
+        max_backoff=10.0,
+        jitter=True,
+        methods=IDEMPOTENT_METHODS,
+        status_codes=(502, 503, 504),
+    ):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.methods = frozenset(methods)
+        self.status_codes = frozenset(status_codes)
+
+    def is_retryable(self, method, error):
+        from urwerk_api_client import APIConnectionError
+
+        if method not in self.methods:
+            return False
+        if isinstance(error, APIConnectionError):
+            return True
+        return getattr(error, "status_code", None) in self.status_codes
+
+    def get_delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff_factor * 2**attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+
+class CircuitBreaker:
+    """fail fast for hosts which are known to be unavailable
+
+    After 'failure_threshold' consecutive failures the circuit of a host opens: requests
+    are rejected immediately for 'reset_timeout' seconds.  Afterwards requests are
+    allowed again - the next failure opens the circuit once more, a success closes it.
+    A single circuit breaker may be shared by many clients.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, host):
+        with self._lock:
+            opened = self._opened.get(host)
+            return opened is not None and time.monotonic() - opened < self.reset_timeout
+
+    def get_open_hosts(self):
+        with self._lock:
+            now = time.monotonic()
+            return sorted(
+                host
+                for host, opened in self._opened.items()
+                if now - opened < self.reset_timeout
+            )
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                self._opened[host] = time.monotonic()
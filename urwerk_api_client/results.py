@@ -0,0 +1,41 @@
+"""the outcome of an operation which is applied to many items (e.g. devices)"""
+
+import collections
+
+
+class MultiResult:
+    """results and errors of an operation mapped by key (e.g. host or item ID)
+
+    Every key is contained either in 'results' or in 'errors' (in the order of the
+    input).
+    """
+
+    def __init__(self):
+        self.results = collections.OrderedDict()
+        self.errors = collections.OrderedDict()
+
+    def __repr__(self):
+        return "<MultiResult results={} errors={}>".format(
+            len(self.results), len(self.errors)
+        )
+
+    @classmethod
+    def from_outcome(cls, keys, outcome):
+        """sort a mapping of keys to (success, result or error) into a new instance"""
+        result = cls()
+        for key in keys:
+            success, value = outcome[key]
+            if success:
+                result.results[key] = value
+            else:
+                result.errors[key] = value
+        return result
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def raise_for_errors(self):
+        """raise the first error of the operation (if any)"""
+        for error in self.errors.values():
+            raise error
@@ -0,0 +1,198 @@
+"""incremental transfer of settings dumps
+
+The settings dump of a device is a JSON object with one entry per category.  Instead of
+keeping complete dumps, a digest of every category is remembered per device.  Only the
+categories differing from the last known state are uploaded.
+"""
+
+import io
+
+from urwerk_api_client import APIRequestError
+from urwerk_api_client.cache import ResponseCache
+from urwerk_api_client.lazy import lazy_import
+
+_base64 = lazy_import("base64")
+_hashlib = lazy_import("hashlib")
+_json = lazy_import("json")
+
+# digest of an empty dump (devices never send one)
+_EMPTY_DIGEST = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+def _get_digest(value):
+    serialized = _json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return _hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def get_category_digests(settings):
+    """return the SHA-256 digest of every category of a settings dump"""
+    return {category: _get_digest(value) for category, value in settings.items()}
+
+
+def decode_base64_stream(source, target, chunk_size=64 * 1024):
+    """decode base64 data read from a binary file object into another one
+
+    Returns the SHA-256 digest of the decoded data.  Only a single chunk is kept in
+    memory at any time.
+    """
+    digest = _hashlib.sha256()
+    pending = b""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        pending += b"".join(chunk.split())
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            data = _base64.b64decode(pending[:usable])
+            digest.update(data)
+            target.write(data)
+            pending = pending[usable:]
+    if pending:
+        # tolerate missing padding
+        data = _base64.b64decode(pending + b"=" * (-len(pending) % 4))
+        digest.update(data)
+        target.write(data)
+    return digest.hexdigest()
+
+
+def decode_settings(url, raw):
+    """parse the base64 encoded settings dump of a response
+
+    @param raw: the unpacked response (the dump itself or the dump within a JSON response)
+    """
+    if not isinstance(raw, str):
+        raise APIRequestError("API Settings Error ({}): no settings dump".format(url))
+    try:
+        return _json.loads(_base64.b64decode(raw.encode()).decode())
+    except ValueError as exc:
+        raise APIRequestError(
+            "API Settings Error ({}): invalid dump: {}".format(url, exc)
+        ) from exc
+
+
+def download_settings(url, response, unpacker, target):
+    """decode the settings dump of a response into a binary file object
+
+    Plain text dumps are decoded while they are received.  Returns the SHA-256 digest of
+    the dump.
+    """
+    try:
+        if response.headers.get("Content-Type") == "text/plain":
+            digest = decode_base64_stream(response, target)
+        else:
+            raw = unpacker(response.read())
+            if not isinstance(raw, str):
+                raise APIRequestError(
+                    "API Settings Error ({}): no settings dump".format(url)
+                )
+            digest = decode_base64_stream(io.BytesIO(raw.encode()), target)
+    except ValueError as exc:
+        raise APIRequestError(
+            "API Settings Error ({}): invalid dump: {}".format(url, exc)
+        ) from exc
+    if digest == _EMPTY_DIGEST:
+        raise APIRequestError("API Empty Response Error: {}".format(url))
+    return digest
+
+
+def get_base64_size(size):
+    """return the size of the base64 encoding of the given number of bytes"""
+    return 4 * ((size + 2) // 3)
+
+
+def encode_base64_stream(source, chunk_size=48 * 1024):
+    """yield the base64 encoding of the data read from a binary file object in blocks"""
+    pending = b""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        usable = len(pending) - len(pending) % 3
+        if usable:
+            yield _base64.b64encode(pending[:usable])
+            pending = pending[usable:]
+    if pending:
+        yield _base64.b64encode(pending)
+
+
+class SettingsState:
+    """the last known settings of a device: digests of the dump and its categories"""
+
+    __slots__ = ("digest", "category_digests")
+
+    def __init__(self, digest, category_digests):
+        self.digest = digest
+        self.category_digests = category_digests
+
+    def __repr__(self):
+        return "<SettingsState {} categories={}>".format(
+            self.digest[:12], sorted(self.category_digests)
+        )
+
+    def get_changed_categories(self, settings):
+        """return the (sorted) categories of a dump differing from this state"""
+        return sorted(
+            category
+            for category, digest in get_category_digests(settings).items()
+            if self.category_digests.get(category) != digest
+        )
+
+
+class SettingsSync:
+    """upload only the changed categories of settings dumps
+
+    The known state of every device is stored in a cache (keyed by the API URL), which
+    may be shared by the SettingsSync objects of many clients.  The state is updated
+    after every download and upload.  Changes applied by other means are only noticed
+    after 'refresh'.
+
+    @param client: an API client providing the settings methods (e.g. ColorsensorAPI)
+    @param cache: a ResponseCache for the known states (by default a private one)
+    """
+
+    def __init__(self, client, cache=None):
+        self.client = client
+        self.cache = ResponseCache() if cache is None else cache
+
+    def get_state(self):
+        """return the known SettingsState of the device (downloaded if unknown)"""
+        found, state = self.cache.get(self.client.root_url)
+        return state if found else self.refresh()
+
+    def refresh(self):
+        """download the settings of the device and store their state"""
+        settings = self.client.get_settings()
+        state = SettingsState(_get_digest(settings), get_category_digests(settings))
+        self.cache.put(self.client.root_url, state)
+        return state
+
+    def get_changed_categories(self, settings):
+        return self.get_state().get_changed_categories(settings)
+
+    def apply(self, settings, dry_run=False):
+        """upload the categories of a dump which differ from the state of the device
+
+        Returns the list of changed categories (which are not uploaded with 'dry_run').
+        """
+        state = self.get_state()
+        if state.digest == _get_digest(settings):
+            return []
+        categories = state.get_changed_categories(settings)
+        if categories and not dry_run:
+            self.client.set_settings(
+                {category: settings[category] for category in categories},
+                categories=categories,
+            )
+            category_digests = dict(state.category_digests)
+            category_digests.update(
+                (category, digest)
+                for category, digest in get_category_digests(settings).items()
+                if category in categories
+            )
+            self.cache.put(
+                self.client.root_url,
+                SettingsState(_get_digest(settings), category_digests),
+            )
+        return categories
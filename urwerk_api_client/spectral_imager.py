@@ -1,5 +1,45 @@
-from urwerk_api_client import HTTPRequester
+from array import array
+import time
+
+from urwerk_api_client import ConnectionPool, HTTPRequester
+from urwerk_api_client.cache import cached_response
 from urwerk_api_client.colorsensor import ColorsensorAPI
+from urwerk_api_client.spectral_processing import SpectralPipeline
+from urwerk_api_client.spectrum import Spectrum
+
+
+class SpectralSample:
+    """the spectrum and the regions of interest of a single acquisition
+
+    spectrum: array of [wavelength, measured value]
+    regions_of_interest: see SpectralAPI.get_regions_of_interest
+    metadata: all other fields of the sample
+    """
+
+    def __init__(self, spectrum, regions_of_interest, metadata=None):
+        self.spectrum = spectrum
+        self.regions_of_interest = regions_of_interest
+        self.metadata = {} if metadata is None else metadata
+
+    def __repr__(self):
+        return "<SpectralSample points={} regions_of_interest={}>".format(
+            len(self.spectrum), len(self.regions_of_interest)
+        )
+
+    @classmethod
+    def from_response(cls, data):
+        metadata = dict(data)
+        spectrum = metadata.pop("spectrum")
+        regions_of_interest = metadata.pop("regions_of_interest", [])
+        return cls(spectrum, regions_of_interest, metadata)
+
+    def get_spectrum_dict(self):
+        """returns array of point-dictionaries: [{"wavelength": 100.0, "value": 0.01}, ...]"""
+        return [{"wavelength": point[0], "value": point[1]} for point in self.spectrum]
+
+    def get_spectrum_array(self, wavelengths=None):
+        """return the spectrum as a Spectrum (reusing the given wavelength axis)"""
+        return Spectrum.from_points(self.spectrum, wavelengths)
 
 
 class SpectralAPI(HTTPRequester):
@@ -9,6 +49,43 @@ class SpectralAPI(HTTPRequester):
     def _get_spectral_sample(self):
         return self._get(url=(self.__sub_url, "sample"))
 
+    def get_spectral_sample(self):
+        """return spectrum and regions of interest of the same acquisition"""
+        return SpectralSample.from_response(self._get_spectral_sample())
+
+    def iter_spectral_samples(self, count=None, interval=None):
+        """acquire spectral samples continuously
+
+        Every sample is returned as soon as it was received.  The connection to the device
+        is kept alive during the whole acquisition (it is closed when the iteration ends
+        or the generator is discarded).
+
+        @param count: the number of samples to acquire (default: unlimited)
+        @param interval: the minimum time (in seconds) between the start of two
+            acquisitions (default: acquire as fast as possible)
+        """
+        acquired = 0
+        pool = self._get_connection_pool()
+        own_pool = None if pool is not None else ConnectionPool(max_idle=1)
+        try:
+            while count is None or acquired < count:
+                started = time.monotonic()
+                # the pool must not be used by the caller while the generator is paused
+                with self._use_connection_pool(pool or own_pool):
+                    # bypass a snapshot: every iteration requires a new acquisition
+                    response = self._get(
+                        url=(self.__sub_url, "sample"), handler=self._get_response
+                    )
+                yield SpectralSample.from_response(response)
+                acquired += 1
+                if interval is not None:
+                    delay = started + interval - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            if own_pool is not None:
+                own_pool.close()
+
     def get_spectral_sampling_settings(self, profile_id="current"):
         return self.get_detection_profile_by_uuid(profile_id)["sampling_settings"]
 
@@ -25,6 +102,26 @@ class SpectralAPI(HTTPRequester):
         """returns array of used wavelengths"""
         return self._get(url=(self.__sub_url, "wavelengths"))["wavelengths"]
 
+    @cached_response("detection-profile", "wavelengths")
+    def get_wavelength_axis(self):
+        """returns the used wavelengths as array('d') (shared by all Spectrum objects)"""
+        return array("d", self.get_wavelengths())
+
+    def get_spectrum_array(self, sample=None):
+        """return the current (or the given) spectral sample as a Spectrum
+
+        All spectra share the cached wavelength axis of the device instead of storing the
+        wavelengths of every frame.
+        """
+        if sample is None:
+            sample = self.get_spectral_sample()
+        axis = self.get_wavelength_axis()
+        spectrum = sample.get_spectrum_array(axis)
+        if spectrum.wavelengths is not axis:
+            # the configuration of the device changed in the meantime
+            self._response_cache.invalidate("wavelengths", scope=self.root_url)
+        return spectrum
+
     def reset_spectral_dark_reference(self):
         return self._delete(url=(self.__sub_url, "dark-reference"))
 
@@ -65,6 +162,58 @@ class SpectralAPI(HTTPRequester):
         """
         return self._get_spectral_sample()["regions_of_interest"]
 
+    def get_spectral_pipeline(self):
+        """return the client side processing pipeline (see SpectralPipeline)"""
+        pipeline = getattr(self, "_spectral_pipeline", None)
+        if pipeline is None:
+            pipeline = self._spectral_pipeline = SpectralPipeline()
+        return pipeline
+
+    def set_spectral_pipeline(self, pipeline):
+        self._spectral_pipeline = pipeline
+
+    def _acquire_spectrum_arrays(self, count):
+        return [
+            self.get_spectrum_array(sample)
+            for sample in self.iter_spectral_samples(count=count)
+        ]
+
+    def set_local_dark_reference(self, count=1):
+        """acquire a dark reference for the client side processing pipeline
+
+        In contrast to 'set_spectral_dark_reference' the reference is not applied by the
+        device.  The mean of 'count' spectra is used.
+        """
+        frames = self._acquire_spectrum_arrays(count)
+        self.get_spectral_pipeline().set_dark_reference(frames)
+
+    def set_local_white_reference(self, count=1):
+        """acquire a white reference for the client side processing pipeline
+
+        In contrast to 'spectral_normalize' the normalization is not applied by the
+        device.  The mean of 'count' spectra is used.
+        """
+        frames = self._acquire_spectrum_arrays(count)
+        self.get_spectral_pipeline().set_white_reference(frames)
+
+    def iter_processed_spectra(self, count=None, interval=None, batch_size=1):
+        """acquire spectra continuously and process them with the client side pipeline
+
+        Yields tuples of the processed Spectrum and the extrema of the pipeline's regions
+        of interest.  Frames are processed in batches of 'batch_size' (larger batches are
+        processed more efficiently, but are delivered with a delay).
+        """
+        pipeline = self.get_spectral_pipeline()
+        batch = []
+        for sample in self.iter_spectral_samples(count=count, interval=interval):
+            batch.append(self.get_spectrum_array(sample))
+            if len(batch) >= batch_size:
+                for spectrum in pipeline.process_batch(batch):
+                    yield spectrum, pipeline.get_regions_of_interest(spectrum)
+                batch = []
+        for spectrum in pipeline.process_batch(batch):
+            yield spectrum, pipeline.get_regions_of_interest(spectrum)
+
     def set_regions_of_interest(self, boundaries=None):
         """
         boundaries:
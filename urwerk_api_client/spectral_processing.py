@@ -0,0 +1,203 @@
+"""client side post-processing of spectra
+
+The device may run with its fastest raw settings (no averaging, no references) while
+the host applies dark/white references, averaging and region of interest evaluation to
+batches of frames.  NumPy is used for vectorized processing if it is available.
+"""
+
+from array import array
+import collections
+
+from urwerk_api_client.spectrum import Spectrum
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    else:
+        return numpy
+
+
+def _get_mean_values(spectra):
+    if isinstance(spectra, Spectrum):
+        return array("d", spectra.values)
+    spectra = list(spectra)
+    if not spectra:
+        raise ValueError("At least one spectrum is required for a reference")
+    return array(
+        "d",
+        [sum(column) / len(spectra) for column in zip(*(s.values for s in spectra))],
+    )
+
+
+class SpectralPipeline:
+    """subtract/normalize references, average and evaluate regions of interest
+
+    Processing steps (in this order):
+        1. subtract the dark reference (if set)
+        2. normalize by the white reference (if set): (value - dark) / (white - dark)
+        3. rolling average over the last 'average_count' frames
+        4. exponential smoothing with the factor 'smoothing' (0 < smoothing <= 1)
+
+    @param average_count: number of frames for the rolling average (1: disabled)
+    @param smoothing: factor of the exponential moving average (None: disabled)
+    @param regions_of_interest: (lower, upper) wavelength boundaries
+    @param use_numpy: use NumPy (None: if available)
+    """
+
+    def __init__(
+        self, average_count=1, smoothing=None, regions_of_interest=None, use_numpy=None
+    ):
+        if average_count < 1:
+            raise ValueError("Invalid average count: {}".format(average_count))
+        if smoothing is not None and not 0 < smoothing <= 1:
+            raise ValueError("Invalid smoothing factor: {}".format(smoothing))
+        self.average_count = average_count
+        self.smoothing = smoothing
+        self.regions_of_interest = list(regions_of_interest or [])
+        self._numpy = None if use_numpy is False else _import_numpy()
+        if use_numpy and self._numpy is None:
+            raise ImportError("NumPy is required for 'use_numpy=True'")
+        self._dark = None
+        self._white = None
+        self.reset()
+
+    def reset(self):
+        """forget the previous frames (used for averaging)"""
+        self._history = collections.deque(maxlen=self.average_count)
+        self._history_sum = None
+        self._smoothed = None
+
+    def set_dark_reference(self, spectra):
+        """store a dark reference (the mean of the given spectra)"""
+        self._dark = _get_mean_values(spectra)
+        self.reset()
+
+    def reset_dark_reference(self):
+        self._dark = None
+        self.reset()
+
+    def set_white_reference(self, spectra):
+        """store a white reference (the mean of the given spectra)"""
+        self._white = _get_mean_values(spectra)
+        self.reset()
+
+    def reset_white_reference(self):
+        self._white = None
+        self.reset()
+
+    def process(self, spectrum):
+        return self.process_batch([spectrum])[0]
+
+    def process_batch(self, spectra):
+        """process a sequence of frames (in order of acquisition)
+
+        Returns a list of Spectrum objects sharing the wavelength axis of the input.
+        """
+        spectra = list(spectra)
+        if not spectra:
+            return []
+        point_count = len(spectra[0])
+        for spectrum in spectra:
+            if len(spectrum) != point_count:
+                raise ValueError("All spectra of a batch must have the same size")
+        for reference in (self._dark, self._white):
+            if reference is not None and len(reference) != point_count:
+                raise ValueError("The reference does not match the spectrum size")
+        if self._numpy is None:
+            rows = self._process_rows([spectrum.values for spectrum in spectra])
+        else:
+            rows = self._process_matrix([spectrum.values for spectrum in spectra])
+        return [
+            Spectrum(spectrum.wavelengths, row) for spectrum, row in zip(spectra, rows)
+        ]
+
+    def _process_rows(self, rows):
+        dark, white = self._dark, self._white
+        if dark is not None:
+            rows = [
+                [value - offset for value, offset in zip(row, dark)] for row in rows
+            ]
+        if white is not None:
+            scales = white if dark is None else [w - d for w, d in zip(white, dark)]
+            rows = [
+                [value / scale if scale else 0.0 for value, scale in zip(row, scales)]
+                for row in rows
+            ]
+        result = []
+        for row in rows:
+            row = array("d", row)
+            if self.average_count > 1:
+                if self._history_sum is None:
+                    self._history_sum = array("d", bytes(8 * len(row)))
+                if len(self._history) == self.average_count:
+                    oldest = self._history[0]
+                    self._history_sum = array(
+                        "d", [s - o for s, o in zip(self._history_sum, oldest)]
+                    )
+                self._history.append(row)
+                self._history_sum = array(
+                    "d", [s + v for s, v in zip(self._history_sum, row)]
+                )
+                count = len(self._history)
+                row = array("d", [s / count for s in self._history_sum])
+            if self.smoothing is not None:
+                if self._smoothed is not None:
+                    factor = self.smoothing
+                    row = array(
+                        "d",
+                        [
+                            factor * v + (1 - factor) * s
+                            for v, s in zip(row, self._smoothed)
+                        ],
+                    )
+                self._smoothed = row
+            result.append(row)
+        return result
+
+    def _process_matrix(self, rows):
+        numpy = self._numpy
+        matrix = numpy.array(
+            [numpy.frombuffer(row, dtype=numpy.float64) for row in rows]
+        )
+        if self._dark is not None:
+            dark = numpy.frombuffer(self._dark, dtype=numpy.float64)
+            matrix -= dark
+        if self._white is not None:
+            scales = numpy.frombuffer(self._white, dtype=numpy.float64)
+            if self._dark is not None:
+                scales = scales - dark
+            valid = scales != 0
+            matrix[:, valid] /= scales[valid]
+            matrix[:, ~valid] = 0.0
+        if self.average_count > 1:
+            history = numpy.array(self._history).reshape(-1, matrix.shape[1])
+            combined = numpy.vstack([history, matrix])
+            sums = numpy.vstack(
+                [numpy.zeros((1, matrix.shape[1])), numpy.cumsum(combined, axis=0)]
+            )
+            ends = numpy.arange(len(history) + 1, len(combined) + 1)
+            starts = numpy.maximum(0, ends - self.average_count)
+            matrix = (sums[ends] - sums[starts]) / (ends - starts)[:, None]
+            self._history.clear()
+            self._history.extend(combined[-self.average_count :])
+        if self.smoothing is not None:
+            factor = self.smoothing
+            smoothed = self._smoothed
+            for index in range(len(matrix)):
+                if smoothed is not None:
+                    matrix[index] = factor * matrix[index] + (1 - factor) * smoothed
+                smoothed = matrix[index].copy()
+            self._smoothed = smoothed
+        result = []
+        for row in matrix:
+            values = array("d")
+            values.frombytes(numpy.ascontiguousarray(row).tobytes())
+            result.append(values)
+        return result
+
+    def get_regions_of_interest(self, spectrum):
+        """return the extrema of the configured regions of interest"""
+        return spectrum.get_regions_of_interest(self.regions_of_interest)
@@ -0,0 +1,134 @@
+"""compact representation of spectra"""
+
+from array import array
+import bisect
+
+
+class Spectrum:
+    """measured values of a spectrum stored in packed arrays
+
+    The wavelength axis is usually shared between all spectra of a device (see
+    'SpectralAPI.get_spectrum_array') and must not be modified.
+
+    @param wavelengths: array('d') of ascending wavelengths
+    @param values: array('d') of measured values (one per wavelength)
+    """
+
+    def __init__(self, wavelengths, values):
+        if len(wavelengths) != len(values):
+            raise ValueError(
+                "Number of wavelengths ({}) and values ({}) differ".format(
+                    len(wavelengths), len(values)
+                )
+            )
+        self.wavelengths = wavelengths
+        self.values = values
+
+    def __repr__(self):
+        if not self.values:
+            return "<Spectrum empty>"
+        return "<Spectrum points={} range={}..{}>".format(
+            len(self.values), self.wavelengths[0], self.wavelengths[-1]
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        """iterate over (wavelength, value) tuples"""
+        return zip(self.wavelengths, self.values)
+
+    @classmethod
+    def from_points(cls, points, wavelengths=None):
+        """create a spectrum from an array of [wavelength, value] (the API format)
+
+        The given wavelength axis is reused if it matches the points.  Otherwise a new axis
+        is created.
+        """
+        values = array("d", [point[1] for point in points])
+        if not _is_matching_axis(wavelengths, points):
+            wavelengths = array("d", [point[0] for point in points])
+        return cls(wavelengths, values)
+
+    def to_points(self):
+        """return the spectrum in the API format: array of [wavelength, value]"""
+        return [[wavelength, value] for wavelength, value in self]
+
+    def _get_index_range(self, lower, upper):
+        start = 0 if lower is None else bisect.bisect_left(self.wavelengths, lower)
+        end = (
+            len(self.wavelengths)
+            if upper is None
+            else bisect.bisect_right(self.wavelengths, upper)
+        )
+        return start, end
+
+    def get_range(self, lower=None, upper=None):
+        """return the part of the spectrum between the given wavelengths (inclusive)"""
+        start, end = self._get_index_range(lower, upper)
+        return Spectrum(self.wavelengths[start:end], self.values[start:end])
+
+    def get_value(self, wavelength):
+        """return the linearly interpolated value at the given wavelength"""
+        wavelengths = self.wavelengths
+        index = bisect.bisect_left(wavelengths, wavelength)
+        if index < len(wavelengths) and wavelengths[index] == wavelength:
+            return self.values[index]
+        if index == 0 or index == len(wavelengths):
+            raise ValueError(
+                "Wavelength out of range ({}..{}): {}".format(
+                    wavelengths[0], wavelengths[-1], wavelength
+                )
+            )
+        x0, x1 = wavelengths[index - 1], wavelengths[index]
+        y0, y1 = self.values[index - 1], self.values[index]
+        return y0 + (y1 - y0) * (wavelength - x0) / (x1 - x0)
+
+    def interpolate(self, wavelengths):
+        """return array('d') of values interpolated at the given (ascending) wavelengths"""
+        return array("d", [self.get_value(wavelength) for wavelength in wavelengths])
+
+    def get_extrema(self, lower=None, upper=None):
+        """return minimum and maximum within the given range
+
+        The result uses the format of 'SpectralAPI.get_regions_of_interest':
+        {"x_min": ..., "y_min": ..., "x_max": ..., "y_max": ...}
+        """
+        start, end = self._get_index_range(lower, upper)
+        if start >= end:
+            raise ValueError("Empty wavelength range: {}..{}".format(lower, upper))
+        region = self.values[start:end]
+        minimum, maximum = min(region), max(region)
+        index_min = start + region.index(minimum)
+        index_max = start + region.index(maximum)
+        return {
+            "x_min": self.wavelengths[index_min],
+            "y_min": minimum,
+            "x_max": self.wavelengths[index_max],
+            "y_max": maximum,
+        }
+
+    def get_regions_of_interest(self, boundaries):
+        """return the extrema of every (lower, upper) boundary"""
+        return [self.get_extrema(lower, upper) for lower, upper in boundaries]
+
+    def as_numpy(self):
+        """return the wavelengths and the values as NumPy arrays (without copying)"""
+        import numpy
+
+        return (
+            numpy.frombuffer(self.wavelengths, dtype=numpy.float64),
+            numpy.frombuffer(self.values, dtype=numpy.float64),
+        )
+
+
+def _is_matching_axis(wavelengths, points):
+    # a cheap test instead of comparing every single wavelength
+    return (
+        wavelengths is not None
+        and len(wavelengths) == len(points)
+        and (
+            not points
+            or (wavelengths[0] == points[0][0] and wavelengths[-1] == points[-1][0])
+        )
+    )
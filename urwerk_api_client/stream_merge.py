@@ -0,0 +1,245 @@
+"""merge the sample streams of many devices into one time aligned stream"""
+
+import collections
+import datetime
+import re
+import time
+
+from urwerk_api_client.stream_reader import SampleStreamReader
+
+_TIME_KEYS = ("time", "timestamp", "utc", "datetime", "now")
+_TIMEZONE_REGEX = re.compile(r"(Z|[+-]\d\d:?\d\d)$")
+
+
+def parse_system_time(value):
+    """return the seconds since the epoch of a response of 'SystemAPI.get_system_time'
+
+    Numbers are interpreted as seconds since the epoch, strings as ISO 8601 timestamps
+    (UTC unless stated otherwise).  Dicts are searched for a "time" (or similar) key.
+    """
+    if isinstance(value, dict):
+        for key in _TIME_KEYS:
+            if key in value:
+                return parse_system_time(value[key])
+        raise ValueError("Unknown system time format: {}".format(value))
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = value.strip().replace(" ", "T")
+    offset = datetime.timedelta(0)
+    match = _TIMEZONE_REGEX.search(text)
+    if match:
+        text = text[: match.start()]
+        zone = match.group(1).replace(":", "")
+        if zone != "Z":
+            offset = datetime.timedelta(hours=int(zone[1:3]), minutes=int(zone[3:5]))
+            if zone[0] == "-":
+                offset = -offset
+    parsed = datetime.datetime.strptime(
+        text, "%Y-%m-%dT%H:%M:%S.%f" if "." in text else "%Y-%m-%dT%H:%M:%S"
+    )
+    epoch = datetime.datetime(1970, 1, 1)
+    return (parsed - offset - epoch).total_seconds()
+
+
+def get_sample_timestamp(sample):
+    """return the "timestamp" of a sample (or the first value of a list, e.g. CSV)"""
+    return sample["timestamp"] if isinstance(sample, dict) else sample[0]
+
+
+def estimate_clock_offset(client, rounds=5, parse_time=parse_system_time):
+    """return the offset (in seconds) of the device clock relative to the local clock
+
+    The request with the shortest round trip is used: its response is assumed to be
+    created half way through.
+    """
+    best = None
+    with client.keep_alive():
+        for _ in range(rounds):
+            sent = time.time()
+            device_time = parse_time(client.get_system_time())
+            received = time.time()
+            round_trip = received - sent
+            if best is None or round_trip < best[0]:
+                best = (round_trip, device_time - (sent + received) / 2)
+    return best[1]
+
+
+class Frame:
+    """samples of all devices taken at (about) the same time
+
+    @param timestamp: the (local) time of the earliest sample in seconds since the epoch
+    @param samples: OrderedDict of samples by device (None for devices without a sample)
+    """
+
+    __slots__ = ("timestamp", "samples")
+
+    def __init__(self, timestamp, samples):
+        self.timestamp = timestamp
+        self.samples = samples
+
+    def __repr__(self):
+        return "<Frame {:.6f} devices={}>".format(
+            self.timestamp, sum(sample is not None for sample in self.samples.values())
+        )
+
+    def is_complete(self):
+        return all(sample is not None for sample in self.samples.values())
+
+
+class StreamMerger:
+    """combine the sample streams of many devices into frames ordered by time
+
+    Every device stream is read by a SampleStreamReader (in the background).  Sample
+    timestamps are converted to the local clock using the clock offset of every device
+    (estimated via 'get_system_time' when the merger is started).  A frame contains the
+    earliest pending sample and the next sample of every other device within 'window'
+    seconds.  A device that lags behind delays the frames for at most 'max_delay'
+    seconds.
+
+        merger = StreamMerger({"left": left_client, "right": right_client})
+        with merger:
+            for frames in merger.iter_batches(100):
+                ...
+
+    @param clients: a mapping of device names to API clients (or a list of clients)
+    @param window: the maximum time difference (in seconds) of samples in a frame
+    @param max_delay: the maximum time (in seconds) to wait for a lagging device
+    @param capacity: the reorder buffer size of every device (see SampleStreamReader)
+    @param policy: the buffer policy of the readers: by default reading pauses while a
+        buffer is full ("block"), with "drop-oldest" samples are dropped instead (see
+        'get_stats')
+    @param timestamp_scale: the number of sample timestamp units per second
+    @param get_timestamp: a function returning the timestamp of a sample
+    @param clock_offsets: a mapping of known clock offsets by device
+    @param reader_kwargs: passed on to the SampleStreamReaders (and to the streams)
+    """
+
+    def __init__(
+        self,
+        clients,
+        window=0.01,
+        max_delay=0.5,
+        capacity=10000,
+        policy=SampleStreamReader.BLOCK,
+        timestamp_scale=1000,
+        get_timestamp=get_sample_timestamp,
+        clock_offsets=None,
+        **reader_kwargs
+    ):
+        if not isinstance(clients, dict):
+            clients = collections.OrderedDict(
+                (client.root_url, client) for client in clients
+            )
+        self.clients = clients
+        self.window = window
+        self.max_delay = max_delay
+        self.timestamp_scale = timestamp_scale
+        self.get_timestamp = get_timestamp
+        self.clock_offsets = dict(clock_offsets or {})
+        self._reader_kwargs = dict(reader_kwargs, capacity=capacity, policy=policy)
+        self._readers = None
+        self._heads = {}
+        self._stalled = set()
+        self._ended = set()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            frame = self.get_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def start(self):
+        """estimate the missing clock offsets and start reading all streams"""
+        for name, client in self.clients.items():
+            if name not in self.clock_offsets:
+                self.clock_offsets[name] = estimate_clock_offset(client)
+        self._readers = collections.OrderedDict(
+            (name, SampleStreamReader(client, **self._reader_kwargs))
+            for name, client in self.clients.items()
+        )
+        for reader in self._readers.values():
+            reader.start()
+
+    def stop(self):
+        if self._readers is None:
+            return
+        for reader in self._readers.values():
+            reader.stop(timeout=0)
+
+    def _get_local_time(self, name, sample):
+        timestamp = self.get_timestamp(sample)
+        return timestamp / self.timestamp_scale - self.clock_offsets[name]
+
+    def _fill_heads(self):
+        """fetch the next sample of every device (waiting at most 'max_delay')
+
+        Devices which did not deliver in time are not waited for again until they
+        delivered their next sample.
+        """
+        deadline = time.monotonic() + self.max_delay
+        for name, reader in self._readers.items():
+            if name in self._heads or name in self._ended:
+                continue
+            if name in self._stalled:
+                timeout = 0
+            else:
+                timeout = max(0, deadline - time.monotonic())
+            try:
+                sample = reader.get(timeout=timeout)
+            except TimeoutError:
+                self._stalled.add(name)
+                continue
+            self._stalled.discard(name)
+            if sample is None:
+                self._ended.add(name)
+            else:
+                self._heads[name] = (self._get_local_time(name, sample), sample)
+
+    def get_stats(self):
+        """return the statistics (e.g. dropped samples) of the readers by device"""
+        if self._readers is None:
+            return {}
+        return {name: reader.get_stats() for name, reader in self._readers.items()}
+
+    def get_frame(self):
+        """return the next frame (None if all streams ended)
+
+        Waits until any device delivers a sample: lagging devices do not end the
+        merged stream.
+        """
+        self._fill_heads()
+        while not self._heads:
+            if len(self._ended) == len(self._readers):
+                return None
+            # nothing is delayed by waiting for the stalled devices
+            self._stalled.clear()
+            self._fill_heads()
+        start = min(local_time for local_time, _ in self._heads.values())
+        samples = collections.OrderedDict()
+        for name in self._readers:
+            head = self._heads.get(name)
+            if head is not None and head[0] - start <= self.window:
+                samples[name] = head[1]
+                del self._heads[name]
+            else:
+                samples[name] = None
+        return Frame(start, samples)
+
+    def iter_batches(self, batch_size=100):
+        """yield lists of (at most 'batch_size') frames"""
+        batch = []
+        for frame in self:
+            batch.append(frame)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
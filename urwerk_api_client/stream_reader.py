@@ -0,0 +1,204 @@
+"""read sample streams in the background"""
+
+import collections
+import threading
+
+from urwerk_api_client import APIRequestError
+from urwerk_api_client.resilience import RetryPolicy
+
+
+class SampleStreamReader:
+    """drain a sample stream on a separate thread into a bounded buffer
+
+    The consumer may fall behind temporarily without stalling the connection to the
+    device.  If the buffer is full, the oldest samples are dropped ("drop-oldest") or
+    reading pauses until the consumer caught up ("block").  A broken stream is reopened
+    (with the delays of 'retry'): samples sent by the device in the meantime are lost.
+
+        with client.get_sample_reader(capacity=10000) as reader:
+            for sample in reader:
+                ...
+
+    @param client: an API client providing 'get_sample_stream'
+    @param capacity: the maximum number of buffered samples
+    @param policy: "drop-oldest" or "block"
+    @param count: the total number of samples to be read (None: unlimited)
+    @param reconnect: reopen broken streams
+    @param retry: the RetryPolicy for reopening the stream (limiting the attempts
+        without receiving a sample in between)
+    @param stream_kwargs: passed on to 'get_sample_stream' (e.g. format, buffer_size)
+    """
+
+    DROP_OLDEST = "drop-oldest"
+    BLOCK = "block"
+
+    def __init__(
+        self,
+        client,
+        capacity=10000,
+        policy=DROP_OLDEST,
+        count=None,
+        reconnect=True,
+        retry=None,
+        **stream_kwargs
+    ):
+        if policy not in (self.DROP_OLDEST, self.BLOCK):
+            raise ValueError("Invalid buffer policy: {}".format(policy))
+        self.client = client
+        self.capacity = capacity
+        self.policy = policy
+        self.count = count
+        self.reconnect = reconnect
+        self.retry = (
+            RetryPolicy(total=10, backoff_factor=0.5) if retry is None else retry
+        )
+        self._stream_kwargs = stream_kwargs
+        self._buffer = collections.deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._finished = False
+        self._error = None
+        self._received = 0
+        self._dropped = 0
+        self._reconnects = 0
+        self._max_lag = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            sample = self.get()
+            if sample is None:
+                return
+            yield sample
+
+    def start(self):
+        """start reading (if not started yet)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """stop reading (after the current sample was received)"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _put(self, sample):
+        with self._condition:
+            if len(self._buffer) >= self.capacity:
+                if self.policy == self.BLOCK:
+                    while len(self._buffer) >= self.capacity and not self._stopped:
+                        self._condition.wait()
+                else:
+                    self._buffer.popleft()
+                    self._dropped += 1
+            self._buffer.append(sample)
+            self._received += 1
+            self._max_lag = max(self._max_lag, len(self._buffer))
+            self._condition.notify_all()
+
+    def _read(self):
+        remaining = None if self.count is None else self.count - self._received
+        stream = self.client.get_sample_stream(count=remaining, **self._stream_kwargs)
+        try:
+            for sample in stream:
+                self._put(sample)
+                if self._stopped or (
+                    self.count is not None and self._received >= self.count
+                ):
+                    return True
+        finally:
+            stream.close()
+        # the device ended the stream
+        return self.count is None or self._received >= self.count
+
+    def _run(self):
+        attempt = 0
+        try:
+            while not self._stopped:
+                received = self._received
+                try:
+                    if self._read():
+                        break
+                except (APIRequestError, OSError) as exc:
+                    if self._stopped:
+                        break
+                    if self._received > received:
+                        # the stream worked for a while: start over with short delays
+                        attempt = 0
+                    if not self.reconnect or attempt >= self.retry.total:
+                        self._error = exc
+                        break
+                    with self._condition:
+                        self._condition.wait_for(
+                            lambda: self._stopped, self.retry.get_delay(attempt)
+                        )
+                    attempt += 1
+                    self._reconnects += 1
+                except Exception as exc:
+                    # e.g. a malformed record: reconnecting would not help
+                    self._error = exc
+                    break
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """return the next sample (waiting for it if necessary)
+
+        None is returned if the reader finished and the buffer is empty.  The error
+        which stopped the reader is raised once the buffer is empty.
+        @raises TimeoutError: no sample arrived within 'timeout' seconds
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._buffer or self._finished or self._stopped, timeout
+            ):
+                raise TimeoutError("No sample within {} seconds".format(timeout))
+            if self._buffer:
+                sample = self._buffer.popleft()
+                self._condition.notify_all()
+                return sample
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            return None
+
+    def get_batch(self, max_count=None):
+        """return all buffered samples (at most 'max_count') without waiting"""
+        with self._condition:
+            buffer = self._buffer
+            if max_count is None or max_count >= len(buffer):
+                samples = list(buffer)
+                buffer.clear()
+            else:
+                samples = [buffer.popleft() for _ in range(max_count)]
+            self._condition.notify_all()
+            return samples
+
+    @property
+    def lag(self):
+        """the number of samples waiting in the buffer"""
+        return len(self._buffer)
+
+    def get_stats(self):
+        with self._condition:
+            return {
+                "received": self._received,
+                "dropped": self._dropped,
+                "reconnects": self._reconnects,
+                "lag": len(self._buffer),
+                "max_lag": self._max_lag,
+                "running": not self._finished,
+            }
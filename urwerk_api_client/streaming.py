@@ -0,0 +1,184 @@
+"""send and receive large payloads without keeping them in memory
+
+Request bodies are read from file objects or iterables while they are sent (see
+StreamingBody).  Response bodies are written to a file object or a preallocated buffer
+while they are received (see 'copy_response').
+"""
+
+import os
+import stat
+
+from urwerk_api_client.lazy import lazy_import
+
+_http_client = lazy_import("http.client")
+
+
+def get_stream_position(source):
+    """return the position of a file object (None if it is not seekable)"""
+    try:
+        return source.tell() if source.seekable() else None
+    except (AttributeError, OSError):
+        return None
+
+
+def get_remaining_size(source, position):
+    """return the number of bytes after the position of a file object (None: unknown)"""
+    if position is None:
+        # e.g. a pipe
+        return None
+    try:
+        status = os.fstat(source.fileno())
+    except (AttributeError, OSError, ValueError):
+        pass
+    else:
+        if stat.S_ISREG(status.st_mode):
+            return status.st_size - position
+    end = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return end - position
+
+
+class StreamingBody:
+    """a request body which is read while it is sent
+
+    Bodies of known length are sent with a Content-Length header, all others with
+    chunked transfer encoding.  A body can be sent again (e.g. for retrying a request)
+    only if its source is a seekable file object or a function returning a new iterable.
+
+        with open("dump.bin", "rb") as dump:
+            client._put(url="settings", data=StreamingBody(dump))
+
+    @param source: a binary file object, an iterable of bytes or a function returning
+        an iterable of bytes
+    @param length: the size of the body in bytes (determined automatically for files)
+    @param chunk_size: the size of the blocks read from file objects
+    """
+
+    def __init__(self, source, length=None, chunk_size=64 * 1024):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.bytes_sent = 0
+        self._position = None
+        self._consumed = False
+        if length is None and hasattr(source, "read"):
+            self._position = get_stream_position(source)
+            length = get_remaining_size(source, self._position)
+        self.length = length
+
+    def __repr__(self):
+        return "<StreamingBody length={}>".format(self.length)
+
+    def __iter__(self):
+        self._consumed = True
+        self.bytes_sent = 0
+        for block in self._iter_blocks():
+            if block:
+                self.bytes_sent += len(block)
+                yield block
+
+    def _iter_blocks(self):
+        source = self.source
+        if callable(source) and not hasattr(source, "read"):
+            source = source()
+        if hasattr(source, "read"):
+            read = source.read
+            while True:
+                block = read(self.chunk_size)
+                if not block:
+                    return
+                yield block
+        else:
+            yield from source
+
+    def is_chunked(self):
+        return self.length is None
+
+    def get_headers(self):
+        if self.is_chunked():
+            return {"Transfer-Encoding": "chunked"}
+        return {"Content-Length": str(self.length)}
+
+    def rewind(self):
+        """prepare sending the body again - returns False if this is impossible"""
+        if not self._consumed:
+            return True
+        source = self.source
+        if callable(source) and not hasattr(source, "read"):
+            return True
+        if self._position is not None:
+            source.seek(self._position)
+            return True
+        return False
+
+
+def rewind_body(data):
+    """prepare a request body for sending it again - returns False if this is impossible"""
+    return not isinstance(data, StreamingBody) or data.rewind()
+
+
+class BufferWriter:
+    """a binary file-like object writing into a preallocated buffer (e.g. a bytearray)
+
+        writer = BufferWriter(bytearray(1024 * 1024))
+        client.export_settings(writer)
+        dump = writer.getbuffer()
+
+    @raises ValueError: (by 'write') the data does not fit into the buffer
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        # the number of bytes written
+        self.size = 0
+
+    def write(self, data):
+        end = self.size + len(data)
+        if end > len(self._view):
+            raise ValueError("The data does not fit into the buffer")
+        self._view[self.size : end] = data
+        self.size = end
+        return len(data)
+
+    def getbuffer(self):
+        """return a view of the written part of the buffer"""
+        return self._view[: self.size]
+
+
+def copy_response(response, target, chunk_size=64 * 1024):
+    """write a response body to a binary file object or into a writable buffer
+
+    Buffers (e.g. a bytearray or a memoryview) are filled in place without any
+    intermediate copy.  Returns the number of bytes written.
+
+    @raises ValueError: the body does not fit into the buffer
+    @raises http.client.IncompleteRead: the connection was closed before the end of
+        the body
+    """
+    total = 0
+    if hasattr(target, "write"):
+        view = memoryview(bytearray(chunk_size))
+        while True:
+            count = response.readinto(view)
+            if not count:
+                break
+            target.write(view[:count])
+            total += count
+    else:
+        view = memoryview(target).cast("B")
+        while total < len(view):
+            count = response.readinto(view[total:])
+            if not count:
+                break
+            total += count
+        else:
+            if response.read(1):
+                raise ValueError("The response does not fit into the buffer")
+    _check_length(response, total)
+    return total
+
+
+def _check_length(response, received):
+    # http.client silently accepts bodies shorter than announced
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit() and received < int(length):
+        raise _http_client.IncompleteRead(b"", int(length) - received)
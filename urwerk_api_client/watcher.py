@@ -0,0 +1,457 @@
+"""watch device resources for changes made elsewhere (e.g. at the keypad or in the web UI)
+
+The device does not notify clients about changes.  A watcher therefore polls the
+resources and compares every result structurally with the previous one (see
+'urwerk_api_client.diff').  Resources which did not change for a while are polled less
+often.  After a change all resources are polled at the shortest interval again, since
+changes tend to come in bursts (e.g. switching the profile changes the detectables and
+the matchers).
+
+Every resource is polled once for all subscribers of a watcher.  Clients with
+'conditional_requests' enabled transfer unchanged resources only if the device supports
+validators.
+"""
+
+import collections
+import functools
+from operator import methodcaller
+import threading
+import time
+
+from urwerk_api_client.diff import iter_differences, MISSING
+from urwerk_api_client.lazy import lazy_import
+
+_asyncio = lazy_import("asyncio")
+
+# name -> (function returning the resource for a client, key of list items or None)
+# List resources are indexed by the key of their items: changes are reported per item.
+RESOURCES = collections.OrderedDict(
+    [
+        ("detection_profile", (methodcaller("get_current_detection_profile"), None)),
+        ("detectables", (methodcaller("get_detectables"), "uuid")),
+        ("matchers", (methodcaller("get_matchers"), "uuid")),
+        ("keypad_lock", (methodcaller("get_keypad_lock_state"), None)),
+    ]
+)
+
+
+class ChangeEvent(
+    collections.namedtuple("ChangeEvent", ("resource", "path", "old", "new"))
+):
+    """a single difference between two polls of a resource
+
+    'path' is the tuple of keys leading to the changed value.  Items of list resources
+    are keyed by their UUID: a new detectable is reported with the path (uuid,) and the
+    old value MISSING.
+    """
+
+    __slots__ = ()
+
+    @property
+    def kind(self):
+        """the type of the change: added, removed or changed"""
+        if self.old is MISSING:
+            return "added"
+        if self.new is MISSING:
+            return "removed"
+        return "changed"
+
+
+class _Resource:
+    """the polling state of a watched resource"""
+
+    def __init__(self, name, fetch, key):
+        self.name = name
+        self.fetch = fetch
+        self.key = key
+        self.value = MISSING
+        self.interval = 0
+        self.next_poll = 0
+        self.subscribers = 0
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+
+    def update(self, value):
+        """store a poll result and return the ChangeEvents (none for the first poll)"""
+        if self.key is not None:
+            value = collections.OrderedDict((item[self.key], item) for item in value)
+        previous, self.value = self.value, value
+        self.polls += 1
+        if previous is MISSING:
+            return []
+        events = [
+            ChangeEvent(self.name, path, old, new)
+            for path, old, new in iter_differences(previous, value)
+        ]
+        if events:
+            self.changes += 1
+        return events
+
+
+class _Subscription:
+    def __init__(self, watcher, callback, names):
+        self._watcher = watcher
+        self.callback = callback
+        self.names = names
+
+    def cancel(self):
+        """stop delivering events (and polling resources nobody is interested in)"""
+        if self._watcher is not None:
+            watcher, self._watcher = self._watcher, None
+            watcher._unsubscribe(self)
+
+
+class _WatcherEvents:
+    """asynchronous iterator over the ChangeEvents of a watcher
+
+    The events are delivered to the event loop which created the iterator.  Close it
+    (or use it as an asynchronous context manager) in order to cancel the subscription.
+    """
+
+    def __init__(self, watcher, resources, maxsize):
+        try:
+            loop = _asyncio.get_running_loop()
+        except AttributeError:
+            # Python < 3.7
+            loop = _asyncio.get_event_loop()
+        self._queue = _asyncio.Queue(maxsize)
+        self._subscription = watcher.subscribe(
+            functools.partial(loop.call_soon_threadsafe, self._put), resources
+        )
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except _asyncio.QueueFull:
+            # drop the oldest event in favour of the latest state
+            self._queue.get_nowait()
+            self._queue.put_nowait(event)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._queue.get()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._subscription.cancel()
+
+
+class _BaseWatcher:
+    def __init__(
+        self,
+        client,
+        resources=None,
+        min_interval=1,
+        max_interval=30,
+        backoff=1.5,
+        on_error=None,
+    ):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Invalid polling intervals")
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.on_error = on_error
+        self._resources = collections.OrderedDict()
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        for name, (fetch, key) in (
+            RESOURCES if resources is None else resources
+        ).items():
+            self.add_resource(name, fetch, key)
+
+    def add_resource(self, name, fetch, key=None):
+        """watch another resource
+
+        @param fetch: function returning the resource for the client of the watcher
+        @param key: the key identifying the items of a list resource (e.g. "uuid")
+        """
+        with self._lock:
+            if name in self._resources:
+                raise ValueError("Resource already watched: {}".format(name))
+            self._resources[name] = _Resource(name, fetch, key)
+
+    def subscribe(self, callback, resources=None):
+        """call 'callback(event)' for every ChangeEvent of the given resources
+
+        The resources are polled as long as anybody subscribed to them.  The first poll
+        only records the current state.  Returns a subscription with a 'cancel' method.
+
+        @param resources: names of the resources (None: all)
+        """
+        names = frozenset(self._resources if resources is None else resources)
+        unknown = names.difference(self._resources)
+        if unknown:
+            raise ValueError("Unknown resources: {}".format(", ".join(sorted(unknown))))
+        subscription = _Subscription(self, callback, names)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            for name in names:
+                resource = self._resources[name]
+                if resource.subscribers == 0:
+                    resource.interval = self.min_interval
+                    resource.next_poll = 0
+                resource.subscribers += 1
+        self._wake_up()
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.remove(subscription)
+            for name in subscription.names:
+                resource = self._resources[name]
+                resource.subscribers -= 1
+                if resource.subscribers == 0:
+                    # start over with a new baseline after the next subscription
+                    resource.value = MISSING
+
+    def events(self, resources=None, maxsize=1000):
+        """return an asynchronous iterator over the ChangeEvents of the given resources
+
+        Must be called within the event loop consuming the events.  If the consumer falls
+        behind by more than 'maxsize' events, the oldest ones are dropped.
+        """
+        return _WatcherEvents(self, resources, maxsize)
+
+    def get_value(self, resource):
+        """return the last polled state of a resource (MISSING: not polled yet)"""
+        return self._resources[resource].value
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "interval": resource.interval,
+                    "polls": resource.polls,
+                    "changes": resource.changes,
+                    "errors": resource.errors,
+                    "subscribers": resource.subscribers,
+                }
+                for name, resource in self._resources.items()
+            }
+
+    def _wake_up(self):
+        """wake up the poll loop after the subscriptions changed (no-op by default)"""
+
+    def _get_due(self, now):
+        """return the resources to be polled now and the delay until the next poll"""
+        due = []
+        delay = None
+        with self._lock:
+            for resource in self._resources.values():
+                if resource.subscribers == 0:
+                    continue
+                if resource.next_poll <= now:
+                    due.append(resource)
+                else:
+                    remaining = resource.next_poll - now
+                    delay = remaining if delay is None else min(delay, remaining)
+        return due, delay
+
+    def _process(self, results, now):
+        """handle the poll results ((resource, value, error) tuples) of a cycle"""
+        events = []
+        errors = []
+        with self._lock:
+            for resource, value, error in results:
+                if resource.subscribers == 0:
+                    # unsubscribed while polling
+                    continue
+                if error is None:
+                    try:
+                        events.extend(resource.update(value))
+                    except Exception as exc:
+                        # e.g. a list item without the key
+                        error = exc
+                if error is not None:
+                    resource.errors += 1
+                    errors.append((resource.name, error))
+            changed = bool(events)
+            for resource in self._resources.values():
+                if changed:
+                    resource.interval = self.min_interval
+                    resource.next_poll = min(
+                        resource.next_poll, now + self.min_interval
+                    )
+            for resource, _, _ in results:
+                if not changed:
+                    resource.interval = min(
+                        resource.interval * self.backoff, self.max_interval
+                    )
+                resource.next_poll = now + resource.interval
+            subscriptions = list(self._subscriptions)
+        for name, error in errors:
+            self._report(name, error)
+        for event in events:
+            for subscription in subscriptions:
+                if event.resource in subscription.names:
+                    try:
+                        subscription.callback(event)
+                    except Exception as exc:
+                        self._report(event.resource, exc)
+
+    def _report(self, name, error):
+        if self.on_error is not None:
+            self.on_error(name, error)
+
+
+class ChangeWatcher(_BaseWatcher):
+    """poll device resources on a separate thread and report their changes
+
+        with ChangeWatcher(client) as watcher:
+            watcher.subscribe(print, resources=["detection_profile", "keypad_lock"])
+            ...
+
+    Asynchronous consumers may iterate over 'events()' instead of subscribing a
+    callback.  Callbacks are called on the polling thread: slow callbacks delay the
+    following polls.
+
+    @param client: an API client providing the methods of the watched resources
+    @param resources: mapping of names to (fetch function, item key) tuples (default:
+        RESOURCES)
+    @param min_interval: the polling interval (in seconds) after a change
+    @param max_interval: the longest polling interval
+    @param backoff: factor for increasing the interval after every poll without change
+    @param on_error: called with the resource name and the exception for failed polls
+        and failing callbacks
+    """
+
+    def __init__(self, client, *args, **kwargs):
+        super().__init__(client, *args, **kwargs)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._woken = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """start polling (if not started yet)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """stop polling (after the current poll)"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll(self):
+        """poll all due resources once and report their changes"""
+        now = time.monotonic()
+        due, _ = self._get_due(now)
+        results = []
+        for resource in due:
+            try:
+                results.append((resource, resource.fetch(self.client), None))
+            except Exception as exc:
+                results.append((resource, None, exc))
+        self._process(results, now)
+
+    def _wake_up(self):
+        with self._condition:
+            self._woken = True
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                self._woken = False
+            self.poll()
+            _, delay = self._get_due(time.monotonic())
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or self._woken, delay)
+
+
+class AsyncChangeWatcher(_BaseWatcher):
+    """poll device resources with an asyncio client and report their changes
+
+    All due resources are polled concurrently.  The fetch functions of the resources
+    return awaitables.  See ChangeWatcher for the parameters.
+
+        async with AsyncChangeWatcher(client) as watcher:
+            async with watcher.events(resources=["matchers"]) as events:
+                async for event in events:
+                    ...
+    """
+
+    def __init__(self, client, *args, **kwargs):
+        super().__init__(client, *args, **kwargs)
+        self._task = None
+        self._woken = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    def start(self):
+        """start polling in a task of the current event loop (if not started yet)"""
+        if self._task is not None:
+            return
+        self._woken = _asyncio.Event()
+        self._task = _asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """stop polling"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except _asyncio.CancelledError:
+            pass
+
+    async def poll(self):
+        """poll all due resources once and report their changes"""
+        now = time.monotonic()
+        due, _ = self._get_due(now)
+        values = await _asyncio.gather(
+            *(resource.fetch(self.client) for resource in due), return_exceptions=True
+        )
+        results = [
+            (
+                (resource, None, value)
+                if isinstance(value, Exception)
+                else (resource, value, None)
+            )
+            for resource, value in zip(due, values)
+        ]
+        self._process(results, now)
+
+    def _wake_up(self):
+        if self._woken is not None:
+            self._woken.set()
+
+    async def _run(self):
+        while True:
+            self._woken.clear()
+            await self.poll()
+            _, delay = self._get_due(time.monotonic())
+            try:
+                await _asyncio.wait_for(self._woken.wait(), delay)
+            except _asyncio.TimeoutError:
+                pass